@@ -1,8 +1,18 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, jsonify, request
 from flask_cors import CORS
 from config import config
 import os
-from app.extensions import db, jwt, mail, setup_logging
+from app.extensions import db, jwt, setup_logging
+from app.db_routing import init_db_routing
+from app.assets import init_assets
+from app.compression import init_compression
+from app.page_cache import init_page_cache, render_page
+from app.voter_index import init_voter_index
+from app.migrations import check_schema
+from app.query_tracker import init_query_tracking
+from app.slow_queries import init_slow_query_log
+from app.metrics import init_metrics
+from app.profiler import init_profiler
 from app.routes.auth import auth_bp
 from app.routes.participants import participants_bp
 from app.routes.survey import survey_bp
@@ -11,6 +21,9 @@ from app.routes.participant_registration import participant_reg_bp
 from app.routes.candidates import candidates_bp
 from app.routes.public_results import results_bp
 from app.routes.voting_participant import voting_participant_bp
+from app.routes.profiler import profiler_bp
+from app.routes.slow_queries import slow_queries_bp
+from app.routes.assets import assets_bp
 from flask_jwt_extended import exceptions as jwt_exceptions
 from werkzeug.exceptions import HTTPException
 
@@ -34,10 +47,10 @@ def create_app(config_name=None):
         }
     })
     
-    # Inicializar extensiones
+    # Inicializar extensiones (la réplica de lectura, si hay, antes que db)
+    init_db_routing(app)
     db.init_app(app)
     jwt.init_app(app)
-    mail.init_app(app)
     
     # Manejadores de errores JWT - Usando decoradores de excepciones
     try:
@@ -87,6 +100,23 @@ def create_app(config_name=None):
     # Configurar logging
     setup_logging(app)
     
+    # Conteo de consultas por petición e instrumentación (/metrics)
+    init_query_tracking(app)
+    init_slow_query_log(app)
+    init_metrics(app)
+    
+    # Perfilado bajo demanda (desactivado por defecto)
+    init_profiler(app)
+    
+    # Assets estáticos con huella (static_url() en las plantillas)
+    init_assets(app)
+    
+    # Compresión gzip/deflate de respuestas JSON y HTML
+    init_compression(app)
+    
+    # Páginas públicas renderizadas una vez y servidas con ETag/304
+    init_page_cache(app)
+    
     # Registrar blueprints
     app.register_blueprint(auth_bp)
     app.register_blueprint(participants_bp)
@@ -96,44 +126,47 @@ def create_app(config_name=None):
     app.register_blueprint(candidates_bp)
     app.register_blueprint(results_bp)
     app.register_blueprint(voting_participant_bp)
+    app.register_blueprint(profiler_bp)
+    app.register_blueprint(slow_queries_bp)
+    app.register_blueprint(assets_bp)
     
     # Rutas públicas
     @app.route('/')
     def index():
         """Página principal - Panel de admin"""
-        return render_template('index.html', is_survey_page=False)
+        return render_page('index.html', is_survey_page=False)
     
     @app.route('/survey')
     def survey_page():
         """Página de encuesta pública"""
-        return render_template('survey.html', is_survey_page=True)
+        return render_page('survey.html', is_survey_page=True)
     
     @app.route('/results')
     def results_page():
         """Página de resultados públicos"""
-        return render_template('public_results.html', is_survey_page=False)
+        return render_page('public_results.html', is_survey_page=False)
     
     @app.route('/resultados')
     def results_spanish():
         """Página de resultados públicos (en español)"""
-        return render_template('public_results.html', is_survey_page=False)
+        return render_page('public_results.html', is_survey_page=False)
     
     @app.route('/registro')
     def registration_page():
         """Página de registro de participantes"""
-        return render_template('participant_registration.html', is_survey_page=False)
+        return render_page('participant_registration.html', is_survey_page=False)
     
     @app.route('/login-participante')
     @app.route('/participant-login')
     def participant_login_page():
         """Página de login de participantes"""
-        return render_template('participant_login.html', is_survey_page=False)
+        return render_page('participant_login.html', is_survey_page=False)
     
     @app.route('/votar')
     @app.route('/vote')
     def voting_page():
         """Página de votación (requiere autenticación)"""
-        return render_template('participant_voting.html', is_survey_page=False)
+        return render_page('participant_voting.html', is_survey_page=False)
     
     # Manejo de errores
     @app.errorhandler(404)
@@ -163,22 +196,12 @@ def create_app(config_name=None):
     def bad_request(error):
         return jsonify({'error': 'Solicitud inválida'}), 400
     
-    # Crear tablas de base de datos
-    with app.app_context():
-        db.create_all()
-        
-        # Crear admin por defecto si no existe
-        from app.models import AdminUser
-        if AdminUser.query.count() == 0:
-            admin = AdminUser(
-                email='admin@encuestas.com',
-                full_name='Administrador',
-                is_active=True
-            )
-            admin.set_password('admin123')
-            db.session.add(admin)
-            db.session.commit()
-            app.logger.info('Admin por defecto creado: admin@encuestas.com / admin123')
+    # Verificar la versión del esquema (una consulta). Crear tablas, migrar e
+    # inicializar datos se hace con "python manage.py init|migrate"
+    check_schema(app)
+    
+    # Bitmap de votantes en memoria (una consulta; necesita el esquema)
+    init_voter_index(app)
     
     return app
 
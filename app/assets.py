@@ -0,0 +1,180 @@
+"""
+Assets estáticos con huella de contenido y variantes gzip precomprimidas.
+
+El build copia cada archivo .js/.css de app/static a app/static/dist con el
+hash de su contenido en el nombre (js/unified.js -> js/unified.3f9a0c1b2d4e.js),
+escribe al lado la variante .gz y un manifest.json. Las plantillas usan
+static_url('js/unified.js'); las URLs con hash se sirven desde /assets con
+Cache-Control immutable y el .gz cuando el navegador acepta gzip.
+
+    python manage.py assets           # build (p. ej. en el Dockerfile)
+
+Al arrancar solo se lee el manifest y se comparan tamaño y mtime de los
+fuentes; si algo cambió (y ASSETS_AUTO_BUILD) se reconstruye.
+"""
+
+from flask import current_app, url_for
+import gzip
+import hashlib
+import json
+import os
+
+MANIFEST = 'manifest.json'
+DIST_DIR = 'dist'
+HASH_LENGTH = 12
+GZIP_LEVEL = 9
+
+
+def _dist_dir(static_folder, output_dir=None):
+    return output_dir or os.path.join(static_folder, DIST_DIR)
+
+
+def _sources(static_folder, output_dir, extensions):
+    """Archivos a procesar, como rutas relativas a static ('js/unified.js')"""
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != output_dir)
+        for name in sorted(files):
+            if name.endswith(tuple(extensions)):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, static_folder).replace(os.sep, '/'), path
+
+
+def _write_atomic(path, data):
+    # Varios workers pueden construir a la vez: nombre temporal por proceso
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _fingerprinted_name(name, digest):
+    base, ext = os.path.splitext(name)
+    return f'{base}.{digest[:HASH_LENGTH]}{ext}'
+
+
+def load_manifest(static_folder, output_dir=None):
+    path = os.path.join(_dist_dir(static_folder, output_dir), MANIFEST)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_stale(manifest, static_folder, output_dir=None, extensions=('.js', '.css')):
+    """True si algún fuente cambió (tamaño o mtime) o falta alguno en el manifest"""
+    if not manifest:
+        return True
+    output_dir = _dist_dir(static_folder, output_dir)
+    files = manifest.get('files', {})
+    seen = 0
+    for name, path in _sources(static_folder, output_dir, extensions):
+        entry = files.get(name)
+        if entry is None:
+            return True
+        stat = os.stat(path)
+        if stat.st_size != entry['size'] or stat.st_mtime_ns != entry['mtime_ns']:
+            return True
+        if not os.path.exists(os.path.join(output_dir, entry['path'])):
+            return True
+        seen += 1
+    return seen != len(files)
+
+
+def build_assets(static_folder, output_dir=None, extensions=('.js', '.css'), clean=False):
+    """
+    Generar los archivos con huella, sus variantes .gz y el manifest.
+
+    Args:
+        static_folder: Carpeta de fuentes (app/static)
+        output_dir: Carpeta de salida (por defecto static/dist)
+        extensions: Extensiones a procesar
+        clean: Eliminar archivos con huella de builds anteriores
+
+    Returns:
+        El manifest generado
+    """
+    output_dir = _dist_dir(static_folder, output_dir)
+    files = {}
+    version = hashlib.sha256()
+
+    for name, path in _sources(static_folder, output_dir, extensions):
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        target = _fingerprinted_name(name, digest)
+        target_path = os.path.join(output_dir, target)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+
+        if not os.path.exists(target_path):
+            _write_atomic(target_path, data)
+
+        # mtime=0: el .gz es reproducible (mismo hash, mismos bytes)
+        compressed = gzip.compress(data, GZIP_LEVEL, mtime=0)
+        has_gzip = len(compressed) < len(data)
+        if has_gzip and not os.path.exists(target_path + '.gz'):
+            _write_atomic(target_path + '.gz', compressed)
+
+        stat = os.stat(path)
+        files[name] = {
+            'path': target,
+            'hash': digest,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'gzip': has_gzip
+        }
+        version.update(f'{name}:{digest}\n'.encode())
+
+    manifest = {'version': version.hexdigest()[:HASH_LENGTH], 'files': files}
+    os.makedirs(output_dir, exist_ok=True)
+    _write_atomic(os.path.join(output_dir, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+
+    if clean:
+        current = {entry['path'] for entry in files.values()}
+        current |= {path + '.gz' for path in current}
+        for name, path in _sources(output_dir, None, extensions + tuple(e + '.gz' for e in extensions)):
+            if name not in current:
+                os.remove(path)
+
+    return manifest
+
+
+def init_assets(app):
+    """Cargar (o reconstruir si cambió algún fuente) el manifest de assets"""
+    extensions = tuple(app.config.get('ASSETS_EXTENSIONS', ('.js', '.css')))
+    output_dir = app.config.get('ASSETS_DIR')
+    state = {'enabled': False, 'version': None, 'files': {}, 'dir': _dist_dir(app.static_folder, output_dir)}
+    app.extensions['assets'] = state
+    app.add_template_global(static_url)
+
+    if not app.config.get('ASSETS_FINGERPRINT', True):
+        return state
+
+    manifest = load_manifest(app.static_folder, output_dir)
+    if app.config.get('ASSETS_AUTO_BUILD', True) and is_stale(manifest, app.static_folder, output_dir, extensions):
+        try:
+            manifest = build_assets(app.static_folder, output_dir, extensions)
+        except OSError as e:
+            app.logger.warning(f'No se pudieron generar los assets con huella: {str(e)}')
+
+    if manifest:
+        state.update(enabled=True, version=manifest['version'], files=manifest['files'])
+    return state
+
+
+def asset_version():
+    """Versión del conjunto de assets (cambia con cualquier archivo)"""
+    state = current_app.extensions.get('assets') or {}
+    return state.get('version')
+
+
+def static_url(filename):
+    """
+    URL de un archivo estático: con huella (/assets/...) si está en el
+    manifest, o la URL normal de /static como respaldo.
+    """
+    state = current_app.extensions.get('assets') or {}
+    entry = state.get('files', {}).get(filename) if state.get('enabled') else None
+    if entry is None:
+        return url_for('static', filename=filename)
+    return url_for('assets.serve_asset', filename=entry['path'])
@@ -0,0 +1,102 @@
+"""
+Compresión gzip/deflate de respuestas según Accept-Encoding.
+
+Solo se comprimen los tipos de COMPRESS_MIMETYPES a partir de
+COMPRESS_MIN_SIZE bytes; las respuestas ya codificadas (p. ej. los assets
+.gz), parciales (206) o sin cuerpo se dejan intactas. Las respuestas en
+streaming (exportaciones) se comprimen por partes sin cargarlas en memoria.
+
+Al comprimir, el ETag pasa a débil: una revalidación con If-None-Match sigue
+respondiendo 304 aunque el ETag se haya calculado sobre el cuerpo original.
+"""
+
+from flask import request
+import zlib
+
+# wbits de zlib: 31 = formato gzip, 15 = formato zlib (lo que HTTP llama "deflate")
+WBITS = {'gzip': 31, 'deflate': 15}
+
+SKIP_STATUS = (204, 206, 304)
+
+
+def _compressor(encoding, level):
+    return zlib.compressobj(level, zlib.DEFLATED, WBITS[encoding])
+
+
+def compress_bytes(data, encoding, level):
+    compressor = _compressor(encoding, level)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _compress_stream(chunks, encoding, level):
+    """Comprimir un iterable de bloques a medida que se genera"""
+    compressor = _compressor(encoding, level)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def choose_encoding(accept_encodings, algorithms):
+    """Codificación preferida por el cliente entre las soportadas (None si ninguna)"""
+    if not accept_encodings:
+        return None
+    return accept_encodings.best_match([a for a in algorithms if a in WBITS])
+
+
+def init_compression(app):
+    """Registrar la compresión de respuestas (COMPRESS_*)"""
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    level = app.config.get('COMPRESS_LEVEL', 5)
+    mimetypes = frozenset(app.config.get('COMPRESS_MIMETYPES', ()))
+    algorithms = tuple(app.config.get('COMPRESS_ALGORITHMS', ('gzip', 'deflate')))
+    compress_streams = app.config.get('COMPRESS_STREAMS', True)
+
+    @app.after_request
+    def compress_response(response):
+        if (response.mimetype not in mimetypes
+                or response.status_code < 200
+                or response.status_code in SKIP_STATUS
+                or 'Content-Encoding' in response.headers
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return response
+
+        # La representación depende de Accept-Encoding aunque esta vez no se comprima
+        response.vary.add('Accept-Encoding')
+
+        encoding = choose_encoding(request.accept_encodings, algorithms)
+        if encoding is None:
+            return response
+
+        if response.is_streamed or response.direct_passthrough:
+            length = response.content_length
+            if not compress_streams or (length is not None and length < min_size):
+                return response
+            response.direct_passthrough = False
+            response.response = _compress_stream(response.response, encoding, level)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            compressed = compress_bytes(data, encoding, level)
+            if len(compressed) >= len(data):
+                return response
+            response.set_data(compressed)
+
+        response.headers['Content-Encoding'] = encoding
+        response.headers.pop('Accept-Ranges', None)
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
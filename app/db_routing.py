@@ -0,0 +1,182 @@
+"""
+Enrutado de lecturas a una réplica de solo lectura.
+
+Con REPLICA_DATABASE_URL configurada se registra el bind 'replica'. Las
+rutas y servicios marcados con @read_only (o dentro de use_replica()) envían
+sus SELECT a la réplica; las escrituras, los flush y cualquier consulta fuera
+de esas zonas siguen en la base principal.
+
+El retraso de la réplica se mide con la versión de datos (stat_counters,
+ver CounterService): es el tiempo que lleva la réplica sin tener una versión
+que la principal ya tenía. Se comprueba como mucho cada
+REPLICA_CHECK_INTERVAL segundos; si supera REPLICA_MAX_LAG o la réplica no
+responde, las lecturas vuelven a la principal hasta que se recupere.
+
+Para probarlo con dos archivos SQLite: "python manage.py replicate".
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from collections import deque
+from flask import current_app, has_app_context
+from flask_sqlalchemy.session import Session
+from functools import wraps
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import Engine
+import threading
+import time
+
+REPLICA_BIND = 'replica'
+
+VERSION_QUERY = text("SELECT value FROM stat_counters WHERE name = 'data_version'")
+
+_read_only = ContextVar('read_only', default=False)
+
+
+@contextmanager
+def use_replica():
+    """Enviar a la réplica los SELECT ejecutados dentro del bloque (si está sana)"""
+    token = _read_only.set(True)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+def read_only(view):
+    """Marcar una ruta como de solo lectura: sus consultas pueden ir a la réplica"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with use_replica():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaMonitor:
+    """Estado de la réplica de un proceso: retraso, salud y lecturas enrutadas"""
+
+    def __init__(self, max_lag, check_interval):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.healthy = False
+        self.lag = None
+        self.error = None
+        self.last_check = None
+        self.replica_reads = 0
+        self.fallback_reads = 0
+        # Versiones de la principal que la réplica aún no tiene: (versión, visto en)
+        self._unseen = deque()
+        self._lock = threading.Lock()
+
+    def _versions(self, engines):
+        with engines[None].connect() as conn:
+            primary = conn.execute(VERSION_QUERY).scalar() or 0
+        with engines[REPLICA_BIND].connect() as conn:
+            replica = conn.execute(VERSION_QUERY).scalar() or 0
+        return primary, replica
+
+    def check(self, engines):
+        """Medir el retraso y decidir si la réplica puede atender lecturas"""
+        now = time.monotonic()
+        self.last_check = now
+        try:
+            primary, replica = self._versions(engines)
+        except Exception as e:
+            self._set_health(False, None, str(e))
+            return
+
+        if not self._unseen or self._unseen[-1][0] < primary:
+            self._unseen.append((primary, now))
+        while self._unseen and self._unseen[0][0] <= replica:
+            self._unseen.popleft()
+
+        lag = now - self._unseen[0][1] if self._unseen else 0.0
+        self._set_health(lag <= self.max_lag, lag, None)
+
+    def _set_health(self, healthy, lag, error):
+        if healthy != self.healthy:
+            if healthy:
+                current_app.logger.info(f'Réplica disponible (retraso {lag:.1f} s)')
+            else:
+                reason = error or f'retraso {lag:.1f} s > {self.max_lag} s'
+                current_app.logger.warning(f'Réplica fuera de servicio, lecturas a la principal: {reason}')
+        self.healthy, self.lag, self.error = healthy, lag, error
+
+    def engine(self, engines):
+        """Engine de la réplica si está sana (o None para usar la principal)"""
+        due = self.last_check is None or time.monotonic() - self.last_check >= self.check_interval
+        # Un solo hilo comprueba; el resto usa el último estado
+        if due and self._lock.acquire(blocking=False):
+            try:
+                self.check(engines)
+            finally:
+                self._lock.release()
+
+        if self.healthy:
+            self.replica_reads += 1
+            return engines[REPLICA_BIND]
+        self.fallback_reads += 1
+        return None
+
+    def mark_failed(self, error):
+        """Una consulta en la réplica falló: usar la principal hasta la próxima comprobación"""
+        self._set_health(False, self.lag, str(error))
+
+    def get_status(self):
+        return {
+            'healthy': self.healthy,
+            'lag_seconds': round(self.lag, 3) if self.lag is not None else None,
+            'max_lag_seconds': self.max_lag,
+            'error': self.error,
+            'replica_reads': self.replica_reads,
+            'fallback_reads': self.fallback_reads
+        }
+
+
+class RoutingSession(Session):
+    """Sesión que envía los SELECT de las zonas de solo lectura a la réplica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None
+                and _read_only.get()
+                and not self._flushing
+                and getattr(clause, 'is_select', False)
+                and has_app_context()):
+            monitor = current_app.extensions.get('db_routing')
+            if monitor is not None:
+                engine = monitor.engine(self._db.engines)
+                if engine is not None:
+                    return engine
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _replica_error(context):
+    """Un error operativo en la réplica la saca de servicio hasta la próxima comprobación"""
+    if not has_app_context() or not isinstance(context.sqlalchemy_exception, exc.OperationalError):
+        return
+    monitor = current_app.extensions.get('db_routing')
+    if monitor is not None and context.engine is current_app.extensions['sqlalchemy'].engines.get(REPLICA_BIND):
+        monitor.mark_failed(context.original_exception)
+
+
+def get_replica_status():
+    """Estado de la réplica del proceso actual (None si no hay réplica configurada)"""
+    monitor = current_app.extensions.get('db_routing')
+    return monitor.get_status() if monitor else None
+
+
+def init_db_routing(app):
+    """Registrar el bind de la réplica (antes de db.init_app)"""
+    url = app.config.get('REPLICA_DATABASE_URL')
+    if not url:
+        return
+
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    binds[REPLICA_BIND] = url
+    app.config['SQLALCHEMY_BINDS'] = binds
+    app.extensions['db_routing'] = ReplicaMonitor(
+        app.config.get('REPLICA_MAX_LAG', 5.0),
+        app.config.get('REPLICA_CHECK_INTERVAL', 1.0)
+    )
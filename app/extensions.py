@@ -1,27 +1,220 @@
 from flask_sqlalchemy import SQLAlchemy
+from app.db_routing import RoutingSession
 from flask_jwt_extended import JWTManager
-from flask_mail import Mail
+from flask import g, request, has_request_context, current_app
+from flask.logging import default_handler
+from datetime import datetime
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 import os
+import queue
+import time
+import uuid
 
 # Extensiones
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 jwt = JWTManager()
-mail = Mail()
+
+
+def get_mail():
+    """Extensión de correo de la app actual (flask_mail se carga en el primer envío)"""
+    state = current_app.extensions.get('mail')
+    if state is None:
+        from flask_mail import Mail
+        state = Mail().init_app(current_app)
+    return state
+
+
+# Listener de logging activo del proceso (uno solo aunque se creen varias apps)
+_log_listener = None
+_queue_handler = None
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Agregar id de petición, método, ruta y duración al registro.
+
+    Se ejecuta en el hilo de la petición (antes de encolar), porque el hilo
+    del listener no tiene contexto de petición.
+    """
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.method = request.method
+            record.path = request.path
+            started = g.get('request_start')
+            record.duration_ms = round((time.perf_counter() - started) * 1000, 2) if started else None
+        else:
+            record.request_id = record.method = record.path = record.duration_ms = None
+        return True
+
+
+class ModuleLevelFilter(logging.Filter):
+    """
+    Nivel mínimo por módulo (nombre del archivo o del logger).
+
+    Todos los handlers escriben con current_app.logger, así que el nivel se
+    decide por el módulo que emite el registro: p. ej. voting_participant=DEBUG.
+    """
+
+    def __init__(self, default_level, module_levels):
+        super().__init__()
+        self.default_level = default_level
+        self.module_levels = module_levels
+
+    def filter(self, record):
+        level = self.module_levels.get(record.module)
+        if level is None:
+            level = self.module_levels.get(record.name, self.default_level)
+        return record.levelno >= level
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro"""
+
+    FIELDS = ('request_id', 'method', 'path', 'duration_ms', 'status')
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.utcfromtimestamp(record.created).isoformat() + 'Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'line': record.lineno,
+            'message': record.getMessage()
+        }
+        for field in self.FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler que descarta registros si la cola está llena (nunca bloquea la petición)"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Resolver mensaje y traceback en el hilo de origen, conservando los campos extra
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_module_levels(value):
+    """Convertir 'voting_participant=DEBUG,report_service=WARNING' en {módulo: nivel}"""
+    levels = {}
+    for item in (value or '').split(','):
+        if '=' not in item:
+            continue
+        module, level = item.split('=', 1)
+        levels[module.strip()] = logging.getLevelName(level.strip().upper())
+    return {m: lvl for m, lvl in levels.items() if isinstance(lvl, int)}
+
+
+def _stop_log_listener():
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+atexit.register(_stop_log_listener)
 
 
 def setup_logging(app):
-    """Configurar logging de la aplicación"""
-    if not app.debug and not app.testing:
-        if not os.path.exists('logs'):
-            os.mkdir('logs')
-        
-        file_handler = RotatingFileHandler('logs/app.log', maxBytes=10240000, backupCount=10)
-        file_handler.setFormatter(logging.Formatter(
-            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-        ))
-        file_handler.setLevel(logging.INFO)
-        app.logger.addHandler(file_handler)
-        app.logger.setLevel(logging.INFO)
-        app.logger.info('Aplicación de encuestas iniciada')
+    """
+    Configurar logging de la aplicación.
+
+    Fuera de debug/testing los registros pasan por una cola: el hilo de la
+    petición solo encola y un hilo listener escribe en el archivo rotativo
+    (JSON lines con id de petición y duración). LOG_MODULE_LEVELS permite
+    bajar a DEBUG los logs de un módulo concreto sin cambiar el nivel global.
+    """
+    global _log_listener, _queue_handler
+
+    default_level = logging.getLevelName(str(app.config.get('LOG_LEVEL', 'INFO')).upper())
+    if not isinstance(default_level, int):
+        default_level = logging.INFO
+    module_levels = app.config.get('LOG_MODULE_LEVELS') or {}
+    if isinstance(module_levels, str):
+        module_levels = parse_module_levels(module_levels)
+    module_filter = ModuleLevelFilter(default_level, module_levels)
+
+    # El logger deja pasar el nivel más bajo configurado; los filtros deciden por módulo
+    app.logger.setLevel(min([default_level] + list(module_levels.values())))
+
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        if 'request_id' in g:
+            response.headers['X-Request-ID'] = g.request_id
+            if app.config.get('LOG_REQUESTS'):
+                app.logger.info(
+                    '%s %s %s', request.method, request.path, response.status_code,
+                    extra={'status': response.status_code}
+                )
+        return response
+
+    if app.debug or app.testing:
+        # Handler de consola de Flask (compartido entre apps): un solo filtro por módulo
+        for handler in app.logger.handlers:
+            for old in [f for f in handler.filters if isinstance(f, ModuleLevelFilter)]:
+                handler.removeFilter(old)
+            handler.addFilter(module_filter)
+        return
+
+    log_file = app.config.get('LOG_FILE', 'logs/app.log')
+    log_dir = os.path.dirname(log_file)
+    if log_dir and not os.path.exists(log_dir):
+        os.makedirs(log_dir, exist_ok=True)
+
+    if app.config.get('LOG_FORMAT', 'json') == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
+
+    file_handler = RotatingFileHandler(log_file, maxBytes=10240000, backupCount=10)
+    file_handler.setFormatter(formatter)
+    # La salida a consola también se escribe desde el listener
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    app.logger.removeHandler(default_handler)
+
+    # Reemplazar la cola de una app anterior del mismo proceso
+    _stop_log_listener()
+    if _queue_handler is not None:
+        app.logger.removeHandler(_queue_handler)
+
+    _queue_handler = DroppingQueueHandler(queue.Queue(app.config.get('LOG_QUEUE_SIZE', 10000)))
+    _queue_handler.addFilter(module_filter)
+    _queue_handler.addFilter(RequestContextFilter())
+    app.logger.addHandler(_queue_handler)
+
+    _log_listener = QueueListener(_queue_handler.queue, file_handler, stream_handler, respect_handler_level=True)
+    _log_listener.start()
+
+    app.logger.info('Aplicación de encuestas iniciada')
@@ -0,0 +1,309 @@
+"""
+Instrumentación de peticiones y endpoint /metrics en formato de texto Prometheus.
+
+Cada hilo acumula sus contadores en un shard propio (sin locks en el camino
+caliente); /metrics suma los shards del proceso. Al terminar un hilo (el
+servidor de desarrollo crea uno por conexión) su shard se suma a un total del
+proceso y se descarta: la memoria y el coste de /metrics dependen de los
+hilos vivos, no de las conexiones atendidas.
+
+Con METRICS_DIR configurado, cada worker vuelca periódicamente su snapshot a
+un archivo y /metrics agrega los archivos de todos los procesos.
+"""
+
+from flask import g, request, Response
+from app.query_tracker import current_query_stats
+import json
+import os
+import threading
+import time
+import weakref
+
+# Límites superiores (segundos) de los buckets del histograma de latencia
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_local = threading.local()
+
+# Shards de los hilos vivos (id -> shard) y suma de los de hilos terminados
+_shards = {}
+_retired = None
+_shards_lock = threading.Lock()
+
+# Último volcado a METRICS_DIR del proceso (el servidor crea un hilo por conexión)
+_last_flush = 0.0
+_flush_lock = threading.Lock()
+
+
+def _new_shard():
+    return {
+        'requests': {},    # (endpoint, method, status) -> peticiones
+        'latency': {},     # endpoint -> [conteo por bucket..., +Inf, suma]
+        'db_time': {},     # endpoint -> segundos en la base de datos
+        'db_queries': {},  # endpoint -> sentencias ejecutadas
+        'in_flight': 0
+    }
+
+
+class _ShardOwner:
+    """Dueño del shard en el thread-local: se libera al terminar el hilo"""
+    __slots__ = ('shard', '__weakref__')
+
+
+def _shard():
+    """Shard de métricas del hilo actual"""
+    owner = getattr(_local, 'owner', None)
+    if owner is None:
+        owner = _local.owner = _ShardOwner()
+        owner.shard = _new_shard()
+        key = id(owner)
+        with _shards_lock:
+            _shards[key] = owner.shard
+        weakref.finalize(owner, _retire, key)
+    return owner.shard
+
+
+def _retire(key):
+    """Sumar el shard de un hilo terminado al total del proceso"""
+    global _retired
+    with _shards_lock:
+        shard = _shards.pop(key, None)
+        if shard is None:
+            return
+        if _retired is None:
+            _retired = _new_shard()
+        # El gauge no se conserva: un hilo terminado no tiene peticiones en curso
+        _merge(_retired, shard, in_flight=False)
+
+
+def _copy(mapping):
+    """Copiar un dict que otro hilo puede estar modificando"""
+    while True:
+        try:
+            return list(mapping.items())
+        except RuntimeError:
+            continue
+
+
+def _merge(total, shard, in_flight=True):
+    """Sumar un shard (o snapshot) a total"""
+    for key, value in _copy(shard['requests']):
+        total['requests'][key] = total['requests'].get(key, 0) + value
+    for key, values in _copy(shard['latency']):
+        merged = total['latency'].setdefault(key, [0] * (len(LATENCY_BUCKETS) + 2))
+        for i, value in enumerate(list(values)):
+            merged[i] += value
+    for name in ('db_time', 'db_queries'):
+        for key, value in _copy(shard[name]):
+            total[name][key] = total[name].get(key, 0) + value
+    if in_flight:
+        total['in_flight'] += shard['in_flight']
+
+
+def snapshot():
+    """Sumar los shards de todos los hilos del proceso actual (vivos y terminados)"""
+    total = _new_shard()
+
+    with _shards_lock:
+        if _retired is not None:
+            _merge(total, _retired)
+        for shard in list(_shards.values()):
+            _merge(total, shard)
+
+    return total
+
+
+def _observe(endpoint, method, status, duration, db_time, db_queries):
+    """Registrar una petición terminada en el shard del hilo"""
+    shard = _shard()
+    key = (endpoint, method, status)
+    shard['requests'][key] = shard['requests'].get(key, 0) + 1
+
+    buckets = shard['latency'].get(endpoint)
+    if buckets is None:
+        buckets = shard['latency'][endpoint] = [0] * (len(LATENCY_BUCKETS) + 2)
+    for i, bound in enumerate(LATENCY_BUCKETS):
+        if duration <= bound:
+            buckets[i] += 1
+            break
+    else:
+        buckets[len(LATENCY_BUCKETS)] += 1
+    buckets[-1] += duration
+
+    shard['db_time'][endpoint] = shard['db_time'].get(endpoint, 0) + db_time
+    shard['db_queries'][endpoint] = shard['db_queries'].get(endpoint, 0) + db_queries
+
+
+# ---------------------------------------------------------------------------
+# Agregación entre procesos
+# ---------------------------------------------------------------------------
+
+def _serialize(data):
+    return {
+        'pid': os.getpid(),
+        'requests': [list(k) + [v] for k, v in data['requests'].items()],
+        'latency': [[k, v] for k, v in data['latency'].items()],
+        'db_time': [[k, v] for k, v in data['db_time'].items()],
+        'db_queries': [[k, v] for k, v in data['db_queries'].items()],
+        'in_flight': data['in_flight']
+    }
+
+
+def _deserialize(raw):
+    return {
+        'requests': {tuple(item[:3]): item[3] for item in raw['requests']},
+        'latency': {k: v for k, v in raw['latency']},
+        'db_time': {k: v for k, v in raw['db_time']},
+        'db_queries': {k: v for k, v in raw['db_queries']},
+        'in_flight': raw['in_flight']
+    }
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+def flush(app):
+    """Volcar el snapshot de este proceso a METRICS_DIR (escritura atómica)"""
+    global _last_flush
+    directory = app.config.get('METRICS_DIR')
+    if not directory:
+        return
+
+    with _flush_lock:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'metrics_{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(_serialize(snapshot()), f)
+        os.replace(tmp_path, path)
+        _last_flush = time.monotonic()
+
+
+def collect(app):
+    """Métricas agregadas de todos los workers (o solo de este proceso)"""
+    data = snapshot()
+    directory = app.config.get('METRICS_DIR')
+    if not directory or not os.path.isdir(directory):
+        return data
+
+    flush(app)
+    data = _new_shard()
+    for name in os.listdir(directory):
+        if not (name.startswith('metrics_') and name.endswith('.json')):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+        # Los contadores de workers terminados se conservan; el gauge no
+        _merge(data, _deserialize(raw), in_flight=raw['pid'] == os.getpid() or _pid_alive(raw['pid']))
+
+    return data
+
+
+# ---------------------------------------------------------------------------
+# Formato de texto Prometheus
+# ---------------------------------------------------------------------------
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render(data):
+    """Generar la exposición en formato de texto Prometheus"""
+    lines = [
+        '# HELP http_requests_total Peticiones HTTP atendidas',
+        '# TYPE http_requests_total counter'
+    ]
+    for (endpoint, method, status), value in sorted(data['requests'].items()):
+        lines.append(
+            f'http_requests_total{{endpoint="{_label(endpoint)}",method="{method}",status="{status}"}} {value}'
+        )
+
+    lines += [
+        '# HELP http_request_duration_seconds Latencia de peticiones por endpoint',
+        '# TYPE http_request_duration_seconds histogram'
+    ]
+    for endpoint, values in sorted(data['latency'].items()):
+        label = _label(endpoint)
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, values):
+            cumulative += count
+            lines.append(f'http_request_duration_seconds_bucket{{endpoint="{label}",le="{bound}"}} {cumulative}')
+        cumulative += values[len(LATENCY_BUCKETS)]
+        lines.append(f'http_request_duration_seconds_bucket{{endpoint="{label}",le="+Inf"}} {cumulative}')
+        lines.append(f'http_request_duration_seconds_sum{{endpoint="{label}"}} {values[-1]:.6f}')
+        lines.append(f'http_request_duration_seconds_count{{endpoint="{label}"}} {cumulative}')
+
+    lines += [
+        '# HELP http_requests_in_flight Peticiones en curso',
+        '# TYPE http_requests_in_flight gauge',
+        f'http_requests_in_flight {data["in_flight"]}',
+        '# HELP db_query_duration_seconds_total Tiempo en la base de datos por endpoint',
+        '# TYPE db_query_duration_seconds_total counter'
+    ]
+    for endpoint, value in sorted(data['db_time'].items()):
+        lines.append(f'db_query_duration_seconds_total{{endpoint="{_label(endpoint)}"}} {value:.6f}')
+
+    lines += [
+        '# HELP db_queries_total Sentencias SQL ejecutadas por endpoint',
+        '# TYPE db_queries_total counter'
+    ]
+    for endpoint, value in sorted(data['db_queries'].items()):
+        lines.append(f'db_queries_total{{endpoint="{_label(endpoint)}"}} {value}')
+
+    return '\n'.join(lines) + '\n'
+
+
+# ---------------------------------------------------------------------------
+# Hooks de Flask
+# ---------------------------------------------------------------------------
+
+def init_metrics(app):
+    """Registrar la instrumentación de peticiones y el endpoint /metrics"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    flush_interval = app.config.get('METRICS_FLUSH_INTERVAL', 5)
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        _shard()['in_flight'] += 1
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'metrics_start' in g:
+            stats = current_query_stats()
+            _observe(
+                request.endpoint or 'unmatched',
+                request.method,
+                response.status_code,
+                time.perf_counter() - g.metrics_start,
+                stats.duration if stats else 0.0,
+                stats.count if stats else 0
+            )
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        if 'metrics_start' in g:
+            _shard()['in_flight'] -= 1
+            if app.config.get('METRICS_DIR'):
+                if time.monotonic() - _last_flush >= flush_interval:
+                    flush(app)
+
+    @app.route('/metrics')
+    def metrics():
+        """Métricas en formato de texto Prometheus"""
+        token = app.config.get('METRICS_TOKEN')
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return Response('No autorizado\n', status=401, mimetype='text/plain')
+
+        return Response(render(collect(app)), mimetype='text/plain; version=0.0.4')
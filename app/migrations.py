@@ -0,0 +1,292 @@
+"""
+Versionado del esquema y migraciones explícitas.
+
+El arranque de la aplicación solo ejecuta una consulta barata
+(SELECT max(version) FROM schema_version); la creación de tablas, los
+cambios de esquema, el índice de búsqueda y el admin por defecto se aplican
+con un comando explícito:
+
+    python manage.py init       # base nueva: esquema + admin por defecto
+    python manage.py migrate    # aplicar migraciones pendientes
+    python manage.py version    # versión actual y pendientes
+
+Cada migración es idempotente (comprueba columnas e índices antes de
+tocarlos), de modo que una base anterior al versionado se lleva a la última
+versión aplicando todas en orden.
+"""
+
+from flask import current_app
+from app.extensions import db
+from app.models import AdminUser, ArchivedVote, ClientFingerprint, SchemaVersion
+from sqlalchemy import func, inspect, select, text
+from datetime import datetime
+
+
+def _create_tables(options):
+    """Crear las tablas que falten (esquema base)"""
+    db.create_all()
+
+
+def _move_client_fingerprints(options):
+    """Mover IP y user agent de votes a client_fingerprints"""
+    columns = {c['name'] for c in inspect(db.engine).get_columns('votes')}
+
+    if 'client_id' not in columns:
+        db.session.execute(text(
+            "ALTER TABLE votes ADD COLUMN client_id INTEGER REFERENCES client_fingerprints(id)"
+        ))
+        db.session.commit()
+        _report(options, "Columna votes.client_id creada")
+
+    if 'ip_address' not in columns and 'user_agent' not in columns:
+        return
+
+    migrated = _backfill_client_ids(options.get('batch_size', 5000), options)
+    _report(options, f"{migrated} votos vinculados a client_fingerprints")
+
+    if options.get('keep_columns'):
+        _report(options, "Columnas votes.ip_address / votes.user_agent conservadas")
+        return
+
+    for column in ('user_agent', 'ip_address'):
+        if column in columns:
+            db.session.execute(text(f"ALTER TABLE votes DROP COLUMN {column}"))
+    db.session.commit()
+    _report(options, "Columnas votes.ip_address y votes.user_agent eliminadas")
+
+
+def _backfill_client_ids(batch_size, options):
+    """Rellenar votes.client_id por lotes ordenados por id (un commit por lote)"""
+    last_id = 0
+    migrated = 0
+
+    while True:
+        rows = db.session.execute(text(
+            "SELECT id, ip_address, user_agent FROM votes "
+            "WHERE id > :last_id AND client_id IS NULL ORDER BY id LIMIT :limit"
+        ), {'last_id': last_id, 'limit': batch_size}).all()
+
+        if not rows:
+            break
+
+        by_fingerprint = {}
+        vote_fingerprints = []
+        for vote_id, ip_address, user_agent in rows:
+            ip_address = (ip_address or '')[:45] or None
+            user_agent = (user_agent or '')[:500] or None
+            fingerprint = ClientFingerprint.compute_fingerprint(ip_address, user_agent)
+            by_fingerprint.setdefault(fingerprint, (ip_address, user_agent))
+            vote_fingerprints.append((vote_id, fingerprint))
+
+        existing = dict(db.session.query(ClientFingerprint.fingerprint, ClientFingerprint.id).filter(
+            ClientFingerprint.fingerprint.in_(list(by_fingerprint))
+        ).all())
+        missing = [
+            {'fingerprint': fp, 'ip_address': ip, 'user_agent': ua, 'created_at': datetime.utcnow()}
+            for fp, (ip, ua) in by_fingerprint.items() if fp not in existing
+        ]
+        if missing:
+            db.session.execute(ClientFingerprint.__table__.insert(), missing)
+            existing.update(db.session.query(ClientFingerprint.fingerprint, ClientFingerprint.id).filter(
+                ClientFingerprint.fingerprint.in_([m['fingerprint'] for m in missing])
+            ).all())
+
+        db.session.execute(
+            text("UPDATE votes SET client_id = :client_id WHERE id = :vote_id"),
+            [{'client_id': existing[fp], 'vote_id': vote_id} for vote_id, fp in vote_fingerprints]
+        )
+        db.session.commit()
+
+        last_id = rows[-1][0]
+        migrated += len(rows)
+        _report(options, f"  {migrated} votos migrados (último id {last_id})")
+
+    return migrated
+
+
+def _add_vote_round(options):
+    """Agregar votes.round_id (rondas de votación)"""
+    columns = {c['name'] for c in inspect(db.engine).get_columns('votes')}
+    if 'round_id' in columns:
+        return
+
+    db.session.execute(text(
+        "ALTER TABLE votes ADD COLUMN round_id INTEGER REFERENCES election_rounds(id)"
+    ))
+    db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_votes_round_id ON votes (round_id)"))
+    db.session.commit()
+    _report(options, "Columna votes.round_id creada")
+
+
+def _create_missing_indexes(options):
+    """Crear los índices declarados en los modelos que no existan en tablas antiguas"""
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.engine)
+                _report(options, f"Índice {index.name} creado")
+
+
+def _create_search_index(options):
+    """Índice de búsqueda de participantes (FTS5 en SQLite) y sus triggers"""
+    from app.services.search_service import SearchService
+    SearchService.init_search_index()
+
+
+def _add_candidate_photo(options):
+    """Agregar candidates.photo (nombre de la foto en el almacén por contenido)"""
+    columns = {c['name'] for c in inspect(db.engine).get_columns('candidates')}
+    if 'photo' in columns:
+        return
+
+    db.session.execute(text("ALTER TABLE candidates ADD COLUMN photo VARCHAR(80)"))
+    db.session.commit()
+    _report(options, "Columna candidates.photo creada")
+
+
+def _archived_vote_ids(options):
+    """Dar a archived_votes su propia clave (el id de votes pasa a vote_id)"""
+    columns = {c['name'] for c in inspect(db.engine).get_columns('archived_votes')}
+    if 'vote_id' in columns:
+        return
+
+    # SQLite no permite cambiar la clave primaria: se reconstruye la tabla
+    db.session.execute(text("ALTER TABLE archived_votes RENAME TO archived_votes_old"))
+    db.session.execute(text("DROP INDEX IF EXISTS idx_archived_round_position"))
+    db.session.commit()
+    ArchivedVote.__table__.create(db.engine)
+
+    copied = db.session.execute(text(
+        "INSERT INTO archived_votes (vote_id, round_id, participant_id, position_id, candidate_id, "
+        "vote_type, client_id, created_at) "
+        "SELECT id, round_id, participant_id, position_id, candidate_id, vote_type, client_id, created_at "
+        "FROM archived_votes_old ORDER BY round_id, id"
+    )).rowcount
+    db.session.execute(text("DROP TABLE archived_votes_old"))
+    db.session.commit()
+    _report(options, f"Tabla archived_votes reconstruida ({copied} votos con vote_id)")
+
+
+def _create_counters(options):
+    """Crear los contadores agregados con su conteo real (las lecturas no los crean)"""
+    from app.services.counter_service import CounterService
+    created = CounterService.create_missing()
+    if created:
+        _report(options, f"{len(created)} contadores creados")
+
+
+# Migraciones en orden: (versión, nombre, función). No reordenar ni renumerar.
+MIGRATIONS = (
+    (1, 'create_tables', _create_tables),
+    (2, 'client_fingerprints', _move_client_fingerprints),
+    (3, 'election_rounds', _add_vote_round),
+    (4, 'missing_indexes', _create_missing_indexes),
+    (5, 'participant_search_index', _create_search_index),
+    (6, 'candidate_photo', _add_candidate_photo),
+    (7, 'archived_vote_ids', _archived_vote_ids),
+    (8, 'stat_counters', _create_counters),
+)
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def _report(options, message):
+    output = options.get('output')
+    if output:
+        output(message)
+
+
+def current_version():
+    """Versión del esquema aplicada (None si la tabla schema_version no existe)"""
+    try:
+        return db.session.execute(select(func.max(SchemaVersion.version))).scalar() or 0
+    except Exception:
+        db.session.rollback()
+        return None
+
+
+def pending_migrations():
+    version = current_version() or 0
+    return [(number, name) for number, name, _ in MIGRATIONS if number > version]
+
+
+def migrate(**options):
+    """
+    Aplicar las migraciones pendientes en orden.
+
+    Args:
+        batch_size: Votos por lote al migrar client_fingerprints
+        keep_columns: Conservar las columnas antiguas de votes
+        output: Función para informar el progreso (p. ej. print)
+
+    Returns:
+        Lista de nombres de las migraciones aplicadas
+    """
+    version = current_version()
+    if version is None:
+        SchemaVersion.__table__.create(db.engine, checkfirst=True)
+        version = 0
+
+    applied = []
+    for number, name, step in MIGRATIONS:
+        if number <= version:
+            continue
+        _report(options, f"Aplicando migración {number}: {name}")
+        step(options)
+        db.session.add(SchemaVersion(version=number, name=name, applied_at=datetime.utcnow()))
+        db.session.commit()
+        applied.append(name)
+
+    return applied
+
+
+def ensure_default_admin(output=None):
+    """Crear el admin por defecto si no hay administradores"""
+    if AdminUser.query.count() > 0:
+        return None
+
+    admin = AdminUser(
+        email='admin@encuestas.com',
+        full_name='Administrador',
+        is_active=True
+    )
+    admin.set_password('admin123')
+    db.session.add(admin)
+    db.session.commit()
+    current_app.logger.info('Admin por defecto creado: admin@encuestas.com / admin123')
+    if output:
+        output("Admin creado: admin@encuestas.com / admin123")
+    return admin
+
+
+def init_database(**options):
+    """Inicializar una base: aplicar todas las migraciones y crear el admin por defecto"""
+    applied = migrate(**options)
+    ensure_default_admin(options.get('output'))
+    return applied
+
+
+def check_schema(app):
+    """
+    Verificar la versión del esquema al arrancar (una sola consulta).
+
+    Con AUTO_INIT_DB (desarrollo y testing) una base vacía o desactualizada
+    se inicializa automáticamente; en producción solo se avisa.
+    """
+    with app.app_context():
+        version = current_version()
+        if version == SCHEMA_VERSION:
+            return version
+
+        if app.config.get('AUTO_INIT_DB'):
+            init_database()
+            return SCHEMA_VERSION
+
+        app.logger.warning(
+            f'Esquema de base de datos en versión {version if version is not None else "sin versionar"}, '
+            f'se requiere {SCHEMA_VERSION}: '
+            f'ejecute "python manage.py migrate"'
+        )
+        return version
@@ -11,12 +11,13 @@ class Participant(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
     first_name = db.Column(db.String(100), nullable=False)
-    last_name = db.Column(db.String(100), nullable=False)
+    last_name = db.Column(db.String(100), nullable=False, index=True)
     field1 = db.Column(db.String(255), nullable=True)
     field2 = db.Column(db.String(255), nullable=True)
     field3 = db.Column(db.String(255), nullable=True)
-    has_voted = db.Column(db.Boolean, default=False, index=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # active_history: el valor anterior se conoce al cambiarlo (contador de participantes que votaron)
+    has_voted = db.column_property(db.Column(db.Boolean, default=False, index=True), active_history=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relaciones
@@ -74,13 +75,18 @@ class Candidate(db.Model):
     name = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=True)
     order = db.Column(db.Integer, default=0)
+    photo = db.Column(db.String(80), nullable=True)  # "<sha256>.<ext>" en el almacén de fotos
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relaciones
     votes = db.relationship('Vote', backref='candidate', lazy='dynamic', cascade='all, delete-orphan')
     
-    __table_args__ = (db.UniqueConstraint('position_id', 'name', name='unique_candidate_per_position'),)
+    __table_args__ = (
+        db.UniqueConstraint('position_id', 'name', name='unique_candidate_per_position'),
+        # La papeleta y los resultados listan candidatos por posición en este orden
+        db.Index('idx_candidate_position_order', 'position_id', 'order'),
+    )
     
     def to_dict(self):
         return {
@@ -89,6 +95,7 @@ class Candidate(db.Model):
             'name': self.name,
             'description': self.description,
             'order': self.order,
+            'photo': self.photo,
             'vote_count': self.votes.count(),
             'created_at': self.created_at.isoformat()
         }
@@ -103,13 +110,18 @@ class Vote(db.Model):
     position_id = db.Column(db.Integer, db.ForeignKey('positions.id'), nullable=False)
     candidate_id = db.Column(db.Integer, db.ForeignKey('candidates.id'), nullable=True)
     vote_type = db.Column(db.String(50), nullable=False)  # 'candidate', 'no_se', 'ninguno', 'abstencion', 'blanco'
-    ip_address = db.Column(db.String(45), nullable=True)  # IPv4 o IPv6
-    user_agent = db.Column(db.String(500), nullable=True)
+    client_id = db.Column(db.Integer, db.ForeignKey('client_fingerprints.id'), nullable=True)  # IP + user agent
+    round_id = db.Column(db.Integer, db.ForeignKey('election_rounds.id'), nullable=True, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
+    # Relaciones
+    client = db.relationship('ClientFingerprint')
+    
     __table_args__ = (
         db.UniqueConstraint('participant_id', 'position_id', name='unique_vote_per_position'),
         db.Index('idx_position_vote_type', 'position_id', 'vote_type'),
+        # Índice cubriente para conteos agrupados (tablas cruzadas, resultados)
+        db.Index('idx_vote_position_tally', 'position_id', 'vote_type', 'candidate_id', 'participant_id'),
     )
     
     def to_dict(self):
@@ -122,6 +134,83 @@ class Vote(db.Model):
             'vote_type': self.vote_type,
             'created_at': self.created_at.isoformat()
         }
+    
+    @property
+    def ip_address(self):
+        return self.client.ip_address if self.client else None
+    
+    @property
+    def user_agent(self):
+        return self.client.user_agent if self.client else None
+
+
+class ElectionRound(db.Model):
+    """Modelo para rondas de votación"""
+    __tablename__ = 'election_rounds'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='open', index=True)  # 'open', 'closing', 'closed'
+    opened_at = db.Column(db.DateTime, default=datetime.utcnow)
+    closed_at = db.Column(db.DateTime, nullable=True)
+    results_snapshot = db.Column(db.JSON, nullable=True)  # Resultados congelados al cerrar
+    archived_votes = db.Column(db.Integer, default=0)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'status': self.status,
+            'opened_at': self.opened_at.isoformat(),
+            'closed_at': self.closed_at.isoformat() if self.closed_at else None,
+            'archived_votes': self.archived_votes
+        }
+
+
+class ArchivedVote(db.Model):
+    """Modelo para votos de rondas cerradas (fuera de la tabla votes)"""
+    __tablename__ = 'archived_votes'
+    
+    # Clave propia: los ids de votes se reutilizan cuando la tabla queda vacía
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    vote_id = db.Column(db.Integer, nullable=False)  # Id que tenía en votes
+    round_id = db.Column(db.Integer, db.ForeignKey('election_rounds.id'), nullable=False)
+    participant_id = db.Column(db.Integer, nullable=False)
+    position_id = db.Column(db.Integer, nullable=False)
+    candidate_id = db.Column(db.Integer, nullable=True)
+    vote_type = db.Column(db.String(50), nullable=False)
+    client_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('idx_archived_round_position', 'round_id', 'position_id'),
+        {'sqlite_autoincrement': True},
+    )
+
+
+class ClientFingerprint(db.Model):
+    """Modelo para combinaciones únicas de IP y user agent (referenciadas desde votos)"""
+    __tablename__ = 'client_fingerprints'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    fingerprint = db.Column(db.String(64), unique=True, nullable=False, index=True)  # SHA-256 de IP + user agent
+    ip_address = db.Column(db.String(45), nullable=True)  # IPv4 o IPv6
+    user_agent = db.Column(db.String(500), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @staticmethod
+    def compute_fingerprint(ip_address, user_agent):
+        """Calcular hash que identifica una combinación IP + user agent"""
+        raw = f"{ip_address or ''}\n{user_agent or ''}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'ip_address': self.ip_address,
+            'user_agent': self.user_agent,
+            'created_at': self.created_at.isoformat()
+        }
 
 
 class AdminUser(db.Model):
@@ -239,3 +328,35 @@ class AuditLog(db.Model):
             'description': self.description,
             'created_at': self.created_at.isoformat()
         }
+
+
+class StatCounter(db.Model):
+    """Modelo para contadores agregados mantenidos en cada escritura"""
+    __tablename__ = 'stat_counters'
+    
+    name = db.Column(db.String(100), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'value': self.value,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class SchemaVersion(db.Model):
+    """Modelo para las migraciones de esquema aplicadas (ver app/migrations.py)"""
+    __tablename__ = 'schema_version'
+    
+    version = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'name': self.name,
+            'applied_at': self.applied_at.isoformat() if self.applied_at else None
+        }
@@ -0,0 +1,112 @@
+"""
+Caché de las páginas HTML públicas (/, /survey, /results, /votar, ...).
+
+Estas páginas solo dependen de la plantilla, sus parámetros y la versión de
+los assets, así que se renderizan una vez por proceso y se sirven desde
+memoria (también la variante gzip) con ETag y Last-Modified: un navegador que
+revalida recibe 304 sin cuerpo.
+
+La clave incluye la versión de los assets (app/assets.py); un despliegue
+reinicia los workers y vacía la caché. En desarrollo está desactivada para
+ver los cambios de plantillas al instante.
+"""
+
+from flask import current_app, make_response, render_template, request
+from app.assets import asset_version
+from app.compression import choose_encoding, compress_bytes
+from datetime import datetime, timezone
+import hashlib
+import os
+import threading
+
+_lock = threading.Lock()
+
+
+def _build_time(app):
+    """mtime más reciente de plantillas y manifest: igual en todos los workers"""
+    latest = 0.0
+    for root, _, files in os.walk(os.path.join(app.root_path, app.template_folder or 'templates')):
+        for name in files:
+            latest = max(latest, os.path.getmtime(os.path.join(root, name)))
+    assets_dir = (app.extensions.get('assets') or {}).get('dir')
+    manifest = os.path.join(assets_dir, 'manifest.json') if assets_dir else None
+    if manifest and os.path.exists(manifest):
+        latest = max(latest, os.path.getmtime(manifest))
+    return datetime.fromtimestamp(int(latest), timezone.utc)
+
+
+def init_page_cache(app):
+    app.extensions['page_cache'] = {
+        'enabled': app.config.get('PAGE_CACHE_ENABLED', True),
+        'pages': {},
+        'last_modified': _build_time(app),
+        'hits': 0,
+        'misses': 0
+    }
+
+
+def clear():
+    state = current_app.extensions['page_cache']
+    with _lock:
+        state['pages'].clear()
+
+
+def get_stats():
+    state = current_app.extensions['page_cache']
+    return {'pages': len(state['pages']), 'hits': state['hits'], 'misses': state['misses']}
+
+
+def _render(state, key, template, context):
+    body = render_template(template, **context).encode()
+    page = {
+        'body': body,
+        'etag': hashlib.sha1(body).hexdigest(),
+        'encoded': {}
+    }
+    with _lock:
+        state['pages'][key] = page
+        state['misses'] += 1
+    return page
+
+
+def render_page(template, **context):
+    """
+    Respuesta de una página pública cacheada por (plantilla, parámetros, versión de assets).
+
+    Responde 304 si el navegador ya tiene la misma versión (If-None-Match /
+    If-Modified-Since).
+    """
+    state = current_app.extensions['page_cache']
+    if not state['enabled']:
+        return render_template(template, **context)
+
+    key = (template, tuple(sorted(context.items())), asset_version(), request.script_root)
+    page = state['pages'].get(key)
+    if page is None:
+        page = _render(state, key, template, context)
+    else:
+        state['hits'] += 1
+
+    encoding = None
+    if len(page['body']) >= current_app.config.get('COMPRESS_MIN_SIZE', 1024):
+        encoding = choose_encoding(request.accept_encodings,
+                                   current_app.config.get('COMPRESS_ALGORITHMS', ()))
+    body = page['body']
+    if encoding and current_app.config.get('COMPRESS_ENABLED', True):
+        body = page['encoded'].get(encoding)
+        if body is None:
+            body = page['encoded'][encoding] = compress_bytes(
+                page['body'], encoding, current_app.config.get('COMPRESS_LEVEL', 5)
+            )
+
+    response = make_response(body)
+    response.mimetype = 'text/html'
+    if body is not page['body']:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    # Débil: mismo ETag para la versión comprimida y sin comprimir
+    response.set_etag(page['etag'], weak=True)
+    response.last_modified = state['last_modified']
+    response.cache_control.public = True
+    response.cache_control.no_cache = True  # siempre revalidar (la URL no lleva huella)
+    return response.make_conditional(request)
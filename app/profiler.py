@@ -0,0 +1,222 @@
+"""
+Perfilado bajo demanda de peticiones en vivo.
+
+Un administrador activa una sesión para un endpoint o ruta concreta, limitada
+a las próximas N peticiones y/o a una ventana de tiempo:
+
+- modo 'cprofile': perfil determinista agregado (descargable como .pstats)
+- modo 'sampling': muestreo de pilas cada interval_ms (descargable en formato
+  de pilas colapsadas compatible con flamegraph.pl / speedscope)
+
+Con el perfilado desactivado el costo por petición es una comprobación de un
+booleano. El estado es por proceso: con varios workers, la sesión se activa en
+el worker que atiende la petición de inicio.
+"""
+
+from flask import g, request, current_app
+from collections import Counter
+import io
+import os
+import sys
+import threading
+import time
+
+# Sesión de perfilado del proceso (None si nunca se activó)
+_session = None
+_enabled = False
+
+MODES = ('cprofile', 'sampling')
+
+
+class ProfilingSession:
+    """Sesión de perfilado con límite de peticiones y/o tiempo"""
+
+    def __init__(self, target=None, mode='cprofile', max_requests=None, seconds=None, interval_ms=5):
+        self.target = target
+        self.mode = mode
+        self.max_requests = max_requests
+        self.until = time.time() + seconds if seconds else None
+        self.interval = max(interval_ms, 1) / 1000.0
+        self.started_at = time.time()
+        self.profiled = 0
+        self.claimed = 0
+        self.stats = None
+        self.stacks = Counter()
+        self.samples = 0
+        self.sampled_threads = set()
+        self.stopped = False
+        self.lock = threading.Lock()
+        self.sampler = None
+
+    def is_active(self):
+        if self.stopped:
+            return False
+        if self.max_requests is not None and self.claimed >= self.max_requests:
+            return False
+        if self.until is not None and time.time() >= self.until:
+            return False
+        return True
+
+    def matches(self, endpoint, path):
+        return self.target is None or self.target in (endpoint, path)
+
+    def claim(self):
+        """Reservar un turno de perfilado para la petición actual"""
+        with self.lock:
+            if not self.is_active():
+                return False
+            self.claimed += 1
+            return True
+
+    def add_profile(self, profile):
+        import pstats
+        with self.lock:
+            if self.stats is None:
+                self.stats = pstats.Stats(profile)
+            else:
+                self.stats.add(profile)
+            self.profiled += 1
+
+    def finish_request(self):
+        with self.lock:
+            self.profiled += 1
+
+    def to_dict(self):
+        return {
+            'target': self.target,
+            'mode': self.mode,
+            'active': self.is_active(),
+            'max_requests': self.max_requests,
+            'until': self.until,
+            'started_at': self.started_at,
+            'profiled_requests': self.profiled,
+            'samples': self.samples
+        }
+
+
+def _frame_label(code):
+    filename = code.co_filename
+    try:
+        filename = os.path.relpath(filename)
+    except ValueError:
+        pass
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'
+
+
+def _sample_loop(session):
+    """Hilo de muestreo: registra la pila de cada hilo perfilado"""
+    labels = {}
+    while session.is_active() or session.sampled_threads:
+        frames = sys._current_frames()
+        for thread_id in list(session.sampled_threads):
+            frame = frames.get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code)
+                stack.append(label)
+                frame = frame.f_back
+            if stack:
+                session.stacks[';'.join(reversed(stack))] += 1
+                session.samples += 1
+        time.sleep(session.interval)
+
+
+def start(target=None, mode='cprofile', max_requests=None, seconds=None, interval_ms=5):
+    """Iniciar una sesión de perfilado (reemplaza la anterior)"""
+    global _session, _enabled
+
+    if _session is not None:
+        _session.stopped = True
+
+    session = ProfilingSession(target, mode, max_requests, seconds, interval_ms)
+    if mode == 'sampling':
+        session.sampler = threading.Thread(target=_sample_loop, args=(session,), daemon=True)
+        session.sampler.start()
+
+    _session = session
+    _enabled = True
+    return session
+
+
+def stop():
+    """Detener la sesión actual conservando los datos recolectados"""
+    global _enabled
+    _enabled = False
+    if _session is not None:
+        _session.stopped = True
+    return _session
+
+
+def get_session():
+    return _session
+
+
+def export_pstats(session):
+    """Estadísticas agregadas en formato binario de pstats"""
+    import marshal
+    return marshal.dumps(session.stats.stats)
+
+
+def export_collapsed(session):
+    """Pilas colapsadas: 'frame;frame;frame conteo' por línea"""
+    return ''.join(f'{stack} {count}\n' for stack, count in session.stacks.most_common())
+
+
+def export_text(session, limit=50, sort='cumulative'):
+    """Resumen legible de las funciones con más tiempo acumulado"""
+    import pstats
+    output = io.StringIO()
+    stats = pstats.Stats(stream=output)
+    stats.add(session.stats)
+    stats.sort_stats(sort).print_stats(limit)
+    return output.getvalue()
+
+
+def init_profiler(app):
+    """Registrar los hooks de perfilado (sin costo mientras esté desactivado)"""
+
+    @app.before_request
+    def start_request_profile():
+        global _enabled
+        if not _enabled:
+            return
+
+        session = _session
+        if not session.is_active():
+            _enabled = False
+            return
+        if not session.matches(request.endpoint, request.path) or not session.claim():
+            return
+
+        if session.mode == 'sampling':
+            session.sampled_threads.add(threading.get_ident())
+            g.profiling = ('sampling', session, None)
+            return
+
+        # cProfile/pstats se cargan solo cuando hay una sesión activa
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Otro perfilador activo en este intérprete
+            current_app.logger.warning('No se pudo activar cProfile para esta petición')
+            return
+        g.profiling = ('cprofile', session, profile)
+
+    @app.teardown_request
+    def finish_request_profile(exc):
+        profiling = g.pop('profiling', None)
+        if profiling is None:
+            return
+
+        mode, session, profile = profiling
+        if mode == 'sampling':
+            session.sampled_threads.discard(threading.get_ident())
+            session.finish_request()
+        else:
+            profile.disable()
+            session.add_profile(profile)
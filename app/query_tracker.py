@@ -0,0 +1,179 @@
+"""
+Conteo de sentencias SQL por petición y detección de consultas N+1.
+
+Los hooks de SQLAlchemy acumulan, por petición, el número de sentencias, el
+tiempo total en la base de datos y cuántas veces se repite cada forma de
+sentencia. En configuraciones que no son de producción se agregan las
+cabeceras X-Query-Count y Server-Timing a la respuesta.
+
+Para pruebas: count_queries() y assert_query_budget().
+"""
+
+from flask import g, request, has_request_context, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from collections import Counter
+from contextlib import contextmanager
+import re
+import threading
+import time
+
+_local = threading.local()
+_engine_hooks_installed = False
+
+# Funciones llamadas tras cada sentencia: listener(conn, cursor, statement, parameters, executemany, elapsed)
+_statement_listeners = []
+
+# Listas IN (?, ?, ?) de longitud variable se reducen a una sola forma
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class QueryStats:
+    """Estadísticas de sentencias SQL de una petición o bloque de código"""
+
+    __slots__ = ('count', 'duration', 'shapes')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement, elapsed):
+        self.count += 1
+        self.duration += elapsed
+        self.shapes[statement] += 1
+
+    def repeated(self, threshold):
+        """Formas de sentencia ejecutadas más de threshold veces"""
+        return [(normalize_statement(s), n) for s, n in self.shapes.most_common() if n > threshold]
+
+
+def normalize_statement(statement):
+    """Forma de una sentencia, independiente de sus parámetros"""
+    return _IN_LIST.sub('(?...)', _WHITESPACE.sub(' ', statement).strip())
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_start')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+
+    if has_request_context():
+        stats = g.get('query_stats')
+        if stats is not None:
+            stats.record(statement, elapsed)
+
+    for stats in getattr(_local, 'active', ()):
+        stats.record(statement, elapsed)
+
+    for listener in _statement_listeners:
+        listener(conn, cursor, statement, parameters, executemany, elapsed)
+
+
+def install_engine_hooks():
+    """Registrar (una sola vez) los eventos de ejecución en todos los engines"""
+    global _engine_hooks_installed
+    if not _engine_hooks_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _engine_hooks_installed = True
+
+
+def add_statement_listener(listener):
+    """Registrar una función que recibe cada sentencia ejecutada y su duración"""
+    install_engine_hooks()
+    if listener not in _statement_listeners:
+        _statement_listeners.append(listener)
+
+
+def current_query_stats():
+    """QueryStats de la petición en curso (o None)"""
+    return g.get('query_stats') if has_request_context() else None
+
+
+@contextmanager
+def count_queries():
+    """
+    Contar las sentencias ejecutadas dentro del bloque en este hilo
+
+    Uso:
+        with count_queries() as stats:
+            client.get('/api/results/summary')
+        print(stats.count)
+    """
+    install_engine_hooks()
+    stats = QueryStats()
+    active = getattr(_local, 'active', None)
+    if active is None:
+        active = _local.active = []
+    active.append(stats)
+    try:
+        yield stats
+    finally:
+        active.remove(stats)
+
+
+def assert_query_budget(client, url, max_queries, method='get', **kwargs):
+    """
+    Ejecutar una petición con el test client y verificar su presupuesto de consultas
+
+    Args:
+        client: Test client de Flask
+        url: URL a solicitar
+        max_queries: Máximo de sentencias SQL permitidas
+        method: Método HTTP del test client ('get', 'post', ...)
+        **kwargs: Argumentos para el test client (json, headers, ...)
+
+    Returns:
+        La respuesta de la petición
+    """
+    with count_queries() as stats:
+        response = getattr(client, method)(url, **kwargs)
+
+    if stats.count > max_queries:
+        top = '\n'.join(
+            f'  {n}x {normalize_statement(s)[:200]}' for s, n in stats.shapes.most_common(5)
+        )
+        raise AssertionError(
+            f'{method.upper()} {url} ejecutó {stats.count} consultas (presupuesto {max_queries}):\n{top}'
+        )
+
+    return response
+
+
+def init_query_tracking(app):
+    """Activar el conteo de consultas por petición"""
+    install_engine_hooks()
+
+    @app.before_request
+    def start_query_tracking():
+        g.query_stats = QueryStats()
+        g.query_tracking_start = time.perf_counter()
+
+    @app.after_request
+    def finish_query_tracking(response):
+        stats = g.get('query_stats')
+        if stats is None:
+            return response
+
+        threshold = current_app.config.get('QUERY_REPEAT_THRESHOLD', 10)
+        for shape, count in stats.repeated(threshold):
+            current_app.logger.warning(
+                f'Posible N+1 en {request.endpoint}: sentencia repetida {count} veces: {shape[:300]}'
+            )
+
+        if current_app.config.get('QUERY_DEBUG_HEADERS'):
+            total_ms = (time.perf_counter() - g.query_tracking_start) * 1000
+            response.headers['X-Query-Count'] = str(stats.count)
+            response.headers['Server-Timing'] = (
+                f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries", '
+                f'app;dur={total_ms:.2f}'
+            )
+
+        return response
@@ -0,0 +1,37 @@
+"""
+Servir los assets con huella generados por app/assets.py.
+
+El nombre cambia con el contenido, así que la respuesta se cachea un año
+como immutable; si el navegador acepta gzip se envía la variante .gz.
+"""
+
+from flask import Blueprint, current_app, request, send_from_directory, abort
+import mimetypes
+import os
+
+assets_bp = Blueprint('assets', __name__, url_prefix='/assets')
+
+
+@assets_bp.route('/<path:filename>', methods=['GET'])
+def serve_asset(filename):
+    """Archivo con huella (js/unified.<hash>.js), precomprimido si es posible"""
+    state = current_app.extensions.get('assets') or {}
+    directory = state.get('dir')
+    if not directory or filename.endswith('.gz'):
+        abort(404)
+
+    max_age = current_app.config.get('ASSETS_MAX_AGE', 31536000)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    gzip_ok = 'gzip' in request.headers.get('Accept-Encoding', '').lower()
+    compressed = gzip_ok and os.path.isfile(os.path.join(directory, filename + '.gz'))
+
+    response = send_from_directory(
+        directory, filename + '.gz' if compressed else filename,
+        mimetype=mimetype, max_age=max_age, conditional=True, etag=True
+    )
+    if compressed:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -3,27 +3,28 @@ Rutas para que participantes registrados se postulen como candidatos.
 Sistema de aspirantes para posiciones en las encuestas.
 """
 
-from flask import Blueprint, request, jsonify, render_template, current_app
+from flask import Blueprint, request, jsonify, render_template, current_app, send_file, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from werkzeug.utils import secure_filename
 from app.extensions import db
 from app.models import ParticipantUser, Candidate, Position, Vote
 from app.services.audit_service import AuditService
-from datetime import datetime
+from app.services.photo_service import PhotoService
 import os
-from pathlib import Path
 
 candidates_bp = Blueprint('candidates', __name__, url_prefix='/api/candidates')
 
 # Configuración de archivos permitidos
 ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif'}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
-UPLOAD_FOLDER = 'app/static/uploads/candidates'
 
 def allowed_file(filename):
     """Validar extensión de archivo"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def photo_url(photo):
+    """URL pública de una foto del almacén (o None)"""
+    return url_for('candidates.get_photo', name=photo) if photo else None
+
 @candidates_bp.route('/register', methods=['POST'])
 @jwt_required()
 def register_candidate():
@@ -102,42 +103,24 @@ def register_candidate():
                     'error': 'Formato de archivo no permitido. Use: JPG, PNG, GIF'
                 }), 400
             
-            # Validar tamaño
-            file.seek(0, os.SEEK_END)
-            file_size = file.tell()
-            file.seek(0)
-            
-            if file_size > MAX_FILE_SIZE:
-                return jsonify({
-                    'error': f'Archivo muy grande. Máximo {MAX_FILE_SIZE // (1024*1024)}MB'
-                }), 400
-            
+            # Guardar por bloques con el hash del contenido como nombre: el tamaño
+            # se valida mientras se escribe y una foto repetida no se duplica
             try:
-                # Crear carpeta si no existe
-                Path(UPLOAD_FOLDER).mkdir(parents=True, exist_ok=True)
-                
-                # Generar nombre de archivo seguro y único
-                filename = secure_filename(file.filename)
-                name_without_ext = filename.rsplit('.', 1)[0]
-                ext = filename.rsplit('.', 1)[1].lower()
-                timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-                safe_name = f"candidate_{position_id}_{timestamp}_{name_without_ext}.{ext}"
-                
-                filepath = os.path.join(UPLOAD_FOLDER, safe_name)
-                file.save(filepath)
-                
-                photo_filename = safe_name
-            
+                photo_filename, error = PhotoService.store(file.stream, MAX_FILE_SIZE)
             except Exception as e:
                 current_app.logger.error(f"Error al guardar archivo: {str(e)}")
                 return jsonify({'error': 'Error al procesar la foto'}), 500
+            
+            if error:
+                return jsonify({'error': error}), 400
     
     try:
         # Crear candidato
         candidate = Candidate(
             position_id=position_id,
             name=public_name,
-            description=description
+            description=description,
+            photo=photo_filename
         )
         
         # Nota: Podrías agregar un campo adicional en el modelo Candidate
@@ -163,6 +146,7 @@ def register_candidate():
                 'name': candidate.name,
                 'description': candidate.description,
                 'photo': photo_filename,
+                'photo_url': photo_url(photo_filename),
                 'created_at': candidate.created_at.isoformat()
             }
         }), 201
@@ -306,6 +290,43 @@ def get_candidate_detail(candidate_id):
                 'name': candidate.position.name
             },
             'vote_count': candidate.votes.count(),
+            'photo': candidate.photo,
+            'photo_url': photo_url(candidate.photo),
             'created_at': candidate.created_at.isoformat()
         }
     }), 200
+
+
+@candidates_bp.route('/photos/<name>', methods=['GET'])
+def get_photo(name):
+    """
+    Foto de un candidato por su hash de contenido.
+    RUTA PÚBLICA - No requiere autenticación.
+    
+    El nombre cambia si cambia la foto, así que se cachea como immutable con
+    un ETag fuerte (el hash) y se admiten peticiones Range. Con
+    PHOTO_X_ACCEL_REDIRECT (nginx) o USE_X_SENDFILE el proxy envía el archivo
+    sin pasar los bytes por Python.
+    """
+    path = PhotoService.path_for(name)
+    if path is None:
+        return jsonify({'error': 'Foto no encontrada'}), 404
+    
+    mimetype = PhotoService.mimetype_for(name)
+    max_age = current_app.config.get('PHOTO_MAX_AGE', 31536000)
+    etag = name.split('.', 1)[0]
+    accel_prefix = current_app.config.get('PHOTO_X_ACCEL_REDIRECT')
+    
+    if accel_prefix:
+        response = current_app.response_class(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = (
+            f"{accel_prefix.rstrip('/')}/{PhotoService.relative_path(name).replace(os.sep, '/')}"
+        )
+        response.set_etag(etag)
+        response.cache_control.max_age = max_age
+    else:
+        response = send_file(path, mimetype=mimetype, conditional=True, etag=etag, max_age=max_age)
+    
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
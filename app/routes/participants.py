@@ -1,45 +1,142 @@
 from flask import Blueprint, render_template, request, jsonify, current_app
 from app.extensions import db
-from app.models import Participant, Position, Candidate, Vote
+from app.models import Participant, Position, Candidate
 from app.services.audit_service import AuditService
 from app.services.email_service import EmailService
+from app.services.search_service import SearchService
+from app.services.counter_service import CounterService, PARTICIPANTS_TOTAL
+from app.voter_index import get_voter_index
 from flask_jwt_extended import jwt_required, get_jwt_identity
 import re
+import math
+import json
+import base64
 from datetime import datetime
 
 participants_bp = Blueprint('participants', __name__, url_prefix='/api/participants')
 
+# Claves de orden permitidas para el listado por cursor
+CURSOR_SORT_KEYS = {
+    'id': Participant.id,
+    'email': Participant.email,
+    'last_name': Participant.last_name,
+    'created_at': Participant.created_at
+}
+
+# Participantes por consulta al enviar recordatorios a los pendientes
+INVITATION_BATCH_SIZE = 500
+
 def validate_email(email):
     """Validar formato de email"""
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(pattern, email) is not None
 
 
+def encode_cursor(sort, participant):
+    """Generar cursor opaco a partir del último participante de la página"""
+    value = getattr(participant, sort)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({'s': sort, 'v': value, 'i': participant.id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decodificar un cursor opaco
+    
+    Returns:
+        Tupla (sort, último valor, último id) o None si el cursor es inválido
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        sort, value, last_id = data['s'], data['v'], int(data['i'])
+        if sort not in CURSOR_SORT_KEYS:
+            return None
+        if sort == 'created_at':
+            value = datetime.fromisoformat(value)
+        return sort, value, last_id
+    except Exception:
+        return None
+
+
 @participants_bp.route('', methods=['GET'])
 @jwt_required()
 def get_participants():
-    """Obtener lista de participantes (admin)"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
+    """
+    Obtener lista de participantes (admin)
+    
+    Modos:
+    - search: búsqueda indexada con ranking, paginada por página
+    - cursor / paging=cursor: paginación por clave (keyset) con costo constante,
+      ordenada por id o por ?sort=email|last_name|created_at
+    - por defecto: paginación por página
+    
+    El total proviene de un contador mantenido en escritura, no de COUNT(*).
+    """
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = max(request.args.get('per_page', 20, type=int), 1)
     search = request.args.get('search', '', type=str)
+    cursor = request.args.get('cursor', '', type=str)
+    
+    if search.strip():
+        # Búsqueda indexada (FTS5) con ranking por relevancia
+        participants, total = SearchService.search_participants(search, page=page, per_page=per_page)
+        
+        return jsonify({
+            'participants': [p.to_dict() for p in participants],
+            'total': total,
+            'pages': math.ceil(total / per_page),
+            'current_page': page
+        }), 200
     
-    query = Participant.query
+    total = CounterService.get(PARTICIPANTS_TOTAL)
     
-    if search:
-        query = query.filter(
-            db.or_(
-                Participant.email.ilike(f'%{search}%'),
-                Participant.first_name.ilike(f'%{search}%'),
-                Participant.last_name.ilike(f'%{search}%')
-            )
-        )
+    if cursor or request.args.get('paging') == 'cursor':
+        sort = request.args.get('sort', 'id', type=str)
+        after = None
+        
+        if cursor:
+            after = decode_cursor(cursor)
+            if after is None:
+                return jsonify({'error': 'Cursor inválido'}), 400
+            sort = after[0]
+        elif sort not in CURSOR_SORT_KEYS:
+            return jsonify({'error': f'Orden no permitido: {sort}'}), 400
+        
+        column = CURSOR_SORT_KEYS[sort]
+        query = Participant.query
+        
+        if after:
+            _, last_value, last_id = after
+            if sort == 'id':
+                query = query.filter(Participant.id > last_id)
+            else:
+                query = query.filter(db.or_(
+                    column > last_value,
+                    db.and_(column == last_value, Participant.id > last_id)
+                ))
+        
+        order = [Participant.id] if sort == 'id' else [column, Participant.id]
+        # Pedir un registro extra para saber si hay página siguiente
+        participants = query.order_by(*order).limit(per_page + 1).all()
+        has_more = len(participants) > per_page
+        participants = participants[:per_page]
+        
+        return jsonify({
+            'participants': [p.to_dict() for p in participants],
+            'total': total,
+            'sort': sort,
+            'next_cursor': encode_cursor(sort, participants[-1]) if has_more else None
+        }), 200
     
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    participants = Participant.query.order_by(Participant.id).limit(per_page).offset((page - 1) * per_page).all()
     
     return jsonify({
-        'participants': [p.to_dict() for p in pagination.items],
-        'total': pagination.total,
-        'pages': pagination.pages,
+        'participants': [p.to_dict() for p in participants],
+        'total': total,
+        'pages': math.ceil(total / per_page),
         'current_page': page
     }), 200
 
@@ -267,16 +364,28 @@ def send_invitations():
     participant_ids = data.get('participant_ids', [])
     
     if not participant_ids:
-        # Si no se especifican IDs, enviar a todos los que no han votado
-        participants = Participant.query.filter_by(has_voted=False).all()
+        # Si no se especifican IDs, enviar a todos los que no han votado (índice de votantes, por bloques)
+        batches = (
+            Participant.query.filter(Participant.id.in_(ids)).order_by(Participant.id).all()
+            for ids in get_voter_index().iter_pending(INVITATION_BATCH_SIZE)
+        )
     else:
-        participants = Participant.query.filter(Participant.id.in_(participant_ids)).all()
-    
-    if not participants:
+        batches = [Participant.query.filter(Participant.id.in_(participant_ids)).all()]
+    
+    success_count, failed_count, errors = 0, 0, []
+    sent_any = False
+    for participants in batches:
+        if not participants:
+            continue
+        sent_any = True
+        success, failed, batch_errors = EmailService.send_bulk_invitations(participants)
+        success_count += success
+        failed_count += failed
+        errors.extend(batch_errors[:10 - len(errors)])
+    
+    if not sent_any:
         return jsonify({'error': 'No hay participantes para enviar invitaciones'}), 400
     
-    success_count, failed_count, errors = EmailService.send_bulk_invitations(participants)
-    
     # Log de auditoría
     admin_id = int(get_jwt_identity())
     AuditService.log_action(
@@ -298,24 +407,38 @@ def send_invitations():
 @participants_bp.route('/stats', methods=['GET'])
 def get_stats():
     """Obtener estadísticas de participantes - Público"""
-    current_app.logger.info('=== LLAMADA A /api/participants/stats ===')
-    
-    total = Participant.query.count()
-    current_app.logger.info(f'Total participants: {total}')
-    
-    # Contar participantes únicos que han votado (basado en votos reales)
-    voted_participant_ids = db.session.query(Vote.participant_id).distinct().count()
-    current_app.logger.info(f'Voted participants (distinct): {voted_participant_ids}')
-    
-    pending = total - voted_participant_ids
-    participation_rate = (voted_participant_ids / total * 100) if total > 0 else 0
+    # Contadores mantenidos en cada escritura (ver CounterService): sin COUNT por petición
+    participation = CounterService.get_participation()
     
     result = {
-        'total': total,
-        'voted': voted_participant_ids,
-        'pending': pending,
-        'participation_rate': participation_rate
+        'total': participation['total'],
+        'voted': participation['voted'],
+        'pending': participation['pending'],
+        'participation_rate': participation['participation_rate']
     }
-    current_app.logger.info(f'Retornando stats: {result}')
+    current_app.logger.debug('Retornando stats: %s', result)
     
     return jsonify(result), 200
+
+
+@participants_bp.route('/pending', methods=['GET'])
+@jwt_required()
+def get_pending():
+    """
+    Ids de participantes que aún no han votado, por páginas (para recordatorios).
+    
+    Se responden desde el índice de votantes en memoria, sin recorrer tablas.
+    Query params: after (último id recibido), limit (máx. 10000)
+    """
+    after = max(request.args.get('after', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 1000, type=int), 1), 10000)
+    
+    index = get_voter_index()
+    counts = index.counts()
+    participant_ids = next(index.iter_pending(limit, after=after), [])
+    
+    return jsonify({
+        'pending': counts['pending'],
+        'participant_ids': participant_ids,
+        'next_after': participant_ids[-1] if len(participant_ids) == limit else None
+    }), 200
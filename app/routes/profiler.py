@@ -0,0 +1,135 @@
+"""
+Rutas de administración para el perfilado bajo demanda de workers en vivo.
+"""
+
+from flask import Blueprint, request, jsonify, Response
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import profiler
+from app.services.audit_service import AuditService
+from datetime import datetime
+
+profiler_bp = Blueprint('profiler', __name__, url_prefix='/api/admin/profiler')
+
+@profiler_bp.route('/start', methods=['POST'])
+@jwt_required()
+def start_profiling():
+    """
+    Activar el perfilado para un endpoint o ruta.
+    
+    Request JSON:
+    {
+        "target": "voting_participant.submit_votes",  (endpoint o ruta; omitir = todas)
+        "mode": "cprofile",                            (o "sampling")
+        "requests": 50,                                (próximas N peticiones)
+        "seconds": 60,                                 (ventana de tiempo)
+        "interval_ms": 5                               (solo sampling)
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode', 'cprofile')
+    max_requests = data.get('requests')
+    seconds = data.get('seconds')
+    
+    if mode not in profiler.MODES:
+        return jsonify({'error': f'Modo inválido: {mode}'}), 400
+    
+    if max_requests is None and seconds is None:
+        return jsonify({'error': 'Indique requests y/o seconds'}), 400
+    
+    try:
+        max_requests = int(max_requests) if max_requests is not None else None
+        seconds = float(seconds) if seconds is not None else None
+        interval_ms = float(data.get('interval_ms', 5))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Parámetros numéricos inválidos'}), 400
+    
+    session = profiler.start(
+        target=data.get('target') or None,
+        mode=mode,
+        max_requests=max_requests,
+        seconds=seconds,
+        interval_ms=interval_ms
+    )
+    
+    AuditService.log_action(
+        action='START_PROFILING',
+        entity_type='SYSTEM',
+        description=f"Perfilado {mode} de {session.target or 'todas las rutas'}",
+        admin_id=int(get_jwt_identity()),
+        ip_address=request.remote_addr
+    )
+    
+    return jsonify({
+        'message': 'Perfilado activado',
+        'session': session.to_dict()
+    }), 200
+
+
+@profiler_bp.route('/stop', methods=['POST'])
+@jwt_required()
+def stop_profiling():
+    """Detener el perfilado conservando lo recolectado"""
+    session = profiler.stop()
+    
+    return jsonify({
+        'message': 'Perfilado detenido',
+        'session': session.to_dict() if session else None
+    }), 200
+
+
+@profiler_bp.route('/status', methods=['GET'])
+@jwt_required()
+def profiling_status():
+    """Estado de la sesión de perfilado y resumen de funciones más costosas"""
+    session = profiler.get_session()
+    
+    if not session:
+        return jsonify({'session': None}), 200
+    
+    summary = None
+    if session.stats is not None:
+        summary = profiler.export_text(session, limit=20)
+    
+    return jsonify({
+        'session': session.to_dict(),
+        'summary': summary
+    }), 200
+
+
+@profiler_bp.route('/download', methods=['GET'])
+@jwt_required()
+def download_profile():
+    """
+    Descargar los datos de perfilado.
+    
+    Query params:
+        format: pstats (modo cprofile), collapsed (modo sampling) o text
+    """
+    session = profiler.get_session()
+    fmt = request.args.get('format', 'pstats' if session and session.mode == 'cprofile' else 'collapsed')
+    timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+    
+    if not session:
+        return jsonify({'error': 'No hay datos de perfilado'}), 404
+    
+    if fmt == 'collapsed':
+        if not session.stacks:
+            return jsonify({'error': 'No hay muestras (use el modo sampling)'}), 404
+        return Response(
+            profiler.export_collapsed(session),
+            mimetype='text/plain',
+            headers={'Content-Disposition': f'attachment; filename=profile_{timestamp}.collapsed'}
+        )
+    
+    if fmt in ('pstats', 'text'):
+        if session.stats is None:
+            return jsonify({'error': 'No hay estadísticas (use el modo cprofile)'}), 404
+        if fmt == 'text':
+            return Response(profiler.export_text(session), mimetype='text/plain')
+        return Response(
+            profiler.export_pstats(session),
+            mimetype='application/octet-stream',
+            headers={'Content-Disposition': f'attachment; filename=profile_{timestamp}.pstats'}
+        )
+    
+    return jsonify({'error': f'Formato inválido: {fmt}'}), 400
@@ -0,0 +1,36 @@
+"""
+Rutas de administración del registro de consultas lentas.
+"""
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from app import slow_queries
+
+slow_queries_bp = Blueprint('slow_queries', __name__, url_prefix='/api/admin/slow-queries')
+
+@slow_queries_bp.route('', methods=['GET'])
+@jwt_required()
+def list_slow_queries():
+    """
+    Consultas lentas registradas por este worker.
+
+    Query params:
+        limit: Máximo de registros recientes (por defecto 50)
+        top: Máximo de formas de sentencia agregadas (por defecto 20)
+    """
+    limit = request.args.get('limit', 50, type=int)
+    top = request.args.get('top', 20, type=int)
+
+    return jsonify({
+        'settings': slow_queries.get_settings(),
+        'summary': slow_queries.get_summary(max(top, 1)),
+        'recent': slow_queries.get_recent(max(limit, 1))
+    }), 200
+
+
+@slow_queries_bp.route('', methods=['DELETE'])
+@jwt_required()
+def clear_slow_queries():
+    """Vaciar los registros en memoria (el archivo rotativo se conserva)"""
+    slow_queries.clear()
+    return jsonify({'message': 'Registro de consultas lentas vaciado'}), 200
@@ -1,10 +1,19 @@
 from flask import Blueprint, render_template, request, jsonify, send_file, current_app
 from app.extensions import db
 from app.models import Vote, Participant, Position, Candidate
-from app.services.report_service import ReportService
+from app.services.report_service import ReportService, CROSSTAB_FIELDS
+from app.services.pdf_report_service import PdfReportService
+from app.services.excel_export_service import ExcelExportService
 from app.services.audit_service import AuditService
+from app.services.fingerprint_service import FingerprintService
+from app.services.round_service import RoundService
+from app.services.snapshot_service import SnapshotService
+from app.models import ElectionRound
+from app.db_routing import read_only, get_replica_status
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
+import tempfile
 
 voting_bp = Blueprint('voting', __name__, url_prefix='/api/voting')
 
@@ -68,7 +77,14 @@ def submit_vote():
     
     # Permitir votar múltiples veces - todos los votos se mantienen registrados
     
+    round_id, round_error = RoundService.resolve_vote_round()
+    if round_error:
+        return jsonify({'error': round_error}), 403
+    
     try:
+        # IP y user agent se guardan una sola vez por papeleta
+        client_id = FingerprintService.resolve(request.remote_addr, request.headers.get('User-Agent'))
+        
         # Registrar votos (se acumulan sin eliminar previos)
         for position_id_str, vote_data in votes.items():
             position_id = int(position_id_str)
@@ -93,8 +109,8 @@ def submit_vote():
                 position_id=position_id,
                 candidate_id=candidate_id if vote_type == 'candidate' else None,
                 vote_type=vote_type,
-                ip_address=request.remote_addr,
-                user_agent=request.headers.get('User-Agent', '')[:500]
+                client_id=client_id,
+                round_id=round_id
             )
             
             db.session.add(vote)
@@ -118,6 +134,11 @@ def submit_vote():
             'success': True
         }), 200
         
+    except IntegrityError:
+        # Ya votó en alguna de las posiciones (unique_vote_per_position)
+        db.session.rollback()
+        return jsonify({'error': 'Ya existe voto para una de las posiciones'}), 409
+        
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Error registrando voto: {str(e)}")
@@ -126,6 +147,7 @@ def submit_vote():
 
 @voting_bp.route('/results', methods=['GET'])
 @jwt_required()
+@read_only
 def get_results():
     """Obtener resultados de la encuesta (admin)"""
     position_id = request.args.get('position_id', type=int)
@@ -139,8 +161,131 @@ def get_results():
     }), 200
 
 
+@voting_bp.route('/results/crosstab', methods=['GET'])
+@jwt_required()
+@read_only
+def get_crosstab():
+    """
+    Obtener distribución de votos por posición cruzada con campos del participante
+    
+    Query params:
+        fields: uno o dos campos separados por coma (field1, field2, field3)
+        position_id: limitar a una posición (opcional)
+    """
+    fields = [f.strip() for f in request.args.get('fields', 'field1').split(',') if f.strip()]
+    position_id = request.args.get('position_id', type=int)
+    
+    if not 1 <= len(fields) <= 2 or len(set(fields)) != len(fields):
+        return jsonify({'error': 'Se requieren uno o dos campos distintos'}), 400
+    
+    invalid = [f for f in fields if f not in CROSSTAB_FIELDS]
+    if invalid:
+        return jsonify({'error': f'Campos no permitidos: {", ".join(invalid)}'}), 400
+    
+    crosstab = ReportService.get_vote_crosstab(fields, position_id)
+    return jsonify(crosstab), 200
+
+
+@voting_bp.route('/rounds', methods=['GET'])
+@jwt_required()
+def get_rounds():
+    """Listar rondas de votación"""
+    rounds = ElectionRound.query.order_by(ElectionRound.id.desc()).all()
+    return jsonify({'rounds': [r.to_dict() for r in rounds]}), 200
+
+
+@voting_bp.route('/rounds', methods=['POST'])
+@jwt_required()
+def open_round():
+    """Abrir una nueva ronda de votación"""
+    data = request.get_json(silent=True) or {}
+    name = (data.get('name') or '').strip() or f"Ronda {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}"
+    
+    election_round, error = RoundService.open_round(name)
+    if error:
+        return jsonify({'error': error}), 409
+    
+    AuditService.log_action(
+        action='OPEN_ROUND',
+        entity_type='ROUND',
+        entity_id=election_round.id,
+        description=f"Ronda '{election_round.name}' abierta",
+        admin_id=int(get_jwt_identity()),
+        ip_address=request.remote_addr
+    )
+    
+    return jsonify({
+        'message': 'Ronda abierta exitosamente',
+        'round': election_round.to_dict()
+    }), 201
+
+
+@voting_bp.route('/rounds/<int:round_id>/close', methods=['POST'])
+@jwt_required()
+def close_round(round_id):
+    """
+    Cerrar una ronda: congela resultados y archiva sus votos.
+    
+    Con {"publish": true} además publica los resultados públicos como
+    snapshot estático (ver SnapshotService).
+    """
+    if not db.session.get(ElectionRound, round_id):
+        return jsonify({'error': 'Ronda no encontrada'}), 404
+    
+    data = request.get_json(silent=True) or {}
+    publish = bool(data.get('publish', current_app.config.get('RESULTS_PUBLISH_ON_CLOSE', False)))
+    
+    try:
+        election_round, error = RoundService.close_round(round_id, publish=publish)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error cerrando ronda {round_id}: {str(e)}")
+        return jsonify({'error': 'Error al cerrar la ronda'}), 500
+    
+    if error:
+        return jsonify({'error': error}), 409
+    
+    AuditService.log_action(
+        action='CLOSE_ROUND',
+        entity_type='ROUND',
+        entity_id=election_round.id,
+        description=f"Ronda '{election_round.name}' cerrada ({election_round.archived_votes} votos archivados)",
+        admin_id=int(get_jwt_identity()),
+        ip_address=request.remote_addr
+    )
+    
+    return jsonify({
+        'message': 'Ronda cerrada exitosamente',
+        'round': election_round.to_dict(),
+        'snapshot': SnapshotService.current() if publish else None
+    }), 200
+
+
+@voting_bp.route('/rounds/<int:round_id>/results', methods=['GET'])
+@jwt_required()
+@read_only
+def get_round_results(round_id):
+    """Obtener resultados congelados de una ronda cerrada"""
+    results = RoundService.get_round_results(round_id)
+    if results is None:
+        return jsonify({'error': 'Ronda no encontrada o aún abierta'}), 404
+    
+    return jsonify({'round_id': round_id, **results}), 200
+
+
+@voting_bp.route('/replica-status', methods=['GET'])
+@jwt_required()
+def get_replica_status_route():
+    """Estado de la réplica de lectura en este worker (retraso, salud, lecturas)"""
+    status = get_replica_status()
+    if status is None:
+        return jsonify({'configured': False}), 200
+    return jsonify({'configured': True, **status}), 200
+
+
 @voting_bp.route('/results/timeline', methods=['GET'])
 @jwt_required()
+@read_only
 def get_timeline():
     """Obtener línea de tiempo de votos"""
     timeline = ReportService.get_participation_timeline()
@@ -149,6 +294,7 @@ def get_timeline():
 
 @voting_bp.route('/results/export-csv', methods=['GET'])
 @jwt_required()
+@read_only
 def export_csv():
     """Exportar resultados a CSV"""
     try:
@@ -165,8 +311,72 @@ def export_csv():
         return jsonify({'error': 'Error al exportar resultados'}), 500
 
 
+@voting_bp.route('/results/export-xlsx', methods=['GET'])
+@jwt_required()
+@read_only
+def export_xlsx():
+    """
+    Exportar resultados y log de votos a Excel.
+
+    El libro se escribe en un temporal (se borra al cerrarse) y se envía
+    desde disco por bloques, sin cargarlo en memoria.
+    """
+    tmp = tempfile.TemporaryFile()
+    try:
+        ExcelExportService.write_xlsx(tmp)
+        tmp.seek(0)
+    except Exception as e:
+        tmp.close()
+        current_app.logger.error(f"Error exportando Excel: {str(e)}")
+        return jsonify({'error': 'Error al exportar resultados'}), 500
+
+    return send_file(
+        tmp,
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        as_attachment=True,
+        download_name=f"encuesta_resultados_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    )
+
+
+@voting_bp.route('/results/export-pdf', methods=['GET'])
+@jwt_required()
+@read_only
+def export_pdf():
+    """
+    Exportar resultados a PDF.
+
+    El reporte se genera en segundo plano una vez por versión de datos; si no
+    está listo tras REPORT_PDF_WAIT segundos se responde 202 y el cliente
+    reintenta.
+    """
+    try:
+        path, version = PdfReportService.get_report(wait=current_app.config.get('REPORT_PDF_WAIT', 10))
+    except Exception as e:
+        current_app.logger.error(f"Error exportando PDF: {str(e)}")
+        return jsonify({'error': 'Error al exportar resultados'}), 500
+
+    if path is None:
+        response = jsonify({'status': 'pending', 'data_version': version})
+        response.status_code = 202
+        response.headers['Retry-After'] = '5'
+        return response
+
+    response = send_file(
+        path,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=f"encuesta_resultados_v{version}.pdf",
+        conditional=True,
+        etag=True
+    )
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
 @voting_bp.route('/results/audit-log', methods=['GET'])
 @jwt_required()
+@read_only
 def get_audit_log():
     """Obtener log de auditoría de votos"""
     audit_log = ReportService.get_detailed_audit_log()
@@ -175,6 +385,7 @@ def get_audit_log():
 
 @voting_bp.route('/results/export-audit', methods=['GET'])
 @jwt_required()
+@read_only
 def export_audit_json():
     """Exportar log de auditoría a JSON"""
     try:
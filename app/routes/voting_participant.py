@@ -8,6 +8,9 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.extensions import db
 from app.models import ParticipantUser, Participant, Position, Candidate, Vote
 from app.services.audit_service import AuditService
+from app.services.fingerprint_service import FingerprintService
+from app.services.round_service import RoundService
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 
 voting_participant_bp = Blueprint('voting_participant', __name__, url_prefix='')
@@ -49,7 +52,7 @@ def get_active_surveys():
     """
     try:
         participant_user_id = int(get_jwt_identity())
-        current_app.logger.info(f'Usuario autenticado ID: {participant_user_id}')
+        current_app.logger.debug('Usuario autenticado ID: %s', participant_user_id)
         
         participant_user = ParticipantUser.query.get(participant_user_id)
         
@@ -63,7 +66,7 @@ def get_active_surveys():
             current_app.logger.error(f'Participante no vinculado para usuario: {participant_user_id}')
             return jsonify({'error': 'Participante no vinculado'}), 404
         
-        current_app.logger.info(f'Participante encontrado: {participant.email}')
+        current_app.logger.debug('Participante encontrado: %s', participant.email)
         
         # Permitir votar en cada sesión - no verificar has_voted
         # Los usuarios pueden votar cada vez que inician sesión
@@ -71,7 +74,7 @@ def get_active_surveys():
         # Obtener todas las posiciones activas
         positions = Position.query.filter_by(is_active=True).order_by(Position.order).all()
         
-        current_app.logger.info(f'Posiciones activas encontradas: {len(positions)}')
+        current_app.logger.debug('Posiciones activas encontradas: %s', len(positions))
         
         if not positions:
             return jsonify({
@@ -111,7 +114,7 @@ def get_active_surveys():
             'has_voted': participant.has_voted
         })
         
-        current_app.logger.info(f'Retornando {len(surveys_data)} encuestas con {len(positions_data)} posiciones')
+        current_app.logger.debug('Retornando %s encuestas con %s posiciones', len(surveys_data), len(positions_data))
         
         return jsonify({
             'participant': {
@@ -173,6 +176,10 @@ def submit_votes():
     if not votes_data:
         return jsonify({'error': 'No se proporcionaron votos'}), 400
     
+    round_id, round_error = RoundService.resolve_vote_round()
+    if round_error:
+        return jsonify({'error': round_error}), 403
+    
     valid_vote_types = ['candidate', 'no_se', 'ninguno', 'abstencion', 'blanco']
     votes_to_register = []
     
@@ -225,14 +232,17 @@ def submit_votes():
         # Si llegamos aquí, todos los votos son válidos
         # Ahora registrar los votos
         
+        # IP y user agent se guardan una sola vez por papeleta
+        client_id = FingerprintService.resolve(request.remote_addr, request.headers.get('User-Agent'))
+        
         for vote_data in votes_to_register:
             vote = Vote(
                 participant_id=participant.id,
                 position_id=vote_data['position_id'],
                 candidate_id=vote_data['candidate_id'],
                 vote_type=vote_data['vote_type'],
-                ip_address=request.remote_addr,
-                user_agent=request.headers.get('User-Agent', '')
+                client_id=client_id,
+                round_id=round_id
             )
             db.session.add(vote)
         
@@ -260,6 +270,11 @@ def submit_votes():
             }
         }), 201
     
+    except IntegrityError:
+        # Voto simultáneo para la misma posición (unique_vote_per_position)
+        db.session.rollback()
+        return jsonify({'error': 'Ya existe voto para una de las posiciones'}), 409
+    
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Error al registrar votos: {str(e)}")
@@ -332,19 +347,20 @@ def get_user_votes():
             'votes': []
         }), 200
     
-    # Obtener votos del participante
-    votes = Vote.query.filter_by(participant_id=participant.id).all()
+    # Obtener votos del participante con posición y candidato en una sola consulta
+    votes = db.session.query(Vote, Position.name, Candidate.name).join(
+        Position, Position.id == Vote.position_id
+    ).outerjoin(
+        Candidate, Candidate.id == Vote.candidate_id
+    ).filter(Vote.participant_id == participant.id).order_by(Vote.id).all()
     
     votes_data = []
-    for vote in votes:
-        position = Position.query.get(vote.position_id)
-        candidate_name = vote.candidate.name if vote.candidate else None
-        
+    for vote, position_name, candidate_name in votes:
         votes_data.append({
             'id': vote.id,
             'position': {
-                'id': position.id,
-                'name': position.name
+                'id': vote.position_id,
+                'name': position_name
             },
             'vote_type': vote.vote_type,
             'candidate': candidate_name,
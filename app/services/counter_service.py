@@ -0,0 +1,281 @@
+from app.extensions import db
+from app.models import StatCounter, Participant, Position, Candidate, Vote
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+from collections import Counter
+from datetime import datetime
+
+# Nombres de contadores
+PARTICIPANTS_TOTAL = 'participants_total'
+PARTICIPANTS_VOTED = 'participants_voted'
+VOTES_TOTAL = 'votes_total'
+DATA_VERSION = 'data_version'
+
+# Votos por posición: un contador por posición ('votes_position:<id>')
+VOTES_POSITION_PREFIX = 'votes_position:'
+
+# Modelos cuyas escrituras cambian los resultados y reportes
+VERSIONED_MODELS = (Participant, Position, Candidate, Vote)
+
+
+class CounterService:
+    """Servicio de contadores agregados (evita COUNT(*) por petición)"""
+
+    # Consultas para inicializar o reconciliar cada contador
+    INITIALIZERS = {
+        PARTICIPANTS_TOTAL: lambda: Participant.query.count(),
+        PARTICIPANTS_VOTED: lambda: Participant.query.filter_by(has_voted=True).count(),
+        VOTES_TOTAL: lambda: Vote.query.count(),
+        DATA_VERSION: lambda: 0,
+    }
+
+    @staticmethod
+    def position_votes_name(position_id):
+        return f'{VOTES_POSITION_PREFIX}{position_id}'
+
+    @staticmethod
+    def _initial_value(name):
+        if name.startswith(VOTES_POSITION_PREFIX):
+            position_id = int(name[len(VOTES_POSITION_PREFIX):])
+            return Vote.query.filter_by(position_id=position_id).count()
+        return CounterService.INITIALIZERS[name]()
+
+    @staticmethod
+    def get_many(names):
+        """
+        Obtener varios contadores con una sola consulta.
+
+        Los que aún no existen se calculan como en get(), sin escribir.
+
+        Returns:
+            Dict nombre -> valor
+        """
+        names = list(names)
+        values = dict(db.session.query(StatCounter.name, StatCounter.value).filter(
+            StatCounter.name.in_(names)
+        ).all())
+        for name in names:
+            if name not in values:
+                values[name] = CounterService.get(name)
+        return values
+
+    @staticmethod
+    def get_participation():
+        """
+        Participación a partir de los contadores (lectura en tiempo constante).
+
+        Returns:
+            Dict con total, voted, pending, participation_rate y total_votes
+        """
+        values = CounterService.get_many((PARTICIPANTS_TOTAL, PARTICIPANTS_VOTED, VOTES_TOTAL))
+        total = values[PARTICIPANTS_TOTAL]
+        voted = values[PARTICIPANTS_VOTED]
+        return {
+            'total': total,
+            'voted': voted,
+            'pending': total - voted,
+            'participation_rate': (voted / total * 100) if total > 0 else 0,
+            'total_votes': values[VOTES_TOTAL]
+        }
+
+    @staticmethod
+    def get_position_votes(position_ids):
+        """Votos por posición: dict position_id -> votos"""
+        names = {CounterService.position_votes_name(pid): pid for pid in position_ids}
+        values = CounterService.get_many(names)
+        return {pid: values[name] for name, pid in names.items()}
+
+    @staticmethod
+    def get(name):
+        """
+        Obtener el valor de un contador.
+
+        Los contadores se crean al migrar (create_missing) y al crear cada
+        posición; si aun así falta uno se retorna el conteo real sin escribir:
+        las lecturas pueden ir a la réplica o a rutas de solo lectura.
+
+        Args:
+            name: Nombre del contador
+
+        Returns:
+            Valor entero del contador
+        """
+        counter = db.session.get(StatCounter, name)
+        if counter is not None:
+            return counter.value
+        return CounterService._initial_value(name)
+
+    @staticmethod
+    def create_missing():
+        """
+        Crear con su conteo real los contadores que no existan (al migrar).
+
+        Returns:
+            Lista de nombres creados
+        """
+        names = list(CounterService.INITIALIZERS)
+        names += [CounterService.position_votes_name(pid) for (pid,) in db.session.query(Position.id).all()]
+        existing = {name for (name,) in db.session.query(StatCounter.name).filter(
+            StatCounter.name.in_(names)
+        ).all()}
+
+        created = [name for name in names if name not in existing]
+        for name in created:
+            db.session.add(StatCounter(name=name, value=CounterService._initial_value(name)))
+        db.session.commit()
+        return created
+
+    @staticmethod
+    def increment(connection, name, delta=1):
+        """
+        Sumar delta a un contador dentro de la transacción de la conexión dada.
+
+        Si el contador no existe no se hace nada: get() retorna el conteo real
+        (que ya incluye esta escritura) y "manage.py counters --fix" lo crea.
+        """
+        table = StatCounter.__table__
+        connection.execute(
+            table.update()
+            .where(table.c.name == name)
+            .values(value=table.c.value + delta, updated_at=datetime.utcnow())
+        )
+
+    @staticmethod
+    def _actual_values():
+        """Conteos reales de todos los contadores recalculables (incluye votos por posición)"""
+        values = {name: initializer() for name, initializer in CounterService.INITIALIZERS.items()
+                  if name != DATA_VERSION}
+
+        # Todas las posiciones, las que tienen contador (aunque ya no existan) y las que tienen votos
+        names = db.session.query(StatCounter.name).filter(
+            StatCounter.name.like(f'{VOTES_POSITION_PREFIX}%')
+        ).all()
+        for (name,) in names:
+            values[name] = 0
+        for (position_id,) in db.session.query(Position.id).all():
+            values[CounterService.position_votes_name(position_id)] = 0
+        for position_id, count in db.session.query(Vote.position_id, func.count()).group_by(Vote.position_id):
+            values[CounterService.position_votes_name(position_id)] = count
+        return values
+
+    @staticmethod
+    def verify():
+        """
+        Comparar los contadores guardados con los conteos reales.
+
+        Returns:
+            Dict nombre -> (valor guardado o None si no existe, valor real)
+            de los que difieren
+        """
+        actual = CounterService._actual_values()
+        stored = dict(db.session.query(StatCounter.name, StatCounter.value).filter(
+            StatCounter.name.in_(list(actual) + [DATA_VERSION])
+        ).all())
+        drift = {name: (stored.get(name), value) for name, value in actual.items()
+                 if stored.get(name) != value}
+        if DATA_VERSION not in stored:
+            drift[DATA_VERSION] = (None, 0)
+        return drift
+
+    @staticmethod
+    def reconcile():
+        """
+        Recalcular los contadores con conteos reales.
+
+        Necesario después de escrituras que no pasan por el ORM (inserciones
+        masivas de Core, cargas de datos): los eventos no se disparan en ese
+        caso. La versión de datos no se recalcula sino que se incrementa, para
+        invalidar las cachés que dependen de ella.
+
+        Returns:
+            Dict con el valor final de cada contador recalculado
+        """
+        values = CounterService._actual_values()
+        for name, value in values.items():
+            counter = db.session.get(StatCounter, name)
+            if counter is None:
+                db.session.add(StatCounter(name=name, value=value))
+            else:
+                counter.value = value
+                counter.updated_at = datetime.utcnow()
+        if db.session.get(StatCounter, DATA_VERSION) is None:
+            db.session.add(StatCounter(name=DATA_VERSION, value=0))
+
+        db.session.flush()
+        CounterService.increment(db.session.connection(), DATA_VERSION, 1)
+        db.session.commit()
+        return values
+
+
+# Mantener contadores en la misma transacción que la escritura
+@event.listens_for(Participant, 'after_insert')
+def _participant_inserted(mapper, connection, target):
+    CounterService.increment(connection, PARTICIPANTS_TOTAL, 1)
+
+
+@event.listens_for(Position, 'after_insert')
+def _position_inserted(mapper, connection, target):
+    # El contador de votos de la posición existe desde su creación (get() no escribe)
+    connection.execute(StatCounter.__table__.insert().values(
+        name=CounterService.position_votes_name(target.id), value=0, updated_at=datetime.utcnow()
+    ))
+
+
+@event.listens_for(Participant, 'after_delete')
+def _participant_deleted(mapper, connection, target):
+    CounterService.increment(connection, PARTICIPANTS_TOTAL, -1)
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_data_version(session, flush_context):
+    """Incrementar la versión de datos una vez por flush que toque resultados"""
+    changed = (session.new, session.dirty, session.deleted)
+    if any(isinstance(obj, VERSIONED_MODELS) for objects in changed for obj in objects):
+        CounterService.increment(session.connection(), DATA_VERSION, 1)
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_participation_counters(session, flush_context):
+    """
+    Participantes que votaron y votos (total y por posición), en la misma
+    transacción que el flush: una actualización por contador, no por fila.
+    """
+    votes = Counter()
+    voted = 0
+
+    for obj in session.new:
+        if isinstance(obj, Vote):
+            votes[obj.position_id] += 1
+        elif isinstance(obj, Participant) and obj.has_voted:
+            voted += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Vote):
+            votes[obj.position_id] -= 1
+        elif isinstance(obj, Participant):
+            # Sin cargar el atributo (la fila ya no existe); si no estaba cargado lo corrige reconcile()
+            history = inspect(obj).attrs.has_voted.history
+            loaded = history.deleted or history.unchanged
+            if loaded and loaded[0]:
+                voted -= 1
+
+    for obj in session.dirty:
+        if isinstance(obj, Participant):
+            history = inspect(obj).attrs.has_voted.history
+            if history.has_changes():
+                before = bool(history.deleted[0]) if history.deleted else False
+                after = bool(history.added[0]) if history.added else False
+                voted += int(after) - int(before)
+
+    if not votes and not voted:
+        return
+
+    connection = session.connection()
+    if voted:
+        CounterService.increment(connection, PARTICIPANTS_VOTED, voted)
+    total = sum(votes.values())
+    if total:
+        CounterService.increment(connection, VOTES_TOTAL, total)
+    for position_id, delta in votes.items():
+        if delta:
+            CounterService.increment(connection, CounterService.position_votes_name(position_id), delta)
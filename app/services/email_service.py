@@ -1,6 +1,5 @@
-from flask_mail import Message
 from flask import current_app, url_for
-from app.extensions import mail
+from app.extensions import get_mail
 import secrets
 from datetime import datetime, timedelta
 import base64
@@ -63,13 +62,14 @@ class EmailService:
             </html>
             """
             
+            from flask_mail import Message
             msg = Message(
                 subject=subject,
                 recipients=[email],
                 html=html_body
             )
             
-            mail.send(msg)
+            get_mail().send(msg)
             return True, "Email de confirmación enviado"
             
         except Exception as e:
@@ -143,13 +143,14 @@ class EmailService:
             </html>
             """
             
+            from flask_mail import Message
             msg = Message(
                 subject=subject,
                 recipients=[participant_email],
                 html=html_body
             )
             
-            mail.send(msg)
+            get_mail().send(msg)
             return True, "Correo enviado exitosamente"
             
         except Exception as e:
@@ -224,13 +225,14 @@ class EmailService:
             </html>
             """
             
+            from flask_mail import Message
             msg = Message(
                 subject=subject,
                 recipients=[admin_email],
                 html=html_body
             )
             
-            mail.send(msg)
+            get_mail().send(msg)
             return True
             
         except Exception as e:
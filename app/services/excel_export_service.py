@@ -0,0 +1,115 @@
+from flask import current_app
+from app.services.report_service import ReportService, SPECIAL_VOTE_TYPES, SPECIAL_VOTE_LABELS
+from datetime import datetime
+import re
+
+# Límites de Excel: filas por hoja y longitud del nombre de hoja
+MAX_SHEET_ROWS = 1048576
+MAX_TITLE_LENGTH = 31
+INVALID_TITLE_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+VOTE_TYPE_NAMES = {'candidate': 'Candidato', **SPECIAL_VOTE_LABELS}
+
+AUDIT_HEADER = ('ID', 'Fecha', 'Participante', 'Posición', 'Tipo de Voto', 'Candidato', 'IP')
+
+
+class ExcelExportService:
+    """Exportación de resultados a XLSX en modo write-only de openpyxl"""
+
+    @staticmethod
+    def _sheet_title(name, used):
+        """Nombre de hoja válido y único (máx. 31 caracteres, sin []:*?/\\)"""
+        base = INVALID_TITLE_CHARS.sub(' ', name or '').strip() or 'Hoja'
+        title = base[:MAX_TITLE_LENGTH]
+        suffix = 2
+        while title.lower() in used:
+            tail = f' ({suffix})'
+            title = base[:MAX_TITLE_LENGTH - len(tail)] + tail
+            suffix += 1
+        used.add(title.lower())
+        return title
+
+    @staticmethod
+    def write_xlsx(fileobj):
+        """
+        Escribir el libro: resumen, una hoja por posición y el log de votos.
+
+        En modo write-only cada fila se serializa al añadirla, y los votos se
+        leen por ventanas (ReportService.iter_audit_rows), así que la memoria
+        se mantiene constante aunque haya millones de votos. Si los votos no
+        caben en una hoja se continúa en "Votos (2)", "Votos (3)", ...
+
+        Args:
+            fileobj: Ruta o archivo binario con seek (p. ej. tempfile.TemporaryFile)
+        """
+        # openpyxl solo se carga al exportar
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+
+        workbook = Workbook(write_only=True)
+        used = set()
+        bold = Font(bold=True)
+        window = current_app.config.get('REPORT_XLSX_WINDOW', 5000)
+        batch_size = current_app.config.get('REPORT_PDF_BATCH_SIZE', 50)
+
+        def header(sheet, values):
+            row = []
+            for value in values:
+                cell = WriteOnlyCell(sheet, value=value)
+                cell.font = bold
+                row.append(cell)
+            return row
+
+        def percentage(sheet, value):
+            cell = WriteOnlyCell(sheet, value=value / 100)
+            cell.number_format = '0.00%'
+            return cell
+
+        # Resumen
+        summary = ReportService.get_survey_summary()
+        sheet = workbook.create_sheet(ExcelExportService._sheet_title('Resumen', used))
+        sheet.column_dimensions['A'].width = 30
+        sheet.append(header(sheet, ['Reporte de Encuesta', datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')]))
+        sheet.append([])
+        sheet.append(header(sheet, ['Resumen General']))
+        sheet.append(['Total de Participantes', summary['total_participants']])
+        sheet.append(['Participantes que Votaron', summary['voted_participants']])
+        sheet.append(['Pendientes', summary['pending_participants']])
+        sheet.append(['Tasa de Participación', percentage(sheet, summary['participation_rate'])])
+        sheet.append(['Total de Votos', summary['total_votes']])
+
+        # Una hoja por posición
+        for tally in ReportService.iter_position_tallies(batch_size):
+            sheet = workbook.create_sheet(ExcelExportService._sheet_title(tally['position_name'], used))
+            sheet.column_dimensions['A'].width = 40
+            sheet.append(header(sheet, ['Posición: ' + tally['position_name']]))
+            sheet.append(header(sheet, ['Candidato', 'Votos', 'Porcentaje']))
+            for candidate in tally['candidates']:
+                sheet.append([candidate['name'], candidate['votes'], percentage(sheet, candidate['percentage'])])
+            for vote_type in SPECIAL_VOTE_TYPES:
+                special = tally['special_votes'][vote_type]
+                sheet.append([SPECIAL_VOTE_LABELS[vote_type], special['count'],
+                              percentage(sheet, special['percentage'])])
+            sheet.append(header(sheet, ['Total', tally['total_votes']]))
+
+        # Log de votos (datos crudos)
+        sheet = None
+        rows_in_sheet = MAX_SHEET_ROWS
+        for row in ReportService.iter_audit_rows(window):
+            if rows_in_sheet >= MAX_SHEET_ROWS:
+                sheet = workbook.create_sheet(ExcelExportService._sheet_title('Votos', used))
+                sheet.append(header(sheet, AUDIT_HEADER))
+                rows_in_sheet = 1
+            sheet.append([
+                row.id, row.created_at, row.email, row.position_name,
+                VOTE_TYPE_NAMES.get(row.vote_type, row.vote_type), row.candidate_name, row.ip_address
+            ])
+            rows_in_sheet += 1
+
+        if sheet is None:
+            sheet = workbook.create_sheet(ExcelExportService._sheet_title('Votos', used))
+            sheet.append(header(sheet, AUDIT_HEADER))
+
+        workbook.save(fileobj)
+        return fileobj
@@ -0,0 +1,54 @@
+from flask import current_app
+from app.extensions import db
+from app.models import ClientFingerprint
+from sqlalchemy.exc import IntegrityError
+
+# Longitudes máximas de las columnas de ClientFingerprint
+MAX_IP_LENGTH = 45
+MAX_USER_AGENT_LENGTH = 500
+
+
+class FingerprintService:
+    """Servicio para normalizar IP + user agent de los votos en una tabla de dimensión"""
+
+    # Tamaño máximo del cache en proceso fingerprint -> id (solo ids ya confirmados)
+    CACHE_SIZE = 10000
+
+    @staticmethod
+    def resolve(ip_address, user_agent):
+        """
+        Obtener el id de ClientFingerprint para una IP y user agent, creándolo si no existe
+
+        Args:
+            ip_address: Dirección IP del cliente
+            user_agent: Cabecera User-Agent (se trunca a 500 caracteres)
+
+        Returns:
+            ID del registro en client_fingerprints
+        """
+        ip_address = (ip_address or '')[:MAX_IP_LENGTH] or None
+        user_agent = (user_agent or '')[:MAX_USER_AGENT_LENGTH] or None
+        fingerprint = ClientFingerprint.compute_fingerprint(ip_address, user_agent)
+
+        cache = current_app.extensions.setdefault('client_fingerprints', {})
+        client_id = cache.get(fingerprint)
+        if client_id is not None:
+            return client_id
+
+        existing = db.session.query(ClientFingerprint.id).filter_by(fingerprint=fingerprint).scalar()
+        if existing is not None:
+            if len(cache) >= FingerprintService.CACHE_SIZE:
+                cache.clear()
+            cache[fingerprint] = existing
+            return existing
+
+        # Crear en un savepoint para tolerar inserciones concurrentes del mismo valor
+        client = ClientFingerprint(fingerprint=fingerprint, ip_address=ip_address, user_agent=user_agent)
+        try:
+            with db.session.begin_nested():
+                db.session.add(client)
+            return client.id
+        except IntegrityError:
+            current_app.logger.debug(f'Fingerprint {fingerprint[:12]} creado por otra petición')
+            return db.session.query(ClientFingerprint.id).filter_by(fingerprint=fingerprint).scalar()
+
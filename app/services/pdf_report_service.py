@@ -0,0 +1,260 @@
+from flask import current_app
+from app.db_routing import use_replica
+from app.services.counter_service import CounterService, DATA_VERSION
+from app.services.report_service import ReportService, SPECIAL_VOTE_TYPES, SPECIAL_VOTE_LABELS
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from xml.sax.saxutils import escape
+from datetime import datetime
+import glob
+import os
+import threading
+import time
+
+# Un solo hilo de generación por proceso: acota memoria y CPU aunque lleguen
+# muchas descargas a la vez (las peticiones de la misma versión comparten trabajo)
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pdf-report')
+_jobs = {}
+_lock = threading.Lock()
+
+# Un lock de otro proceso más antiguo que esto se considera abandonado
+LOCK_TIMEOUT = 600
+
+# Colores de las barras por tipo de voto (candidatos + especiales)
+CHART_COLORS = ('#2563eb', '#f59e0b', '#6b7280', '#10b981', '#ef4444')
+
+
+class _StreamedStory(list):
+    """
+    Lista de flowables que se rellena desde un generador a medida que
+    reportlab la consume: solo hay en memoria unas pocas secciones a la vez.
+    """
+
+    def __init__(self, sections):
+        super().__init__()
+        self._sections = iter(sections)
+
+    def __len__(self):
+        while super().__len__() < 2:
+            section = next(self._sections, None)
+            if section is None:
+                break
+            self.extend(section)
+        return super().__len__()
+
+
+class PdfReportService:
+    """Reporte PDF de resultados, generado en segundo plano y cacheado en disco por versión de datos"""
+
+    @staticmethod
+    def cache_dir():
+        return os.path.abspath(current_app.config.get('REPORT_CACHE_DIR', 'instance/reports'))
+
+    @staticmethod
+    def report_path(version):
+        return os.path.join(PdfReportService.cache_dir(), f'results_v{version}.pdf')
+
+    @staticmethod
+    def get_report(wait=0):
+        """
+        Reporte de la versión de datos actual.
+
+        Si no está en disco se encola su generación (una sola vez por versión)
+        y se espera hasta `wait` segundos.
+
+        Returns:
+            Tupla (ruta o None si aún se está generando, versión de datos)
+
+        Raises:
+            La excepción de la generación si falló
+        """
+        version = CounterService.get(DATA_VERSION)
+        path = PdfReportService.report_path(version)
+        if os.path.exists(path):
+            return path, version
+
+        future = PdfReportService._submit(version)
+        if future is not None:
+            try:
+                # Un error de generación se propaga: la ruta responde 500, no "pendiente"
+                future.result(timeout=max(wait, 0))
+            except TimeoutError:
+                pass
+
+        return (path if os.path.exists(path) else None), version
+
+    @staticmethod
+    def _submit(version):
+        """Encolar la generación de una versión (o retornar el trabajo en curso)"""
+        app = current_app._get_current_object()
+        with _lock:
+            future = _jobs.get(version)
+            if future is None:
+                future = _executor.submit(PdfReportService._run_job, app, version)
+                _jobs[version] = future
+                future.add_done_callback(lambda f: _jobs.pop(version, None))
+        return future
+
+    @staticmethod
+    def _run_job(app, version):
+        with app.app_context():
+            path = PdfReportService.report_path(version)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            lock_path = f'{path}.lock'
+
+            # Otro worker ya la está generando
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if time.time() - os.path.getmtime(lock_path) < LOCK_TIMEOUT:
+                    return None
+                os.remove(lock_path)
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.close(fd)
+
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            try:
+                started = time.perf_counter()
+                with use_replica():
+                    PdfReportService.build_pdf(tmp_path, version)
+                os.replace(tmp_path, path)
+                app.logger.info(
+                    f'Reporte PDF v{version} generado en {time.perf_counter() - started:.2f} s'
+                )
+                PdfReportService._prune(app.config.get('REPORT_PDF_KEEP', 3))
+                return path
+            except Exception as e:
+                app.logger.error(f'Error generando reporte PDF: {str(e)}', exc_info=True)
+                raise
+            finally:
+                for leftover in (tmp_path, lock_path):
+                    if os.path.exists(leftover):
+                        os.remove(leftover)
+
+    @staticmethod
+    def _prune(keep):
+        """Conservar solo los `keep` reportes más recientes"""
+        reports = sorted(glob.glob(os.path.join(PdfReportService.cache_dir(), 'results_v*.pdf')),
+                         key=os.path.getmtime, reverse=True)
+        for old in reports[keep:]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    @staticmethod
+    def build_pdf(path, version):
+        """
+        Escribir el reporte: resumen, gráfico y tabla por posición.
+
+        Las secciones de cada posición se generan a medida que se maquetan
+        (ReportService.iter_position_tallies por lotes), así que la memoria no
+        crece con el número de posiciones.
+        """
+        # reportlab solo se carga al generar un reporte
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.lib.units import cm
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, KeepTogether
+        from reportlab.graphics.shapes import Drawing
+        from reportlab.graphics.charts.barcharts import HorizontalBarChart
+
+        styles = getSampleStyleSheet()
+        summary = ReportService.get_survey_summary()
+        batch_size = current_app.config.get('REPORT_PDF_BATCH_SIZE', 50)
+        generated = datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')
+
+        table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e3a8a')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+            ('GRID', (0, 0), (-1, -1), 0.25, colors.HexColor('#cbd5e1')),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f1f5f9')]),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ])
+
+        def vote_type_chart(labels, values, width=16 * cm):
+            height = 14 * len(values) + 20
+            drawing = Drawing(width, height)
+            chart = HorizontalBarChart()
+            chart.x, chart.y = 3.5 * cm, 10
+            chart.width, chart.height = width - 4.5 * cm, height - 20
+            chart.data = [values]
+            chart.categoryAxis.categoryNames = labels
+            chart.categoryAxis.labels.fontSize = 8
+            chart.valueAxis.valueMin = 0
+            chart.valueAxis.labels.fontSize = 7
+            chart.bars.strokeColor = None
+            for i in range(len(values)):
+                chart.bars[(0, i)].fillColor = colors.HexColor(CHART_COLORS[i % len(CHART_COLORS)])
+            drawing.add(chart)
+            return drawing
+
+        def summary_section():
+            rows = [
+                ['Indicador', 'Valor'],
+                ['Total de participantes', f"{summary['total_participants']:,}"],
+                ['Participantes que votaron', f"{summary['voted_participants']:,}"],
+                ['Pendientes', f"{summary['pending_participants']:,}"],
+                ['Tasa de participación', f"{summary['participation_rate']:.2f}%"],
+                ['Total de votos', f"{summary['total_votes']:,}"],
+            ]
+            table = Table(rows, colWidths=[10 * cm, 6 * cm])
+            table.setStyle(table_style)
+            return [
+                Paragraph('Reporte de Resultados', styles['Title']),
+                Paragraph(f'Generado: {generated} · Versión de datos {version}', styles['Normal']),
+                Spacer(1, 0.5 * cm),
+                Paragraph('Resumen General', styles['Heading2']),
+                table,
+                Spacer(1, 0.5 * cm),
+                Paragraph('Resultados por Posición', styles['Heading2']),
+            ]
+
+        def position_section(tally):
+            total = tally['total_votes']
+            candidate_votes = sum(c['votes'] for c in tally['candidates'])
+            chart_labels = ['Candidatos'] + [SPECIAL_VOTE_LABELS[t] for t in SPECIAL_VOTE_TYPES]
+            chart_values = [candidate_votes] + [tally['special_votes'][t]['count'] for t in SPECIAL_VOTE_TYPES]
+
+            rows = [['Candidato', 'Votos', 'Porcentaje']]
+            # Nombres del usuario escapados: Paragraph interpreta marcado
+            rows += [[Paragraph(escape(c['name']), styles['BodyText']), f"{c['votes']:,}", f"{c['percentage']:.2f}%"]
+                     for c in tally['candidates']]
+            rows += [[SPECIAL_VOTE_LABELS[t], f"{tally['special_votes'][t]['count']:,}",
+                      f"{tally['special_votes'][t]['percentage']:.2f}%"] for t in SPECIAL_VOTE_TYPES]
+            rows.append(['Total', f'{total:,}', '100.00%' if total else '0.00%'])
+            table = Table(rows, colWidths=[10 * cm, 3 * cm, 3 * cm], repeatRows=1)
+            table.setStyle(table_style)
+
+            winner = tally['winner']
+            header = [
+                Paragraph(escape(tally['position_name']), styles['Heading3']),
+                Paragraph(
+                    f"Ganador: <b>{escape(winner['name'])}</b> ({winner['votes']:,} votos, {winner['percentage']:.2f}%)"
+                    if winner else 'Sin ganador (no hay votos a candidatos)',
+                    styles['Normal']
+                ),
+                Spacer(1, 0.2 * cm),
+                vote_type_chart(chart_labels, chart_values),
+            ]
+            return [KeepTogether(header), table, Spacer(1, 0.6 * cm)]
+
+        def sections():
+            yield summary_section()
+            for tally in ReportService.iter_position_tallies(batch_size):
+                yield position_section(tally)
+
+        def page_footer(canvas, doc):
+            canvas.saveState()
+            canvas.setFont('Helvetica', 8)
+            canvas.drawRightString(A4[0] - 2 * cm, 1.2 * cm, f'Página {doc.page} · {generated}')
+            canvas.restoreState()
+
+        doc = SimpleDocTemplate(
+            path, pagesize=A4, title='Reporte de Resultados',
+            leftMargin=2 * cm, rightMargin=2 * cm, topMargin=2 * cm, bottomMargin=2 * cm
+        )
+        doc.build(_StreamedStory(sections()), onFirstPage=page_footer, onLaterPages=page_footer)
+        return path
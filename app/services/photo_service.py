@@ -0,0 +1,108 @@
+from flask import current_app
+import hashlib
+import os
+import re
+import tempfile
+
+# Firma de los primeros bytes -> extensión (el formato lo decide el contenido, no el nombre)
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+
+MIMETYPES = {'jpg': 'image/jpeg', 'png': 'image/png', 'gif': 'image/gif'}
+
+PHOTO_NAME = re.compile(r'^[0-9a-f]{64}\.(jpg|png|gif)$')
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _detect_format(head):
+    for signature, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    return None
+
+
+class PhotoService:
+    """Almacén de fotos de candidatos direccionado por contenido (sha256)"""
+
+    @staticmethod
+    def storage_dir():
+        return os.path.abspath(current_app.config.get('PHOTO_STORAGE_DIR', 'instance/photos'))
+
+    @staticmethod
+    def relative_path(name):
+        """Ruta dentro del almacén: ab/cd/abcd....jpg (evita directorios enormes)"""
+        return os.path.join(name[:2], name[2:4], name)
+
+    @staticmethod
+    def path_for(name):
+        """Ruta absoluta de una foto, o None si el nombre no es válido o no existe"""
+        if not PHOTO_NAME.match(name or ''):
+            return None
+        path = os.path.join(PhotoService.storage_dir(), PhotoService.relative_path(name))
+        return path if os.path.isfile(path) else None
+
+    @staticmethod
+    def mimetype_for(name):
+        return MIMETYPES.get(name.rsplit('.', 1)[-1], 'application/octet-stream')
+
+    @staticmethod
+    def store(stream, max_size):
+        """
+        Guardar una foto leyendo el stream por bloques.
+
+        El contenido se escribe a un temporal mientras se calcula su sha256; se
+        corta en cuanto supera max_size. Si ya existe una foto con el mismo
+        hash, el temporal se descarta (deduplicación).
+
+        Args:
+            stream: Objeto con read() (p. ej. FileStorage.stream)
+            max_size: Bytes máximos
+
+        Returns:
+            Tupla (nombre "<sha256>.<ext>", error)
+        """
+        storage = PhotoService.storage_dir()
+        tmp_dir = os.path.join(storage, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        extension = None
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if extension is None:
+                        extension = _detect_format(chunk)
+                        if extension is None:
+                            return None, 'El archivo no es una imagen JPG, PNG o GIF válida'
+                    size += len(chunk)
+                    if size > max_size:
+                        return None, f'Archivo muy grande. Máximo {max_size // (1024 * 1024)}MB'
+                    digest.update(chunk)
+                    tmp.write(chunk)
+
+            if size == 0:
+                return None, 'Archivo vacío'
+
+            name = f'{digest.hexdigest()}.{extension}'
+            path = os.path.join(storage, PhotoService.relative_path(name))
+            if os.path.exists(path):
+                return name, None
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+            tmp_path = None
+            return name, None
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -0,0 +1,203 @@
+from app.extensions import db
+from app.models import Position, Candidate, Vote
+from app.services.counter_service import CounterService
+from sqlalchemy import func
+from datetime import datetime
+
+VOTE_TYPES = ('candidate', 'no_se', 'ninguno', 'abstencion', 'blanco')
+
+
+def _tallies(position_ids):
+    """
+    Conteos de votos de varias posiciones con una sola consulta agrupada
+    (índice idx_vote_position_tally).
+
+    Returns:
+        Dict position_id -> {'total', 'by_type', 'by_candidate'}
+    """
+    tallies = {pid: {'total': 0, 'by_type': dict.fromkeys(VOTE_TYPES, 0), 'by_candidate': {}}
+               for pid in position_ids}
+    if not tallies:
+        return tallies
+
+    rows = db.session.query(
+        Vote.position_id, Vote.vote_type, Vote.candidate_id, func.count()
+    ).filter(Vote.position_id.in_(list(tallies))).group_by(
+        Vote.position_id, Vote.vote_type, Vote.candidate_id
+    ).all()
+
+    for position_id, vote_type, candidate_id, count in rows:
+        tally = tallies[position_id]
+        tally['total'] += count
+        if vote_type in tally['by_type']:
+            tally['by_type'][vote_type] += count
+        if candidate_id is not None:
+            tally['by_candidate'][candidate_id] = tally['by_candidate'].get(candidate_id, 0) + count
+    return tallies
+
+
+def _candidates_by_position(position_ids):
+    """Candidatos de varias posiciones con una sola consulta, en su orden"""
+    by_position = {pid: [] for pid in position_ids}
+    if by_position:
+        candidates = Candidate.query.filter(Candidate.position_id.in_(list(by_position))).order_by(
+            Candidate.position_id, Candidate.order
+        ).all()
+        for candidate in candidates:
+            by_position[candidate.position_id].append(candidate)
+    return by_position
+
+
+def _candidates_data(candidates, total_votes, vote_counts):
+    """Construir datos de candidatos con votos y porcentaje"""
+    candidates_data = []
+    for candidate in candidates:
+        vote_count = vote_counts.get(candidate.id, 0)
+        percentage = (vote_count / total_votes * 100) if total_votes > 0 else 0
+
+        candidates_data.append({
+            'id': candidate.id,
+            'name': candidate.name,
+            'description': candidate.description,
+            'vote_count': vote_count,
+            'percentage': round(percentage, 2)
+        })
+    return candidates_data
+
+
+class PublicResultsService:
+    """Datos de las rutas públicas de resultados (en vivo o para snapshots)"""
+
+    @staticmethod
+    def get_summary():
+        """Resumen de resultados de todas las posiciones activas (consultas fijas, no por posición)"""
+        positions = Position.query.filter_by(is_active=True).order_by(Position.order).all()
+        position_ids = [position.id for position in positions]
+        candidates_by_position = _candidates_by_position(position_ids)
+        tallies = _tallies(position_ids)
+
+        results_data = []
+        total_votes_cast = 0
+
+        for position in positions:
+            tally = tallies[position.id]
+            total_position_votes = tally['total']
+            total_votes_cast += total_position_votes
+
+            candidates_data = _candidates_data(
+                candidates_by_position[position.id], total_position_votes, tally['by_candidate']
+            )
+
+            # Encontrar ganador (candidato con más votos)
+            winner = None
+            if candidates_data:
+                winner = max(candidates_data, key=lambda x: x['vote_count'])
+
+            results_data.append({
+                'position_id': position.id,
+                'position_name': position.name,
+                'position_description': position.description,
+                'total_votes': total_position_votes,
+                'candidates': candidates_data,
+                'winner': winner,
+                'votes_by_type': tally['by_type']
+            })
+
+        return {
+            'summary': {
+                'total_positions': len(results_data),
+                'total_votes_cast': total_votes_cast,
+                'generated_at': datetime.utcnow().isoformat()
+            },
+            'results': results_data
+        }
+
+    @staticmethod
+    def get_position(position_id):
+        """Resultados detallados de una posición (None si no existe)"""
+        position = db.session.get(Position, position_id)
+        if not position:
+            return None
+
+        candidates = Candidate.query.filter_by(
+            position_id=position_id
+        ).order_by(Candidate.order).all()
+
+        tally = _tallies([position_id])[position_id]
+        total_votes = tally['total']
+        votes_by_type = tally['by_type']
+
+        # Ordenar por votos descendentes
+        candidates_data = _candidates_data(candidates, total_votes, tally['by_candidate'])
+        candidates_data.sort(key=lambda x: x['vote_count'], reverse=True)
+
+        return {
+            'position': {
+                'id': position.id,
+                'name': position.name,
+                'description': position.description
+            },
+            'candidates': candidates_data,
+            'statistics': {
+                'total_votes': total_votes,
+                'votes_candidate': votes_by_type['candidate'],
+                'votes_no_se': votes_by_type['no_se'],
+                'votes_none': votes_by_type['ninguno'],
+                'votes_abstain': votes_by_type['abstencion'],
+                'votes_blank': votes_by_type['blanco']
+            }
+        }
+
+    @staticmethod
+    def get_statistics():
+        """Estadísticas generales de la encuesta (participación y votos desde los contadores)"""
+        participation = CounterService.get_participation()
+        total_participants = participation['total']
+        total_voted = participation['voted']
+        participation_rate = participation['participation_rate']
+
+        position_ids = [pid for (pid,) in Position.query.filter_by(is_active=True).order_by(
+            Position.order).with_entities(Position.id).all()]
+        total_positions = len(position_ids)
+        total_candidates = Candidate.query.count()
+        total_votes = participation['total_votes']
+        position_votes = CounterService.get_position_votes(position_ids)
+
+        return {
+            'statistics': {
+                'total_participants': total_participants,
+                'total_voted': total_voted,
+                'participation_rate': round(participation_rate, 2),
+                'total_positions': total_positions,
+                'total_candidates': total_candidates,
+                'total_votes': total_votes,
+                'average_votes_per_position': round(total_votes / total_positions, 2) if total_positions > 0 else 0,
+                'votes_by_position': [
+                    {'position_id': pid, 'votes': position_votes[pid]} for pid in position_ids
+                ]
+            }
+        }
+
+    @staticmethod
+    def get_timeline():
+        """Votos por hora con acumulado"""
+        votes = Vote.query.order_by(Vote.created_at).all()
+
+        timeline_data = {}
+        for vote in votes:
+            # Agrupar por hora
+            hour_key = vote.created_at.strftime('%Y-%m-%d %H:00')
+            timeline_data[hour_key] = timeline_data.get(hour_key, 0) + 1
+
+        # Convertir a lista ordenada
+        timeline = []
+        cumulative = 0
+        for hour in sorted(timeline_data.keys()):
+            cumulative += timeline_data[hour]
+            timeline.append({
+                'hour': hour,
+                'votes': timeline_data[hour],
+                'cumulative': cumulative
+            })
+
+        return {'timeline': timeline}
@@ -1,28 +1,46 @@
 from flask import current_app
 from app.extensions import db
-from app.models import Vote, Position, Candidate, Participant
+from app.models import Vote, Position, Candidate, Participant, ClientFingerprint
 from sqlalchemy import func
 from datetime import datetime
-from io import BytesIO
+from io import BytesIO, StringIO
 import csv
 import json
 
+# Campos de segmentación de Participant disponibles para tablas cruzadas
+CROSSTAB_FIELDS = ('field1', 'field2', 'field3')
+
+# Tipos de voto especiales (distintos de voto a candidato)
+SPECIAL_VOTE_TYPES = ('no_se', 'ninguno', 'abstencion', 'blanco')
+
+# Etiquetas de los tipos de voto especiales en reportes y exportaciones
+SPECIAL_VOTE_LABELS = {
+    'no_se': 'No Sé',
+    'ninguno': 'Ninguno',
+    'abstencion': 'Abstención',
+    'blanco': 'Voto en Blanco'
+}
+
 class ReportService:
     """Servicio para generar reportes de la encuesta"""
     
+    # Cache de tablas cruzadas: clave -> (versión de datos, resultado)
+    _crosstab_cache = {}
+    CROSSTAB_CACHE_SIZE = 64
+    
     @staticmethod
     def get_survey_summary():
-        """Obtener resumen general de la encuesta"""
-        total_participants = Participant.query.count()
-        voted_participants = Participant.query.filter_by(has_voted=True).count()
-        total_votes = Vote.query.count()
+        """Obtener resumen general de la encuesta (desde los contadores de participación)"""
+        from app.services.counter_service import CounterService
+        
+        participation = CounterService.get_participation()
         
         return {
-            'total_participants': total_participants,
-            'voted_participants': voted_participants,
-            'pending_participants': total_participants - voted_participants,
-            'participation_rate': (voted_participants / total_participants * 100) if total_participants > 0 else 0,
-            'total_votes': total_votes,
+            'total_participants': participation['total'],
+            'voted_participants': participation['voted'],
+            'pending_participants': participation['pending'],
+            'participation_rate': participation['participation_rate'],
+            'total_votes': participation['total_votes'],
             'generated_at': datetime.utcnow().isoformat()
         }
     
@@ -125,10 +143,79 @@ class ReportService:
             }
         return None
     
+    @staticmethod
+    def iter_position_tallies(batch_size=50):
+        """
+        Conteos agregados por posición, por lotes de posiciones.
+        
+        Una consulta agrupada (posición, tipo de voto, candidato) por lote: la
+        memoria depende del tamaño del lote y no del número de posiciones.
+        
+        Args:
+            batch_size: Posiciones por consulta
+        
+        Yields:
+            Diccionario por posición (en orden) con candidatos ordenados por
+            votos, votos especiales y ganador
+        """
+        positions = db.session.query(Position.id, Position.name, Position.description).order_by(
+            Position.order, Position.id
+        ).all()
+        
+        for start in range(0, len(positions), batch_size):
+            batch = positions[start:start + batch_size]
+            ids = [p.id for p in batch]
+            
+            rows = db.session.query(
+                Vote.position_id, Vote.vote_type, Vote.candidate_id, func.count()
+            ).filter(Vote.position_id.in_(ids)).group_by(
+                Vote.position_id, Vote.vote_type, Vote.candidate_id
+            ).all()
+            candidates = db.session.query(Candidate.id, Candidate.position_id, Candidate.name).filter(
+                Candidate.position_id.in_(ids)
+            ).order_by(Candidate.order, Candidate.id).all()
+            
+            tallies = {pid: {'candidates': {}, 'special': dict.fromkeys(SPECIAL_VOTE_TYPES, 0), 'total': 0}
+                       for pid in ids}
+            for candidate in candidates:
+                tallies[candidate.position_id]['candidates'][candidate.id] = {
+                    'candidate_id': candidate.id, 'name': candidate.name, 'votes': 0
+                }
+            for position_id, vote_type, candidate_id, count in rows:
+                tally = tallies[position_id]
+                tally['total'] += count
+                if vote_type == 'candidate' and candidate_id in tally['candidates']:
+                    tally['candidates'][candidate_id]['votes'] += count
+                elif vote_type in tally['special']:
+                    tally['special'][vote_type] += count
+            
+            for position in batch:
+                tally = tallies[position.id]
+                total = tally['total']
+                ranked = sorted(tally['candidates'].values(), key=lambda c: c['votes'], reverse=True)
+                for candidate in ranked:
+                    candidate['percentage'] = (candidate['votes'] / total * 100) if total > 0 else 0
+                
+                yield {
+                    'position_id': position.id,
+                    'position_name': position.name,
+                    'position_description': position.description,
+                    'total_votes': total,
+                    'candidates': ranked,
+                    'special_votes': {
+                        vote_type: {
+                            'count': count,
+                            'percentage': (count / total * 100) if total > 0 else 0
+                        }
+                        for vote_type, count in tally['special'].items()
+                    },
+                    'winner': ranked[0] if ranked and ranked[0]['votes'] > 0 else None
+                }
+    
     @staticmethod
     def export_to_csv():
         """Exportar resultados a CSV"""
-        output = BytesIO()
+        output = StringIO()
         writer = csv.writer(output)
         
         # Encabezado
@@ -158,8 +245,7 @@ class ReportService:
             writer.writerow(['Voto en Blanco', pos_data['special_votes']['blanco']['count'], f"{pos_data['special_votes']['blanco']['percentage']:.2f}%"])
             writer.writerow([])
         
-        output.seek(0)
-        return output
+        return BytesIO(output.getvalue().encode('utf-8'))
     
     @staticmethod
     def get_participation_timeline():
@@ -181,22 +267,162 @@ class ReportService:
         ]
     
     @staticmethod
-    def get_detailed_audit_log():
-        """Obtener log detallado de votos con información de participante"""
-        votes = Vote.query.join(Participant).join(Position).outerjoin(Candidate).all()
-        
-        audit_data = []
-        for vote in votes:
-            audit_data.append({
-                'timestamp': vote.created_at.isoformat(),
-                'participant_email': vote.participant.email,
-                'position': vote.position.name,
-                'vote_type': vote.vote_type,
-                'candidate': vote.candidate.name if vote.candidate else None,
-                'ip_address': vote.ip_address
+    def get_vote_crosstab(fields, position_id=None):
+        """
+        Distribución de votos por posición cruzada con uno o dos campos del participante
+        
+        Los conteos se obtienen con una sola consulta agrupada (votes JOIN participants)
+        y se cachean hasta que cambie la versión de datos.
+        
+        Args:
+            fields: Lista con uno o dos de 'field1', 'field2', 'field3'
+            position_id: ID de la posición (None para todas)
+        
+        Returns:
+            Diccionario con la versión de datos y los segmentos por posición
+        """
+        from app.services.counter_service import CounterService, DATA_VERSION
+        
+        fields = tuple(fields)
+        version = CounterService.get(DATA_VERSION)
+        cache_key = (fields, position_id)
+        
+        cached = ReportService._crosstab_cache.get(cache_key)
+        if cached and cached[0] == version:
+            return cached[1]
+        
+        field_columns = [getattr(Participant, field) for field in fields]
+        query = db.session.query(
+            Vote.position_id,
+            Vote.vote_type,
+            Vote.candidate_id,
+            *field_columns,
+            func.count().label('count')
+        ).join(Participant, Participant.id == Vote.participant_id)
+        
+        if position_id:
+            query = query.filter(Vote.position_id == position_id)
+        
+        rows = query.group_by(
+            Vote.position_id, Vote.vote_type, Vote.candidate_id, *field_columns
+        ).all()
+        
+        positions_query = Position.query
+        candidates_query = Candidate.query
+        if position_id:
+            positions_query = positions_query.filter_by(id=position_id)
+            candidates_query = candidates_query.filter_by(position_id=position_id)
+        
+        positions = {p.id: p for p in positions_query.order_by(Position.order).all()}
+        candidate_names = {c.id: c.name for c in candidates_query.all()}
+        
+        # Agrupar filas por posición y segmento
+        by_position = {pid: {} for pid in positions}
+        for row in rows:
+            segments = by_position.get(row.position_id)
+            if segments is None:
+                continue
+            
+            values = tuple(getattr(row, field) for field in fields)
+            segment = segments.setdefault(values, {
+                'values': dict(zip(fields, values)),
+                'total': 0,
+                'candidates': {},
+                'special_votes': {vote_type: 0 for vote_type in SPECIAL_VOTE_TYPES}
             })
+            segment['total'] += row.count
+            
+            if row.vote_type == 'candidate' and row.candidate_id is not None:
+                candidate = segment['candidates'].setdefault(row.candidate_id, {
+                    'candidate_id': row.candidate_id,
+                    'name': candidate_names.get(row.candidate_id),
+                    'votes': 0
+                })
+                candidate['votes'] += row.count
+            elif row.vote_type in segment['special_votes']:
+                segment['special_votes'][row.vote_type] += row.count
+        
+        results = []
+        for pid, position in positions.items():
+            segments = sorted(
+                by_position[pid].values(),
+                key=lambda seg: tuple((v is None, v or '') for v in seg['values'].values())
+            )
+            for segment in segments:
+                segment['candidates'] = sorted(
+                    segment['candidates'].values(), key=lambda c: c['votes'], reverse=True
+                )
+            
+            results.append({
+                'position_id': pid,
+                'position_name': position.name,
+                'total_votes': sum(seg['total'] for seg in segments),
+                'segments': segments
+            })
+        
+        result = {
+            'fields': list(fields),
+            'data_version': version,
+            'positions': results,
+            'generated_at': datetime.utcnow().isoformat()
+        }
         
-        return audit_data
+        if len(ReportService._crosstab_cache) >= ReportService.CROSSTAB_CACHE_SIZE:
+            ReportService._crosstab_cache.clear()
+        ReportService._crosstab_cache[cache_key] = (version, result)
+        
+        return result
+    
+    @staticmethod
+    def iter_audit_rows(window=5000):
+        """
+        Votos con información de participante, por ventanas de `window` filas.
+        
+        Paginación por clave (Vote.id > último id) en lugar de OFFSET: cada
+        ventana es una consulta indexada y la memoria no crece con el total.
+        
+        Yields:
+            Filas (vote_id, created_at, email, position_name, vote_type,
+            candidate_name, ip_address) en orden de Vote.id
+        """
+        last_id = 0
+        while True:
+            rows = db.session.query(
+                Vote.id,
+                Vote.created_at,
+                Participant.email,
+                Position.name.label('position_name'),
+                Vote.vote_type,
+                Candidate.name.label('candidate_name'),
+                ClientFingerprint.ip_address
+            ).join(Participant, Participant.id == Vote.participant_id) \
+             .join(Position, Position.id == Vote.position_id) \
+             .outerjoin(Candidate, Candidate.id == Vote.candidate_id) \
+             .outerjoin(ClientFingerprint, ClientFingerprint.id == Vote.client_id) \
+             .filter(Vote.id > last_id) \
+             .order_by(Vote.id) \
+             .limit(window) \
+             .all()
+            
+            yield from rows
+            if len(rows) < window:
+                return
+            last_id = rows[-1].id
+    
+    @staticmethod
+    def get_detailed_audit_log():
+        """Obtener log detallado de votos con información de participante"""
+        return [
+            {
+                'timestamp': row.created_at.isoformat(),
+                'participant_email': row.email,
+                'position': row.position_name,
+                'vote_type': row.vote_type,
+                'candidate': row.candidate_name,
+                'ip_address': row.ip_address
+            }
+            for row in ReportService.iter_audit_rows()
+        ]
     
     @staticmethod
     def export_audit_to_json():
@@ -0,0 +1,195 @@
+from flask import current_app
+from app.extensions import db
+from app.models import ElectionRound, ArchivedVote, Vote, Participant
+from app.services.report_service import ReportService
+from app.services.counter_service import CounterService, DATA_VERSION, PARTICIPANTS_VOTED, VOTES_TOTAL
+from app.services.snapshot_service import SnapshotService
+from sqlalchemy import select, literal
+from datetime import datetime
+
+
+class RoundService:
+    """Servicio para rondas de votación y archivo de votos de rondas cerradas"""
+
+    @staticmethod
+    def get_open_round():
+        """Obtener la ronda abierta actual (o None)"""
+        return ElectionRound.query.filter_by(status='open').order_by(ElectionRound.id.desc()).first()
+
+    @staticmethod
+    def resolve_vote_round():
+        """
+        Determinar la ronda a la que se asignan los votos nuevos
+
+        Returns:
+            Tupla (round_id, error). Sin rondas creadas se vota sin ronda
+            (round_id None); si existen rondas pero ninguna abierta, error.
+        """
+        current = RoundService.get_open_round()
+        if current:
+            return current.id, None
+
+        if db.session.query(ElectionRound.id).first() is not None:
+            return None, 'No hay una ronda de votación abierta'
+
+        return None, None
+
+    @staticmethod
+    def open_round(name):
+        """
+        Abrir una nueva ronda de votación
+
+        Los votos emitidos antes de la primera ronda (sin round_id) pasan a la
+        ronda que se abre: cuentan en ella y se archivan al cerrarla.
+
+        Returns:
+            Tupla (ronda, error)
+        """
+        if ElectionRound.query.filter(ElectionRound.status.in_(['open', 'closing'])).first():
+            return None, 'Ya existe una ronda abierta o en cierre'
+
+        election_round = ElectionRound(name=name, status='open', opened_at=datetime.utcnow())
+        db.session.add(election_round)
+        db.session.flush()
+
+        votes = Vote.__table__
+        attached = db.session.execute(
+            votes.update().where(votes.c.round_id.is_(None)).values(round_id=election_round.id)
+        ).rowcount
+        db.session.commit()
+
+        if attached:
+            current_app.logger.info(f'Ronda {election_round.id}: {attached} votos previos asignados')
+
+        # Los resultados públicos vuelven a calcularse en vivo
+        SnapshotService.unpublish()
+        return election_round, None
+
+    @staticmethod
+    def close_round(round_id, publish=False):
+        """
+        Cerrar una ronda: congelar resultados y archivar sus votos
+
+        Los votos se mueven a archived_votes por lotes, confirmando cada lote,
+        para no bloquear la tabla votes durante mucho tiempo. Los votos sin ronda
+        (anteriores a la primera ronda) se archivan con la ronda que se cierra.
+
+        Con publish=True los resultados públicos se publican además como
+        snapshot estático (SnapshotService) antes de archivar los votos.
+
+        Una ronda en 'closing' (cierre interrumpido) retoma el archivo: los
+        resultados congelados ya guardados no se recalculan ni se republican,
+        porque las tablas pueden estar parcialmente archivadas.
+
+        Returns:
+            Tupla (ronda, error)
+        """
+        election_round = db.session.get(ElectionRound, round_id)
+        if not election_round:
+            return None, 'Ronda no encontrada'
+        if election_round.status == 'closed':
+            return None, 'La ronda ya está cerrada'
+
+        if election_round.status == 'closing':
+            current_app.logger.info(f'Retomando el cierre de la ronda {election_round.id}')
+        else:
+            # Dejar de aceptar votos antes de congelar resultados
+            election_round.status = 'closing'
+            db.session.commit()
+
+        if election_round.results_snapshot is None:
+            # Aún no se archivó ningún voto: los resultados son los de la ronda completa
+            results_snapshot = {
+                'summary': ReportService.get_survey_summary(),
+                'results': ReportService.get_position_results()
+            }
+            if publish:
+                SnapshotService.publish(election_round.id)
+            election_round.results_snapshot = results_snapshot
+            db.session.commit()
+        elif publish:
+            current_app.logger.warning(
+                f'Ronda {election_round.id}: cierre retomado, el snapshot público no se vuelve a publicar'
+            )
+
+        chunk_size = current_app.config.get('ROUND_ARCHIVE_CHUNK_SIZE', 5000)
+        RoundService._archive_votes(election_round.id, chunk_size)
+        RoundService._reset_has_voted(chunk_size)
+
+        # Contar en el archivo: incluye los lotes de un intento anterior
+        archived = ArchivedVote.query.filter_by(round_id=election_round.id).count()
+
+        election_round.status = 'closed'
+        election_round.closed_at = datetime.utcnow()
+        election_round.archived_votes = archived
+        db.session.commit()
+
+        current_app.logger.info(f'Ronda {election_round.id} cerrada: {archived} votos archivados')
+        return election_round, None
+
+    @staticmethod
+    def _archive_votes(round_id, chunk_size):
+        """Mover los votos de la ronda a archived_votes en lotes"""
+        votes = Vote.__table__
+        archive = ArchivedVote.__table__
+        columns = ['participant_id', 'position_id', 'candidate_id', 'vote_type', 'client_id', 'created_at']
+        round_filter = db.or_(votes.c.round_id == round_id, votes.c.round_id.is_(None))
+        total = 0
+
+        while True:
+            ids = db.session.execute(
+                select(votes.c.id).where(round_filter).order_by(votes.c.id).limit(chunk_size)
+            ).scalars().all()
+            if not ids:
+                break
+
+            db.session.execute(archive.insert().from_select(
+                ['vote_id'] + columns + ['round_id'],
+                select(votes.c.id, *[votes.c[name] for name in columns], literal(round_id))
+                .where(votes.c.id.in_(ids)).order_by(votes.c.id)
+            ))
+            # Descontar de los contadores de votos en la misma transacción
+            per_position = db.session.execute(
+                select(votes.c.position_id, db.func.count()).where(votes.c.id.in_(ids)).group_by(votes.c.position_id)
+            ).all()
+            db.session.execute(votes.delete().where(votes.c.id.in_(ids)))
+            connection = db.session.connection()
+            for position_id, count in per_position:
+                CounterService.increment(connection, CounterService.position_votes_name(position_id), -count)
+            CounterService.increment(connection, VOTES_TOTAL, -len(ids))
+            CounterService.increment(connection, DATA_VERSION, 1)
+            db.session.commit()
+            total += len(ids)
+
+        return total
+
+    @staticmethod
+    def _reset_has_voted(chunk_size):
+        """Marcar a todos los participantes como pendientes para la siguiente ronda"""
+        participants = Participant.__table__
+
+        while True:
+            ids = db.session.execute(
+                select(participants.c.id).where(participants.c.has_voted.is_(True)).limit(chunk_size)
+            ).scalars().all()
+            if not ids:
+                break
+
+            result = db.session.execute(
+                participants.update().where(participants.c.id.in_(ids)).values(has_voted=False)
+            )
+            CounterService.increment(db.session.connection(), PARTICIPANTS_VOTED, -result.rowcount)
+            db.session.commit()
+
+        # El índice de votantes de este proceso no espera al próximo sync
+        voter_index = current_app.extensions.get('voter_index')
+        if voter_index is not None and voter_index.loaded:
+            voter_index.clear_voted()
+
+    @staticmethod
+    def get_round_results(round_id):
+        """Obtener los resultados congelados de una ronda cerrada (o None)"""
+        election_round = db.session.get(ElectionRound, round_id)
+        if not election_round or election_round.status != 'closed':
+            return None
+        return election_round.results_snapshot
@@ -0,0 +1,207 @@
+from flask import current_app
+from app.extensions import db
+from app.models import Participant
+from sqlalchemy import text
+
+# Columnas de Participant cubiertas por el índice de búsqueda
+SEARCH_COLUMNS = ('email', 'first_name', 'last_name', 'field1', 'field2', 'field3')
+
+# Pesos bm25 por columna (email y nombres pesan más que los campos libres)
+SEARCH_WEIGHTS = (10.0, 5.0, 5.0, 1.0, 1.0, 1.0)
+
+FTS_TABLE = 'participants_fts'
+
+
+class SearchService:
+    """Servicio de búsqueda indexada de participantes"""
+
+    @staticmethod
+    def init_search_index():
+        """
+        Crear el índice FTS5 de participantes y sus triggers de sincronización.
+
+        Se intenta primero el tokenizer trigram (búsqueda por subcadena) y, si la
+        versión de SQLite no lo soporta, unicode61 con índices de prefijo. Si el
+        motor no es SQLite o no tiene FTS5, la búsqueda usa el fallback con LIKE.
+
+        Se ejecuta como migración (app/migrations.py), dentro de un app_context.
+        """
+        state = {'fts': False, 'tokenizer': None}
+        current_app.extensions['participant_search'] = state
+
+        if db.engine.dialect.name != 'sqlite':
+            return state
+
+        columns = ', '.join(SEARCH_COLUMNS)
+        new_columns = ', '.join(f'new.{c}' for c in SEARCH_COLUMNS)
+        old_columns = ', '.join(f'old.{c}' for c in SEARCH_COLUMNS)
+
+        try:
+            with db.engine.begin() as conn:
+                existing = conn.execute(text(
+                    "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"
+                ), {'name': FTS_TABLE}).scalar()
+
+                if existing:
+                    tokenizer = 'trigram' if 'trigram' in existing else 'unicode61'
+                else:
+                    tokenizer = None
+                    for tokenize in ("tokenize='trigram'",
+                                     "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'"):
+                        try:
+                            conn.execute(text(
+                                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                                f"{columns}, content='participants', content_rowid='id', {tokenize})"
+                            ))
+                            tokenizer = 'trigram' if 'trigram' in tokenize else 'unicode61'
+                            break
+                        except Exception:
+                            continue
+
+                    if tokenizer is None:
+                        return state
+
+                    # Indexar participantes existentes
+                    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON participants BEGIN "
+                    f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_columns}); END"
+                ))
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON participants BEGIN "
+                    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+                    f"VALUES ('delete', old.id, {old_columns}); END"
+                ))
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON participants BEGIN "
+                    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+                    f"VALUES ('delete', old.id, {old_columns}); "
+                    f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_columns}); END"
+                ))
+
+            state['fts'] = True
+            state['tokenizer'] = tokenizer
+        except Exception as e:
+            current_app.logger.warning(f'Índice FTS de participantes no disponible: {str(e)}')
+
+        return state
+
+    @staticmethod
+    def get_state():
+        """
+        Estado del índice en este proceso ({'fts': bool, 'tokenizer': str}).
+
+        Se detecta en el primer uso con una consulta a sqlite_master (sin DDL);
+        el índice se crea con las migraciones (python manage.py migrate).
+        """
+        state = current_app.extensions.get('participant_search')
+        if state is not None:
+            return state
+
+        state = {'fts': False, 'tokenizer': None}
+        if db.engine.dialect.name == 'sqlite':
+            existing = db.session.execute(text(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"
+            ), {'name': FTS_TABLE}).scalar()
+            if existing:
+                state = {'fts': True, 'tokenizer': 'trigram' if 'trigram' in existing else 'unicode61'}
+
+        current_app.extensions['participant_search'] = state
+        return state
+
+    @staticmethod
+    def suspend_sync():
+        """
+        Eliminar los triggers de sincronización antes de una carga masiva.
+
+        Con millones de filas es mucho más rápido reconstruir el índice al final
+        (rebuild_search_index) que actualizarlo fila por fila.
+        """
+        if not SearchService.get_state()['fts']:
+            return False
+
+        with db.engine.begin() as conn:
+            for suffix in ('ai', 'ad', 'au'):
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}"))
+        return True
+
+    @staticmethod
+    def rebuild_search_index():
+        """Reindexar todos los participantes y restaurar los triggers de sincronización"""
+        state = SearchService.get_state()
+        if not state['fts']:
+            return state
+
+        with db.engine.begin() as conn:
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        return SearchService.init_search_index()
+
+    @staticmethod
+    def search_participants(term, page=1, per_page=20):
+        """
+        Buscar participantes por email, nombre, apellido y field1..field3
+
+        Args:
+            term: Texto a buscar
+            page: Número de página (desde 1)
+            per_page: Resultados por página
+
+        Returns:
+            Tupla (participantes ordenados por relevancia, total de coincidencias)
+        """
+        page = max(page, 1)
+        per_page = max(per_page, 1)
+        state = SearchService.get_state()
+
+        match = SearchService._build_match_query(term, state.get('tokenizer'))
+        if not state.get('fts') or match is None:
+            return SearchService._search_like(term, page, per_page)
+
+        weights = ', '.join(str(w) for w in SEARCH_WEIGHTS)
+        total = db.session.execute(text(
+            f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+        ), {'match': match}).scalar()
+
+        ids = db.session.execute(text(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match "
+            f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT :limit OFFSET :offset"
+        ), {'match': match, 'limit': per_page, 'offset': (page - 1) * per_page}).scalars().all()
+
+        if not ids:
+            return [], total
+
+        by_id = {p.id: p for p in Participant.query.filter(Participant.id.in_(ids)).all()}
+        return [by_id[i] for i in ids if i in by_id], total
+
+    @staticmethod
+    def _build_match_query(term, tokenizer):
+        """
+        Construir la expresión MATCH de FTS5 a partir del texto del usuario.
+
+        Cada palabra se cita como frase para neutralizar la sintaxis de FTS5. Con
+        trigram se requieren al menos 3 caracteres por palabra; con unicode61 se
+        usa búsqueda por prefijo. Retorna None si el índice no puede resolverla.
+        """
+        words = [w for w in term.split() if w]
+        if not words:
+            return None
+
+        if tokenizer == 'trigram':
+            if any(len(w) < 3 for w in words):
+                return None
+            return ' '.join('"' + w.replace('"', '""') + '"' for w in words)
+
+        return ' '.join('"' + w.replace('"', '""') + '"*' for w in words)
+
+    @staticmethod
+    def _search_like(term, page, per_page):
+        """Búsqueda sin índice FTS (otros motores o términos muy cortos)"""
+        pattern = f'%{term.strip()}%'
+        query = Participant.query.filter(
+            db.or_(*[getattr(Participant, column).ilike(pattern) for column in SEARCH_COLUMNS])
+        )
+
+        total = query.count()
+        items = query.order_by(Participant.id).limit(per_page).offset((page - 1) * per_page).all()
+        return items, total
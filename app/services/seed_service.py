@@ -0,0 +1,370 @@
+from flask import current_app
+from app.extensions import db
+from app.models import (
+    Participant, ParticipantUser, Position, Candidate, Vote, AuditLog, ClientFingerprint
+)
+from app.services.counter_service import CounterService
+from app.services.search_service import SearchService
+from app.services.round_service import RoundService
+from sqlalchemy import func, select, text
+from werkzeug.security import generate_password_hash
+from datetime import datetime, timedelta
+import bisect
+import itertools
+import math
+import random
+
+SEED_PASSWORD = 'Seed12345'
+
+FIRST_NAMES = (
+    'Ana', 'Juan', 'María', 'Luis', 'Carmen', 'Carlos', 'Lucía', 'José', 'Sofía', 'Miguel',
+    'Laura', 'Pedro', 'Elena', 'Jorge', 'Paula', 'Diego', 'Marta', 'Andrés', 'Rosa', 'Pablo'
+)
+LAST_NAMES = (
+    'García', 'Rodríguez', 'González', 'Fernández', 'López', 'Martínez', 'Sánchez', 'Pérez',
+    'Gómez', 'Martín', 'Jiménez', 'Ruiz', 'Hernández', 'Díaz', 'Moreno', 'Muñoz', 'Álvarez',
+    'Romero', 'Torres', 'Ramírez'
+)
+REGIONS = ('Norte', 'Sur', 'Centro', 'Este', 'Oeste')
+GROUPS = ('A', 'B', 'C')
+
+# Navegadores con pesos aproximados de uso real (se repiten mucho entre votantes)
+USER_AGENTS = (
+    ('Mozilla/5.0 (Linux; Android 13; SM-A135F) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'Chrome/120.0.0.0 Mobile Safari/537.36', 30),
+    ('Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+     'Version/17.1 Mobile/15E148 Safari/604.1', 22),
+    ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'Chrome/120.0.0.0 Safari/537.36', 25),
+    ('Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0', 6),
+    ('Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+     'Version/17.1 Safari/605.1.15', 8),
+    ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0', 7),
+    ('Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'Chrome/120.0.0.0 Safari/537.36', 2),
+)
+
+# Tipos de voto con su peso relativo
+VOTE_TYPE_WEIGHTS = (
+    ('candidate', 82), ('blanco', 6), ('ninguno', 4), ('no_se', 5), ('abstencion', 3)
+)
+
+# Picos de participación: (fracción de la jornada, desviación, peso)
+VOTING_BURSTS = ((0.04, 0.02, 3), (0.45, 0.06, 4), (0.92, 0.03, 3))
+BURST_SHARE = 0.6
+
+
+class SeedService:
+    """Servicio para generar datos sintéticos de gran volumen (benchmarks y pruebas de carga)"""
+
+    @staticmethod
+    def seed(participants=10000, positions=8, candidates=4, votes=None, users_ratio=1.0,
+             clients=None, audit=True, skew=1.1, hours=12, start=None,
+             chunk_size=10000, seed_value=42, progress=None):
+        """
+        Generar participantes, cuentas, posiciones, candidatos, votos,
+        huellas de cliente y registros de auditoría con inserciones masivas.
+
+        Distribuciones: popularidad de candidatos tipo Zipf (skew), votos
+        concentrados en picos de la jornada y pocos navegadores muy repetidos.
+        Con la misma semilla se generan los mismos datos (salvo la fecha base,
+        que por defecto es ahora - hours).
+
+        Las inserciones usan Core por lotes, por lo que no disparan los eventos
+        del ORM: al terminar se reconcilian los contadores y se reconstruye el
+        índice de búsqueda.
+
+        Args:
+            participants: Participantes a crear
+            positions: Posiciones a crear
+            candidates: Candidatos por posición
+            votes: Votos totales aproximados (papeletas completas); por defecto 70% de participación
+            users_ratio: Fracción de participantes con cuenta de acceso
+            clients: Tamaño del conjunto de huellas IP + navegador
+            audit: Generar registros de auditoría de login y voto
+            skew: Exponente de popularidad de candidatos (0 = uniforme)
+            hours: Duración de la jornada de votación
+            start: Inicio de la jornada (datetime)
+            chunk_size: Filas por lote de inserción
+            seed_value: Semilla del generador aleatorio
+            progress: Callback opcional progress(tabla, insertadas)
+
+        Returns:
+            Dict con los conteos insertados y los ids de cuentas sin voto
+        """
+        rng = random.Random(seed_value)
+        now = datetime.utcnow()
+        start = start or now - timedelta(hours=hours)
+        ballot_size = max(positions, 1)
+
+        if votes is None:
+            votes = int(participants * 0.7) * positions
+        voter_count = min(participants, votes // ballot_size)
+        clients = max(clients or participants // 5, 1)
+
+        ids = SeedService._next_ids()
+        report = {'participants': 0, 'participant_users': 0, 'positions': 0, 'candidates': 0,
+                  'votes': 0, 'client_fingerprints': 0, 'audit_logs': 0}
+
+        suspended = SearchService.suspend_sync()
+        pragmas = SeedService._fast_sqlite()
+        try:
+            with db.session.no_autoflush:
+                position_ids, candidate_ids = SeedService._seed_ballot(
+                    rng, ids, positions, candidates, now, report
+                )
+                client_pool = SeedService._seed_clients(rng, ids, clients, now, chunk_size, report, progress)
+
+                # Votantes elegidos al azar (no los primeros ids)
+                voted = bytearray(participants)
+                for index in rng.sample(range(participants), voter_count):
+                    voted[index] = 1
+
+                SeedService._insert(Participant.__table__, (
+                    {
+                        'id': ids['participants'] + i,
+                        'email': f"seed{ids['participants'] + i}@ejemplo.com",
+                        'first_name': rng.choice(FIRST_NAMES),
+                        'last_name': rng.choice(LAST_NAMES),
+                        'field1': rng.choice(REGIONS),
+                        'field2': rng.choice(GROUPS),
+                        'field3': None,
+                        'has_voted': bool(voted[i]),
+                        'created_at': start - timedelta(days=rng.randint(1, 60)),
+                        'updated_at': now
+                    }
+                    for i in range(participants)
+                ), chunk_size, report, 'participants', progress)
+
+                pending_users = SeedService._seed_users(
+                    rng, ids, participants, users_ratio, voted, now, chunk_size, report, progress
+                )
+                ballots = SeedService._seed_votes(
+                    rng, ids, participants, voted, position_ids, candidate_ids, client_pool,
+                    skew, start, hours, chunk_size, report, progress
+                )
+                if audit:
+                    SeedService._seed_audit(rng, ballots, report, chunk_size, progress)
+        finally:
+            SeedService._restore_sqlite(pragmas)
+
+        CounterService.reconcile()
+        if suspended:
+            SearchService.rebuild_search_index()
+
+        current_app.logger.info(f'Datos sintéticos generados: {report}')
+        report['pending_user_ids'] = pending_users
+        return report
+
+    @staticmethod
+    def _next_ids():
+        """Primer id libre de cada tabla (para asignar ids sin consultar por fila)"""
+        tables = {
+            'participants': Participant, 'participant_users': ParticipantUser, 'positions': Position,
+            'candidates': Candidate, 'votes': Vote, 'client_fingerprints': ClientFingerprint
+        }
+        return {
+            name: (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+            for name, model in tables.items()
+        }
+
+    @staticmethod
+    def _insert(table, rows, chunk_size, report, name, progress):
+        """Insertar filas por lotes, confirmando cada lote"""
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            db.session.execute(table.insert(), chunk)
+            db.session.commit()
+            report[name] += len(chunk)
+            if progress:
+                progress(name, report[name])
+
+    @staticmethod
+    def _seed_ballot(rng, ids, positions, candidates, now, report):
+        """Crear posiciones y candidatos; retorna sus ids"""
+        max_order = db.session.execute(select(func.max(Position.order))).scalar() or 0
+        position_ids = [ids['positions'] + i for i in range(positions)]
+        if position_ids:
+            db.session.execute(Position.__table__.insert(), [
+                {'id': position_id, 'name': f'Posición {position_id}', 'description': f'Cargo {position_id}',
+                 'order': max_order + i + 1, 'is_active': True, 'created_at': now, 'updated_at': now}
+                for i, position_id in enumerate(position_ids)
+            ])
+
+        candidate_ids = {}
+        rows = []
+        next_id = ids['candidates']
+        for position_id in position_ids:
+            candidate_ids[position_id] = list(range(next_id, next_id + candidates))
+            for order, candidate_id in enumerate(candidate_ids[position_id], start=1):
+                rows.append({
+                    'id': candidate_id, 'position_id': position_id,
+                    'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {candidate_id}',
+                    'description': 'Propuesta', 'order': order, 'created_at': now, 'updated_at': now
+                })
+            next_id += candidates
+        if rows:
+            db.session.execute(Candidate.__table__.insert(), rows)
+
+        db.session.commit()
+        report['positions'] = len(position_ids)
+        report['candidates'] = len(rows)
+        return position_ids, candidate_ids
+
+    @staticmethod
+    def _seed_clients(rng, ids, clients, now, chunk_size, report, progress):
+        """Crear el conjunto de huellas IP + navegador; retorna [(id, ip), ...]"""
+        agents = [ua for ua, _ in USER_AGENTS]
+        agent_weights = list(itertools.accumulate(weight for _, weight in USER_AGENTS))
+
+        pool = {}
+        while len(pool) < clients:
+            ip = f'10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}'
+            ua = rng.choices(agents, cum_weights=agent_weights)[0]
+            pool.setdefault(ClientFingerprint.compute_fingerprint(ip, ua), (ip, ua))
+
+        # Reutilizar huellas ya existentes (misma semilla sobre la misma base)
+        fingerprints = list(pool)
+        existing = {}
+        for i in range(0, len(fingerprints), 500):
+            existing.update(db.session.execute(
+                select(ClientFingerprint.fingerprint, ClientFingerprint.id)
+                .where(ClientFingerprint.fingerprint.in_(fingerprints[i:i + 500]))
+            ).all())
+
+        next_id = itertools.count(ids['client_fingerprints'])
+        clients = []
+        rows = []
+        for fingerprint in fingerprints:
+            ip, ua = pool[fingerprint]
+            if fingerprint in existing:
+                clients.append((existing[fingerprint], ip))
+                continue
+            client_id = next(next_id)
+            rows.append({'id': client_id, 'fingerprint': fingerprint, 'ip_address': ip,
+                         'user_agent': ua, 'created_at': now})
+            clients.append((client_id, ip))
+
+        SeedService._insert(ClientFingerprint.__table__, rows, chunk_size, report, 'client_fingerprints', progress)
+        return clients
+
+    @staticmethod
+    def _seed_users(rng, ids, participants, users_ratio, voted, now, chunk_size, report, progress):
+        """Crear cuentas de participante; retorna los ids de cuentas sin voto"""
+        password_hash = generate_password_hash(SEED_PASSWORD)
+        pending = []
+        rows = []
+        user_id = ids['participant_users']
+
+        for i in range(participants):
+            if users_ratio < 1 and rng.random() >= users_ratio:
+                continue
+            participant_id = ids['participants'] + i
+            rows.append({
+                'id': user_id, 'email': f'seed{participant_id}@ejemplo.com', 'password_hash': password_hash,
+                'first_name': 'Seed', 'last_name': str(participant_id), 'is_active': True,
+                'email_confirmed': rng.random() < 0.9, 'participant_id': participant_id,
+                'created_at': now, 'updated_at': now
+            })
+            if not voted[i]:
+                pending.append(user_id)
+            user_id += 1
+
+        SeedService._insert(ParticipantUser.__table__, rows, chunk_size, report, 'participant_users', progress)
+        return pending
+
+    @staticmethod
+    def _ballot_time(rng, start, seconds):
+        """Momento de voto: picos de la jornada más un fondo uniforme"""
+        if rng.random() < BURST_SHARE:
+            center, spread, _ = rng.choices(VOTING_BURSTS, weights=[b[2] for b in VOTING_BURSTS])[0]
+            fraction = min(max(rng.gauss(center, spread), 0.0), 1.0)
+        else:
+            fraction = rng.random()
+        return start + timedelta(seconds=int(fraction * seconds))
+
+    @staticmethod
+    def _seed_votes(rng, ids, participants, voted, position_ids, candidate_ids, client_pool,
+                    skew, start, hours, chunk_size, report, progress):
+        """Crear una papeleta completa por votante; retorna [(participant_id, ip, momento), ...]"""
+        # Popularidad Zipf con un orden de favoritos distinto en cada posición
+        popularity = {}
+        for position_id, candidates in candidate_ids.items():
+            ranked = candidates[:]
+            rng.shuffle(ranked)
+            weights = itertools.accumulate(1 / math.pow(rank, skew) for rank in range(1, len(ranked) + 1))
+            popularity[position_id] = (ranked, list(weights))
+
+        vote_types = [vote_type for vote_type, _ in VOTE_TYPE_WEIGHTS]
+        type_weights = list(itertools.accumulate(weight for _, weight in VOTE_TYPE_WEIGHTS))
+        round_id = getattr(RoundService.get_open_round(), 'id', None)
+        seconds = int(hours * 3600)
+        ballots = []
+
+        def rows():
+            vote_id = ids['votes']
+            for i in range(participants):
+                if not voted[i]:
+                    continue
+                participant_id = ids['participants'] + i
+                # Pocos clientes concentran muchos votantes (NAT, equipos compartidos)
+                client_id, ip = client_pool[int(len(client_pool) * rng.random() ** 2)]
+                created_at = SeedService._ballot_time(rng, start, seconds)
+                ballots.append((participant_id, ip, created_at))
+
+                for position_id in position_ids:
+                    vote_type = rng.choices(vote_types, cum_weights=type_weights)[0]
+                    candidate_id = None
+                    ranked, weights = popularity[position_id]
+                    if vote_type == 'candidate' and ranked:
+                        candidate_id = ranked[bisect.bisect(weights, rng.random() * weights[-1])]
+                    elif vote_type == 'candidate':
+                        vote_type = 'blanco'
+                    yield {
+                        'id': vote_id, 'participant_id': participant_id, 'position_id': position_id,
+                        'candidate_id': candidate_id, 'vote_type': vote_type, 'client_id': client_id,
+                        'round_id': round_id, 'created_at': created_at
+                    }
+                    vote_id += 1
+
+        SeedService._insert(Vote.__table__, rows(), chunk_size, report, 'votes', progress)
+        return ballots
+
+    @staticmethod
+    def _seed_audit(rng, ballots, report, chunk_size, progress):
+        """Registros de auditoría de login y voto de cada votante"""
+        def rows():
+            for participant_id, ip, created_at in ballots:
+                yield {
+                    'admin_id': None, 'action': 'LOGIN', 'entity_type': 'PARTICIPANT_USER',
+                    'entity_id': participant_id, 'description': None, 'ip_address': ip,
+                    'created_at': created_at - timedelta(seconds=rng.randint(20, 600))
+                }
+                yield {
+                    'admin_id': None, 'action': 'VOTE_SUBMITTED', 'entity_type': 'PARTICIPANT',
+                    'entity_id': participant_id,
+                    'description': f'Participante seed{participant_id}@ejemplo.com ha votado',
+                    'ip_address': ip, 'created_at': created_at
+                }
+
+        SeedService._insert(AuditLog.__table__, rows(), chunk_size, report, 'audit_logs', progress)
+
+    @staticmethod
+    def _fast_sqlite():
+        """En SQLite, desactivar fsync durante la carga; retorna el valor anterior"""
+        if db.engine.dialect.name != 'sqlite':
+            return None
+        connection = db.session.connection()
+        previous = connection.execute(text('PRAGMA synchronous')).scalar()
+        connection.execute(text('PRAGMA synchronous = OFF'))
+        return previous
+
+    @staticmethod
+    def _restore_sqlite(previous):
+        if previous is not None:
+            db.session.connection().execute(text(f'PRAGMA synchronous = {int(previous)}'))
+            db.session.commit()
@@ -0,0 +1,161 @@
+from flask import current_app, render_template
+from app.models import Position
+from app.services.public_results_service import PublicResultsService
+from datetime import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+# Puntero al snapshot publicado (lo comparten todos los workers)
+CURRENT_FILE = 'current.json'
+
+# Último puntero leído por este proceso: (mtime_ns, contenido)
+_current = {'stamp': None, 'value': None}
+_lock = threading.Lock()
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+
+class SnapshotService:
+    """
+    Snapshots inmutables de los resultados públicos publicados al cerrar una ronda.
+
+    Cada snapshot es un directorio <versión>/ con summary.json,
+    statistics.json, timeline.json, positions/<id>.json y (opcional)
+    index.html. Un puntero current.json indica la versión vigente; las rutas
+    públicas lo consultan con un stat() y sirven los archivos sin tocar la base
+    de datos hasta que se abre una nueva ronda.
+    """
+
+    @staticmethod
+    def snapshot_dir():
+        return os.path.abspath(current_app.config.get('RESULTS_SNAPSHOT_DIR', 'instance/snapshots'))
+
+    @staticmethod
+    def current():
+        """
+        Snapshot publicado o None.
+
+        Returns:
+            Diccionario {'version', 'round_id', 'published_at', ...}
+        """
+        path = os.path.join(SnapshotService.snapshot_dir(), CURRENT_FILE)
+        try:
+            stamp = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        if _current['stamp'] != stamp:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    value = json.load(f)
+            except (OSError, ValueError):
+                return None
+            with _lock:
+                _current['stamp'], _current['value'] = stamp, value
+        return _current['value']
+
+    @staticmethod
+    def file_path(version, name):
+        """Ruta de un archivo de un snapshot, o None si no existe"""
+        if not version or os.sep in version or version.startswith('.'):
+            return None
+        root = os.path.join(SnapshotService.snapshot_dir(), version)
+        path = os.path.normpath(os.path.join(root, name))
+        if not path.startswith(root + os.sep) or not os.path.isfile(path):
+            return None
+        return path
+
+    @staticmethod
+    def publish(round_id):
+        """
+        Calcular los resultados públicos una vez y publicarlos como snapshot.
+
+        Debe llamarse con la ronda en 'closing' (sin votos nuevos) y antes de
+        archivar sus votos. Los archivos se escriben en un directorio temporal
+        que se renombra al final; el puntero se reemplaza de forma atómica.
+
+        Returns:
+            Diccionario del puntero publicado
+        """
+        summary = PublicResultsService.get_summary()
+        statistics = PublicResultsService.get_statistics()
+        timeline = PublicResultsService.get_timeline()
+        published_at = datetime.utcnow().isoformat()
+
+        # La versión depende del contenido: mismo resultado, mismo id
+        content = json.dumps([summary['results'], statistics, timeline], sort_keys=True, default=str)
+        version = f"r{round_id}-{hashlib.sha256(content.encode()).hexdigest()[:12]}"
+
+        root = SnapshotService.snapshot_dir()
+        os.makedirs(root, exist_ok=True)
+        target = os.path.join(root, version)
+        pointer = {
+            'version': version,
+            'round_id': round_id,
+            'published_at': published_at,
+            'html': current_app.config.get('RESULTS_SNAPSHOT_HTML', True)
+        }
+
+        if not os.path.isdir(target):
+            tmp_dir = tempfile.mkdtemp(prefix='.snapshot-', dir=root)
+            try:
+                _write_json(os.path.join(tmp_dir, 'summary.json'), summary)
+                _write_json(os.path.join(tmp_dir, 'statistics.json'), statistics)
+                _write_json(os.path.join(tmp_dir, 'timeline.json'), timeline)
+
+                # Todas las posiciones (también inactivas): /api/results/position/<id> las sirve
+                for (position_id,) in Position.query.with_entities(Position.id).all():
+                    _write_json(os.path.join(tmp_dir, 'positions', f'{position_id}.json'),
+                                PublicResultsService.get_position(position_id))
+
+                if pointer['html']:
+                    html = render_template('results_snapshot.html', snapshot=pointer,
+                                           summary=summary, statistics=statistics['statistics'])
+                    with open(os.path.join(tmp_dir, 'index.html'), 'w', encoding='utf-8') as f:
+                        f.write(html)
+
+                for dirpath, dirnames, filenames in os.walk(tmp_dir):
+                    os.chmod(dirpath, 0o755)
+                    for name in filenames:
+                        os.chmod(os.path.join(dirpath, name), 0o644)
+                os.rename(tmp_dir, target)
+            except Exception:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                raise
+
+        SnapshotService._write_pointer(pointer)
+        current_app.logger.info(f'Snapshot de resultados {version} publicado (ronda {round_id})')
+        return pointer
+
+    @staticmethod
+    def unpublish():
+        """Retirar el snapshot vigente (al abrir una ronda); los archivos se conservan"""
+        path = os.path.join(SnapshotService.snapshot_dir(), CURRENT_FILE)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        current_app.logger.info('Snapshot de resultados retirado: resultados en vivo')
+        return True
+
+    @staticmethod
+    def _write_pointer(pointer):
+        root = SnapshotService.snapshot_dir()
+        fd, tmp_path = tempfile.mkstemp(dir=root, prefix='.current-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(pointer, f)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -0,0 +1,201 @@
+"""
+Registro de consultas lentas con captura automática del plan de ejecución.
+
+Cuando una sentencia supera SLOW_QUERY_THRESHOLD_MS se registra su forma
+(SQL normalizado), la forma de sus parámetros (tipos, nunca valores), la
+duración, la ruta que la originó y el plan (EXPLAIN QUERY PLAN en SQLite,
+EXPLAIN en otros motores). El plan se calcula una sola vez por forma de
+sentencia.
+
+Los registros se escriben como líneas JSON en un archivo rotativo y se
+conservan en memoria (por proceso) para el endpoint /api/admin/slow-queries.
+"""
+
+from flask import request, has_request_context
+from app.query_tracker import add_statement_listener, normalize_statement
+from collections import OrderedDict, deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger('app.slow_queries')
+
+_settings = {'enabled': False, 'threshold': 0.1, 'explain': True}
+_lock = threading.Lock()
+_recent = deque(maxlen=200)
+_by_shape = {}
+_plans = OrderedDict()
+
+PLAN_CACHE_SIZE = 256
+MAX_STATEMENT_LENGTH = 4000
+EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+
+def parameter_shape(parameters, executemany=False):
+    """Tipos de los parámetros ligados (sin sus valores), con repeticiones compactadas"""
+    if executemany:
+        rows = list(parameters or [])
+        first = parameter_shape(rows[0]) if rows else []
+        return {'rows': len(rows), 'row': first}
+
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+
+    shape = []
+    for value in parameters or ():
+        name = type(value).__name__
+        if shape and shape[-1][0] == name:
+            shape[-1][1] += 1
+        else:
+            shape.append([name, 1])
+    return [name if count == 1 else f'{name} x{count}' for name, count in shape]
+
+
+def _explain(cursor, dialect, statement, parameters):
+    """Obtener el plan con un cursor DBAPI aparte (no dispara eventos de SQLAlchemy)"""
+    if dialect == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    else:
+        prefix = 'EXPLAIN '
+
+    explain_cursor = cursor.connection.cursor()
+    try:
+        explain_cursor.execute(prefix + statement, parameters)
+        rows = explain_cursor.fetchall()
+    finally:
+        explain_cursor.close()
+
+    if dialect == 'sqlite':
+        # (id, parent, notused, detail): indentar según el nodo padre
+        depth = {0: 0}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, 0) + 1
+            lines.append('  ' * (depth[node_id] - 1) + detail)
+        return lines
+    return [' '.join(str(col) for col in row) for row in rows]
+
+
+def _plan_for(shape, cursor, dialect, statement, parameters, executemany):
+    """Plan de la forma de sentencia (cacheado)"""
+    with _lock:
+        if shape in _plans:
+            _plans.move_to_end(shape)
+            return _plans[shape]
+
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ''
+    if executemany or keyword not in EXPLAINABLE:
+        plan = None
+    else:
+        try:
+            plan = _explain(cursor, dialect, statement, parameters)
+        except Exception as e:
+            plan = [f'No disponible: {e}']
+
+    with _lock:
+        _plans[shape] = plan
+        if len(_plans) > PLAN_CACHE_SIZE:
+            _plans.popitem(last=False)
+    return plan
+
+
+def _on_statement(conn, cursor, statement, parameters, executemany, elapsed):
+    if not _settings['enabled'] or elapsed < _settings['threshold']:
+        return
+
+    shape = normalize_statement(statement)
+    plan = None
+    if _settings['explain']:
+        plan = _plan_for(shape, cursor, conn.dialect.name, statement, parameters, executemany)
+
+    endpoint = method = path = None
+    if has_request_context():
+        endpoint, method, path = request.endpoint, request.method, request.path
+
+    entry = {
+        'timestamp': datetime.utcnow().isoformat(),
+        'duration_ms': round(elapsed * 1000, 2),
+        'statement': shape[:MAX_STATEMENT_LENGTH],
+        'parameters': parameter_shape(parameters, executemany),
+        'endpoint': endpoint,
+        'method': method,
+        'path': path,
+        'plan': plan
+    }
+
+    with _lock:
+        _recent.append(entry)
+        summary = _by_shape.get(shape)
+        if summary is None:
+            summary = _by_shape[shape] = {
+                'statement': entry['statement'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                'endpoints': {}, 'plan': plan
+            }
+        summary['count'] += 1
+        summary['total_ms'] += entry['duration_ms']
+        summary['max_ms'] = max(summary['max_ms'], entry['duration_ms'])
+        key = endpoint or 'sin petición'
+        summary['endpoints'][key] = summary['endpoints'].get(key, 0) + 1
+        summary['last_seen'] = entry['timestamp']
+
+    if logger.handlers:
+        logger.warning(json.dumps(entry, ensure_ascii=False, default=str))
+
+
+def get_recent(limit=50):
+    """Últimas consultas lentas registradas en este proceso (más recientes primero)"""
+    with _lock:
+        return list(reversed(_recent))[:limit]
+
+
+def get_summary(limit=20):
+    """Formas de sentencia lentas agregadas, ordenadas por tiempo total"""
+    with _lock:
+        summaries = [dict(s, total_ms=round(s['total_ms'], 2)) for s in _by_shape.values()]
+    summaries.sort(key=lambda s: s['total_ms'], reverse=True)
+    return summaries[:limit]
+
+
+def clear():
+    """Vaciar los registros en memoria y la caché de planes"""
+    with _lock:
+        _recent.clear()
+        _by_shape.clear()
+        _plans.clear()
+
+
+def get_settings():
+    return {
+        'enabled': _settings['enabled'],
+        'threshold_ms': round(_settings['threshold'] * 1000, 2),
+        'explain': _settings['explain']
+    }
+
+
+def init_slow_query_log(app):
+    """Activar el registro de consultas lentas según la configuración"""
+    _settings['enabled'] = app.config.get('SLOW_QUERY_LOG_ENABLED', True)
+    _settings['threshold'] = app.config.get('SLOW_QUERY_THRESHOLD_MS', 100) / 1000.0
+    _settings['explain'] = app.config.get('SLOW_QUERY_EXPLAIN', True)
+    if not _settings['enabled']:
+        return
+
+    log_file = app.config.get('SLOW_QUERY_LOG_FILE')
+    if log_file:
+        path = os.path.abspath(log_file)
+        if not any(getattr(h, 'baseFilename', None) == path for h in logger.handlers):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = RotatingFileHandler(
+                path,
+                maxBytes=app.config.get('SLOW_QUERY_LOG_MAX_BYTES', 10240000),
+                backupCount=app.config.get('SLOW_QUERY_LOG_BACKUPS', 5)
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+        logger.setLevel(logging.WARNING)
+        logger.propagate = False
+
+    add_statement_listener(_on_statement)
@@ -0,0 +1,253 @@
+"""
+Índice en memoria de participantes que ya votaron (bitmap por id).
+
+Dos mapas de bits sobre bytearray, indexados por Participant.id: uno de
+participantes existentes y otro de los que votaron (has_voted). Con un millón
+de participantes ocupan ~250 KB y responden conteo, pertenencia e iteración
+sobre pendientes (recordatorios) sin recorrer tablas.
+
+Se construye con una sola consulta (al arrancar si VOTER_INDEX_PRELOAD) y se
+mantiene así:
+
+- Los votos confirmados en este proceso marcan al participante al instante
+  (after_commit).
+- Los de otros workers se incorporan al leer, como mucho cada
+  VOTER_INDEX_SYNC_INTERVAL segundos y solo si cambió la versión de datos:
+  participantes y votos con id mayor al último visto (consultas por clave
+  primaria).
+- Si tras un cambio de versión los conteos no coinciden con los contadores
+  de participación (bajas, cierre de ronda en otro worker, cargas masivas)
+  se reconstruye completo en ese mismo sync.
+- El cierre de una ronda en este proceso vacía los votantes al instante
+  (RoundService._reset_has_voted).
+"""
+
+from flask import current_app, has_app_context
+from app.extensions import db
+from app.models import Participant, Vote
+from app.services.counter_service import CounterService, DATA_VERSION, PARTICIPANTS_TOTAL, PARTICIPANTS_VOTED
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+import threading
+import time
+
+
+class Bitmap:
+    """Conjunto de enteros no negativos sobre un bytearray (bit i -> byte i // 8)"""
+
+    __slots__ = ('bits', 'count')
+
+    def __init__(self, size=0):
+        self.bits = bytearray((size >> 3) + 1)
+        self.count = 0
+
+    def _grow(self, index):
+        needed = (index >> 3) + 1
+        if needed > len(self.bits):
+            # Crecimiento geométrico: pocas copias al registrarse participantes nuevos
+            self.bits.extend(bytes(max(needed, len(self.bits) * 2) - len(self.bits)))
+
+    def add(self, index):
+        self._grow(index)
+        mask = 1 << (index & 7)
+        if not self.bits[index >> 3] & mask:
+            self.bits[index >> 3] |= mask
+            self.count += 1
+
+    def discard(self, index):
+        byte = index >> 3
+        if byte < len(self.bits) and self.bits[byte] & (1 << (index & 7)):
+            self.bits[byte] &= ~(1 << (index & 7)) & 0xff
+            self.count -= 1
+
+    def __contains__(self, index):
+        byte = index >> 3
+        return byte < len(self.bits) and bool(self.bits[byte] & (1 << (index & 7)))
+
+    def __len__(self):
+        return self.count
+
+
+class VoterIndex:
+    """Participantes existentes y votantes de un proceso"""
+
+    def __init__(self, sync_interval=1.0):
+        self.sync_interval = sync_interval
+        self.members = Bitmap()
+        self.voted = Bitmap()
+        self.loaded = False
+        self.data_version = None
+        self.last_participant_id = 0
+        self.last_vote_id = 0
+        self.last_sync = 0.0
+        self.rebuilds = 0
+        self._lock = threading.RLock()
+
+    def rebuild(self):
+        """Construir los bitmaps desde participants con una sola consulta"""
+        with self._lock:
+            version = CounterService.get(DATA_VERSION)
+            last_vote_id = db.session.query(func.max(Vote.id)).scalar() or 0
+            members = Bitmap(self.last_participant_id)
+            voted = Bitmap(self.last_participant_id)
+            last_participant_id = 0
+
+            participants = Participant.__table__
+            result = db.session.execute(
+                select(participants.c.id, participants.c.has_voted).execution_options(yield_per=10000)
+            )
+            for participant_id, has_voted in result:
+                members.add(participant_id)
+                if has_voted:
+                    voted.add(participant_id)
+                last_participant_id = max(last_participant_id, participant_id)
+
+            self.members, self.voted = members, voted
+            self.last_participant_id = last_participant_id
+            self.last_vote_id = last_vote_id
+            self.data_version = version
+            self.last_sync = time.monotonic()
+            self.loaded = True
+            self.rebuilds += 1
+
+    def sync(self, force=False):
+        """Incorporar cambios de otros procesos (ver docstring del módulo)"""
+        if not self.loaded:
+            self.rebuild()
+            return
+        if not force and time.monotonic() - self.last_sync < self.sync_interval:
+            return
+
+        with self._lock:
+            counters = CounterService.get_many((DATA_VERSION, PARTICIPANTS_TOTAL, PARTICIPANTS_VOTED))
+            self.last_sync = time.monotonic()
+            if counters[DATA_VERSION] == self.data_version:
+                return
+
+            new_participants = db.session.query(Participant.id, Participant.has_voted).filter(
+                Participant.id > self.last_participant_id
+            ).all()
+            for participant_id, has_voted in new_participants:
+                self.members.add(participant_id)
+                if has_voted:
+                    self.voted.add(participant_id)
+                self.last_participant_id = max(self.last_participant_id, participant_id)
+
+            new_votes = db.session.query(Vote.participant_id, func.max(Vote.id)).filter(
+                Vote.id > self.last_vote_id
+            ).group_by(Vote.participant_id).all()
+            for participant_id, vote_id in new_votes:
+                self.voted.add(participant_id)
+                self.last_vote_id = max(self.last_vote_id, vote_id)
+
+            if (len(self.members) != counters[PARTICIPANTS_TOTAL]
+                    or len(self.voted) != counters[PARTICIPANTS_VOTED]):
+                # Cambios que los ids no revelan: reconstruir ya, no servir un índice viejo
+                current_app.logger.info(
+                    f'Índice de votantes desincronizado ({len(self.voted)}/{len(self.members)} vs '
+                    f'{counters[PARTICIPANTS_VOTED]}/{counters[PARTICIPANTS_TOTAL]}): reconstruyendo'
+                )
+                self.rebuild()
+                return
+
+            self.data_version = counters[DATA_VERSION]
+
+    def mark_voted(self, participant_ids):
+        with self._lock:
+            for participant_id in participant_ids:
+                self.members.add(participant_id)
+                self.voted.add(participant_id)
+
+    def clear_voted(self):
+        """Nadie ha votado (cierre de ronda): los ids de votes vuelven a empezar"""
+        with self._lock:
+            self.voted = Bitmap(self.last_participant_id)
+            self.last_vote_id = 0
+
+    def has_voted(self, participant_id):
+        self.sync()
+        return participant_id in self.voted
+
+    def counts(self):
+        """Dict con total, voted y pending"""
+        self.sync()
+        total, voted = len(self.members), len(self.voted)
+        return {'total': total, 'voted': voted, 'pending': total - voted}
+
+    def iter_pending(self, chunk_size=1000, after=0):
+        """
+        Ids de participantes que no han votado, en orden, por bloques.
+
+        Args:
+            chunk_size: Ids por bloque
+            after: Empezar después de este id
+
+        Yields:
+            Listas de hasta chunk_size ids
+        """
+        self.sync()
+        members, voted = self.members.bits, self.voted.bits
+        chunk = []
+        start = (after + 1) >> 3
+        for byte in range(start, len(members)):
+            pending = members[byte] & ~(voted[byte] if byte < len(voted) else 0)
+            if not pending:
+                continue
+            base = byte << 3
+            for bit in range(8):
+                if pending & (1 << bit) and base + bit > after:
+                    chunk.append(base + bit)
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
+        if chunk:
+            yield chunk
+
+    def get_stats(self):
+        return {
+            'loaded': self.loaded,
+            'participants': len(self.members),
+            'voted': len(self.voted),
+            'bytes': len(self.members.bits) + len(self.voted.bits),
+            'rebuilds': self.rebuilds
+        }
+
+
+def get_voter_index():
+    return current_app.extensions['voter_index']
+
+
+def init_voter_index(app):
+    """Registrar el índice de votantes; con VOTER_INDEX_PRELOAD se construye ya"""
+    index = app.extensions['voter_index'] = VoterIndex(app.config.get('VOTER_INDEX_SYNC_INTERVAL', 1.0))
+
+    if app.config.get('VOTER_INDEX_PRELOAD', True):
+        with app.app_context():
+            try:
+                index.rebuild()
+            except Exception as e:
+                # Esquema aún sin migrar: se construirá en el primer uso
+                db.session.rollback()
+                app.logger.warning(f'Índice de votantes no precargado: {e}')
+
+
+# Votos confirmados en este proceso: marcar al participante sin esperar a sync()
+@event.listens_for(Session, 'after_flush')
+def _collect_voters(session, flush_context):
+    voters = {obj.participant_id for obj in session.new if isinstance(obj, Vote)}
+    if voters:
+        session.info.setdefault('voter_index_voters', set()).update(voters)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_voters(session):
+    voters = session.info.pop('voter_index_voters', None)
+    if voters and has_app_context() and 'voter_index' in current_app.extensions:
+        index = current_app.extensions['voter_index']
+        if index.loaded:
+            index.mark_voted(voters)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_voters(session, previous_transaction):
+    session.info.pop('voter_index_voters', None)
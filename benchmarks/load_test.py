@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+"""
+Generador de carga concurrente contra una instancia en ejecución
+
+Simula N participantes que siguen el flujo de unified.js / voting.js
+(verificar email → registro → login → papeleta → envío de votos) mientras M
+espectadores consultan periódicamente los resultados (resumen y estadísticas).
+Solo usa la biblioteca estándar (hilos + http.client con conexiones keep-alive).
+
+Los participantes arrancan repartidos linealmente durante --ramp-up segundos;
+--concurrency limita cuántos flujos de votante corren a la vez.
+
+Reporta por paso: peticiones, errores, tasa de error, throughput y latencia
+p50 / p95 / p99 (ms). Opcionalmente guarda el reporte en JSON.
+
+Uso:
+    python run.py &
+    python benchmarks/load_test.py --url http://localhost:5000 --voters 200 \\
+        --viewers 20 --concurrency 50 --ramp-up 30 --output load.json
+"""
+
+import argparse
+import http.client
+import json
+import math
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+
+VOTER_STEPS = ('check_email', 'register', 'login', 'ballot_fetch', 'vote_submit')
+VIEWER_STEPS = ('results_summary', 'results_statistics')
+PASSWORD = 'Carga12345'
+
+
+class StepRecorder:
+    """Latencias y resultados por paso, compartidos entre hilos"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, step, elapsed, error=None):
+        with self.lock:
+            self.latencies.setdefault(step, []).append(elapsed)
+            if error is not None:
+                self.errors.setdefault(step, Counter())[error] += 1
+
+    def report(self, wall_seconds):
+        results = {}
+        for step in VOTER_STEPS + VIEWER_STEPS:
+            timings = sorted(self.latencies.get(step, []))
+            if not timings:
+                continue
+            errors = self.errors.get(step, Counter())
+            error_count = sum(errors.values())
+            results[step] = {
+                'requests': len(timings),
+                'errors': error_count,
+                'error_rate': round(error_count / len(timings) * 100, 2),
+                'throughput_rps': round(len(timings) / wall_seconds, 2) if wall_seconds else 0.0,
+                'p50_ms': round(percentile(timings, 50) * 1000, 2),
+                'p95_ms': round(percentile(timings, 95) * 1000, 2),
+                'p99_ms': round(percentile(timings, 99) * 1000, 2),
+                'max_ms': round(timings[-1] * 1000, 2),
+                'error_kinds': dict(errors)
+            }
+        return results
+
+
+def percentile(sorted_values, pct):
+    """Percentil por rango más cercano sobre una lista ordenada"""
+    index = max(math.ceil(len(sorted_values) * pct / 100.0) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+class HttpClient:
+    """Cliente HTTP con una conexión keep-alive por hilo"""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or 'http'
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            factory = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+            conn = self.local.conn = factory(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def _reset(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+        self.local.conn = None
+
+    def request(self, method, path, payload=None, token=None):
+        """
+        Ejecutar una petición
+
+        Returns:
+            Tupla (status, cuerpo JSON o None)
+        """
+        headers = {'Accept': 'application/json'}
+        body = None
+        if payload is not None:
+            body = json.dumps(payload).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+
+        # Un reintento si el servidor cerró la conexión keep-alive reutilizada
+        for attempt in (1, 2):
+            conn = self._connection()
+            try:
+                conn.request(method, self.prefix + path, body=body, headers=headers)
+                response = conn.getresponse()
+                raw = response.read()
+                break
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self._reset()
+                if attempt == 2:
+                    raise
+            except Exception:
+                self._reset()
+                raise
+
+        if response.will_close:
+            self._reset()
+
+        try:
+            data = json.loads(raw) if raw else None
+        except ValueError:
+            data = None
+        return response.status, data
+
+
+class LoadTest:
+    """Orquestación de votantes y espectadores"""
+
+    def __init__(self, args):
+        self.args = args
+        self.client = HttpClient(args.url, args.timeout)
+        self.recorder = StepRecorder()
+        self.run_id = uuid.uuid4().hex[:8]
+        self.voters_done = threading.Event()
+        self.completed_voters = 0
+        self.completed_lock = threading.Lock()
+
+    def call(self, step, method, path, payload=None, token=None, expected=(200, 201)):
+        """Ejecutar un paso registrando su latencia; retorna el JSON o None si falló"""
+        started = time.perf_counter()
+        error = None
+        data = None
+        try:
+            status, data = self.client.request(method, path, payload, token)
+            if status not in expected:
+                error = f'HTTP {status}'
+        except Exception as e:
+            error = type(e).__name__
+        self.recorder.record(step, time.perf_counter() - started, error)
+        return None if error else (data or {})
+
+    def build_ballot(self, surveys, rng):
+        """Elegir un candidato al azar por posición, como lo haría un votante"""
+        votes = {}
+        for survey in surveys[:1]:
+            for position in survey.get('positions', []):
+                candidates = position.get('candidates') or []
+                if candidates:
+                    votes[str(position['id'])] = {'type': 'candidate', 'candidate_id': rng.choice(candidates)['id']}
+                else:
+                    votes[str(position['id'])] = {'type': 'blanco'}
+        return votes
+
+    def voter(self, index):
+        """Flujo completo de un participante"""
+        rng = random.Random(f'{self.args.seed}-{index}')
+        email = f'carga-{self.run_id}-{index}@ejemplo.com'
+
+        try:
+            if self.call('check_email', 'POST', '/api/participant-auth/check-email', {'email': email}) is None:
+                return
+
+            registered = self.call('register', 'POST', '/api/participant-auth/register', {
+                'email': email,
+                'first_name': 'Carga',
+                'last_name': f'Votante{index}',
+                'password': PASSWORD,
+                'password_confirm': PASSWORD
+            })
+            if registered is None:
+                return
+
+            self.think(rng)
+            login = self.call('login', 'POST', '/api/participant-auth/login', {'email': email, 'password': PASSWORD})
+            if not login or not login.get('access_token'):
+                return
+            token = login['access_token']
+
+            ballot = self.call('ballot_fetch', 'GET', '/api/voting/active-surveys', token=token)
+            if ballot is None:
+                return
+
+            votes = self.build_ballot(ballot.get('surveys', []), rng)
+            if not votes:
+                return
+
+            self.think(rng)
+            self.call('vote_submit', 'POST', '/api/voting/submit-votes', {'votes': votes}, token=token)
+        finally:
+            with self.completed_lock:
+                self.completed_voters += 1
+
+    def viewer(self, index):
+        """Espectador que consulta los resultados hasta que terminan los votantes"""
+        rng = random.Random(f'{self.args.seed}-viewer-{index}')
+        # Desfase inicial para no sincronizar todas las consultas
+        if self.voters_done.wait(rng.uniform(0, self.args.poll_interval)):
+            return
+        while not self.voters_done.is_set():
+            self.call('results_summary', 'GET', '/api/results/summary')
+            self.call('results_statistics', 'GET', '/api/results/statistics')
+            self.voters_done.wait(self.args.poll_interval)
+
+    def think(self, rng):
+        if self.args.think_time:
+            time.sleep(rng.uniform(0, self.args.think_time))
+
+    def run(self):
+        args = self.args
+        viewers = [threading.Thread(target=self.viewer, args=(i,), daemon=True) for i in range(args.viewers)]
+        for thread in viewers:
+            thread.start()
+
+        started = time.perf_counter()
+        progress_at = started
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            futures = []
+            for index in range(args.voters):
+                # Rampa lineal: el votante i arranca en ramp_up * i / N
+                delay = started + args.ramp_up * index / max(args.voters, 1) - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(pool.submit(self.voter, index))
+
+                if args.progress and time.perf_counter() - progress_at >= args.progress:
+                    progress_at = time.perf_counter()
+                    print(f'  {progress_at - started:7.1f} s  lanzados {index + 1}/{args.voters}  '
+                          f'completados {self.completed_voters}')
+
+            for future in futures:
+                future.result()
+
+        wall_seconds = time.perf_counter() - started
+        self.voters_done.set()
+        for thread in viewers:
+            thread.join(timeout=args.timeout)
+
+        return {
+            'meta': {
+                'generated_at': datetime.utcnow().isoformat(),
+                'url': args.url,
+                'run_id': self.run_id,
+                'voters': args.voters,
+                'viewers': args.viewers,
+                'concurrency': args.concurrency,
+                'ramp_up_seconds': args.ramp_up,
+                'think_time_seconds': args.think_time,
+                'poll_interval_seconds': args.poll_interval,
+                'wall_seconds': round(wall_seconds, 2)
+            },
+            'results': self.recorder.report(wall_seconds)
+        }
+
+
+def print_report(report):
+    meta = report['meta']
+    print(f"Duración: {meta['wall_seconds']} s  votantes {meta['voters']}  espectadores {meta['viewers']}")
+    print(f"  {'paso':20} {'peticiones':>10} {'errores':>8} {'%error':>7} {'req/s':>8} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for step, result in report['results'].items():
+        print(f"  {step:20} {result['requests']:10} {result['errors']:8} {result['error_rate']:7.2f} "
+              f"{result['throughput_rps']:8.2f} {result['p50_ms']:9.2f} {result['p95_ms']:9.2f} "
+              f"{result['p99_ms']:9.2f}")
+        if result['error_kinds']:
+            kinds = ', '.join(f'{kind} x{count}' for kind, count in result['error_kinds'].items())
+            print(f"  {'':20} errores: {kinds}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generador de carga de votantes y espectadores')
+    parser.add_argument('--url', default='http://localhost:5000', help='URL base de la instancia')
+    parser.add_argument('--voters', type=int, default=100, help='Participantes que registran y votan')
+    parser.add_argument('--viewers', type=int, default=10, help='Espectadores que consultan resultados')
+    parser.add_argument('--concurrency', type=int, default=20, help='Flujos de votante simultáneos')
+    parser.add_argument('--ramp-up', type=float, default=10.0, help='Segundos para lanzar a todos los votantes')
+    parser.add_argument('--think-time', type=float, default=0.0, help='Pausa máxima aleatoria entre pasos (s)')
+    parser.add_argument('--poll-interval', type=float, default=2.0, help='Intervalo de consulta de espectadores (s)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Timeout por petición (s)')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla para elecciones reproducibles')
+    parser.add_argument('--progress', type=float, default=5.0, help='Segundos entre reportes de avance (0 = sin avance)')
+    parser.add_argument('--output', help='Archivo JSON donde guardar el reporte')
+    parser.add_argument('--max-error-rate', type=float, help='Salir con error si algún paso supera este % de errores')
+    args = parser.parse_args()
+
+    print(f'Carga contra {args.url}: {args.voters} votantes (concurrencia {args.concurrency}, '
+          f'rampa {args.ramp_up} s) y {args.viewers} espectadores')
+    report = LoadTest(args).run()
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'✓ Reporte guardado en {args.output}')
+
+    if args.max_error_rate is not None:
+        failing = [step for step, r in report['results'].items() if r['error_rate'] > args.max_error_rate]
+        if failing:
+            print(f"✗ Tasa de error superior a {args.max_error_rate}% en: {', '.join(failing)}")
+            sys.exit(1)
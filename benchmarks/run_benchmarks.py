@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+"""
+Benchmarks reproducibles de los endpoints más usados
+
+Usa create_app('testing') y el test client de Flask (sin servidor) sobre un
+conjunto de datos sembrado con SeedService (tamaño configurable). Para cada paso mide la
+latencia (min / mediana / p95 / media), las consultas SQL por petición y el
+pico de memoria, y guarda el resultado en JSON.
+
+Uso:
+    python benchmarks/run_benchmarks.py --participants 5000 --positions 10 \\
+        --candidates 5 --votes 20000 --iterations 20 --output bench.json
+    python benchmarks/run_benchmarks.py --compare bench_anterior.json --max-regression 20
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.query_tracker import count_queries
+from app.services.seed_service import SeedService, LAST_NAMES
+
+def measure(name, func, iterations):
+    """Ejecutar una función varias veces midiendo latencia, consultas y memoria"""
+    timings = []
+    queries = []
+    statuses = set()
+
+    for i in range(iterations):
+        with count_queries() as stats:
+            started = time.perf_counter()
+            response = func(i)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(stats.count)
+        statuses.add(response.status_code)
+
+    # Memoria en una ejecución aparte para no distorsionar las latencias
+    tracemalloc.start()
+    func(iterations)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    p95_index = max(int(round(len(timings) * 0.95)) - 1, 0)
+    result = {
+        'iterations': iterations,
+        'min_ms': round(timings[0], 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[p95_index], 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'queries_per_request': round(statistics.mean(queries), 1),
+        'peak_memory_kb': round(peak / 1024, 1),
+        'status_codes': sorted(statuses)
+    }
+    print(f"  {name:22} mediana {result['median_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms  "
+          f"consultas {result['queries_per_request']:6.1f}  memoria {result['peak_memory_kb']:9.1f} KB  "
+          f"status {result['status_codes']}")
+    return result
+
+
+def run(args):
+    app = create_app('testing')
+    app.logger.setLevel('ERROR')
+    client = app.test_client()
+
+    with app.app_context():
+        print(f"Sembrando datos: {args.participants} participantes, {args.positions} posiciones, "
+              f"{args.candidates} candidatos/posición, {args.votes} votos...")
+        started = time.perf_counter()
+        report = SeedService.seed(
+            participants=args.participants, positions=args.positions, candidates=args.candidates,
+            votes=args.votes, audit=False, chunk_size=5000, seed_value=args.seed
+        )
+        pending_users = report['pending_user_ids']
+        seed_seconds = time.perf_counter() - started
+        print(f"  listo en {seed_seconds:.1f} s")
+
+        admin_token = create_access_token(identity='1')
+        voter_tokens = [create_access_token(identity=str(uid)) for uid in pending_users[:args.iterations + 1]]
+        ballot_token = create_access_token(identity=str(pending_users[0] if pending_users else 1))
+
+    admin = {'Authorization': f'Bearer {admin_token}'}
+    ballot_votes = {
+        str(p): {'type': 'candidate', 'candidate_id': (p - 1) * args.candidates + 1} if args.candidates
+        else {'type': 'blanco'}
+        for p in range(1, args.positions + 1)
+    }
+
+    def submit(i):
+        # Cada iteración usa un participante distinto que aún no ha votado
+        if i >= len(voter_tokens):
+            raise SystemExit('No hay suficientes participantes sin votar para el paso submit')
+        return client.post('/api/voting/submit-votes', json={'votes': ballot_votes},
+                           headers={'Authorization': f'Bearer {voter_tokens[i]}'})
+
+    steps = {
+        'ballot_fetch': lambda i: client.get('/api/voting/active-surveys',
+                                             headers={'Authorization': f'Bearer {ballot_token}'}),
+        'vote_submit': submit,
+        'results_summary': lambda i: client.get('/api/results/summary'),
+        'statistics': lambda i: client.get('/api/results/statistics'),
+        'participant_stats': lambda i: client.get('/api/participants/stats'),
+        'timeline': lambda i: client.get('/api/results/timeline'),
+        'csv_export': lambda i: client.get('/api/voting/results/export-csv', headers=admin),
+        'participant_search': lambda i: client.get('/api/participants', headers=admin,
+                                                   query_string={'search': LAST_NAMES[i % len(LAST_NAMES)]}),
+    }
+
+    selected = args.steps.split(',') if args.steps else list(steps)
+    print(f"Ejecutando {args.iterations} iteraciones por paso:")
+    results = {name: measure(name, steps[name], args.iterations) for name in selected}
+
+    return {
+        'meta': {
+            'generated_at': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'dataset': {
+                'participants': args.participants,
+                'positions': args.positions,
+                'candidates_per_position': args.candidates,
+                'votes': args.votes,
+                'seed': args.seed
+            },
+            'seed_seconds': round(seed_seconds, 2)
+        },
+        'results': results
+    }
+
+
+def compare(current, baseline_path, max_regression):
+    """Comparar medianas con un archivo anterior; retorna la lista de regresiones"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+
+    regressions = []
+    for name, result in current['results'].items():
+        previous = baseline.get(name)
+        if not previous or not previous['median_ms']:
+            continue
+        change = (result['median_ms'] - previous['median_ms']) / previous['median_ms'] * 100
+        query_change = result['queries_per_request'] - previous['queries_per_request']
+        print(f"  {name:22} {previous['median_ms']:9.2f} -> {result['median_ms']:9.2f} ms ({change:+.1f}%)  "
+              f"consultas {query_change:+.1f}")
+        if change > max_regression or query_change > 0:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks de endpoints del sistema de votación')
+    parser.add_argument('--participants', type=int, default=2000)
+    parser.add_argument('--positions', type=int, default=8)
+    parser.add_argument('--candidates', type=int, default=4, help='Candidatos por posición')
+    parser.add_argument('--votes', type=int, default=8000)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42, help='Semilla para datos reproducibles')
+    parser.add_argument('--steps', help='Pasos separados por coma (por defecto todos)')
+    parser.add_argument('--output', default='bench_output.json', help='Archivo JSON de resultados')
+    parser.add_argument('--compare', help='JSON de una ejecución anterior para detectar regresiones')
+    parser.add_argument('--max-regression', type=float, default=20.0, help='Porcentaje tolerado en la mediana')
+    args = parser.parse_args()
+
+    report = run(args)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Resultados guardados en {args.output}")
+
+    if args.compare:
+        print(f"Comparando con {args.compare}:")
+        regressions = compare(report, args.compare, args.max_regression)
+        if regressions:
+            print(f"✗ Regresiones en: {', '.join(regressions)}")
+            sys.exit(1)
+        print("✓ Sin regresiones")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""
+Benchmark de arranque de la aplicación
+
+Mide, en procesos nuevos (como un worker que reinicia), el tiempo de importar
+el paquete app, el de create_app() y las sentencias SQL ejecutadas durante
+create_app() sobre una base ya inicializada. Guarda el resultado en JSON y
+puede compararlo con una ejecución anterior.
+
+Uso:
+    python benchmarks/startup_benchmark.py --runs 10 --output startup.json
+    python benchmarks/startup_benchmark.py --compare startup_anterior.json --max-regression 20
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Código del proceso hijo: mide import + create_app en modo producción
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from app.query_tracker import count_queries
+from app import create_app
+imported = time.perf_counter()
+with count_queries() as stats:
+    create_app('production')
+created = time.perf_counter()
+heavy = [m for m in ('flask_mail', 'cProfile', 'pstats') if m in sys.modules]
+print(json.dumps({'import_ms': (imported - started) * 1000, 'create_ms': (created - imported) * 1000,
+                  'statements': stats.count, 'heavy_modules': heavy}))
+"""
+
+
+def run_child(env):
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix='startup_bench_')
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        'LOG_FILE': os.path.join(workdir, 'app.log'),
+        'SLOW_QUERY_LOG_FILE': os.path.join(workdir, 'slow_queries.log'),
+        'PYTHONPATH': ROOT
+    })
+
+    # Base inicializada una vez (como tras "python manage.py init")
+    subprocess.run([sys.executable, 'manage.py', 'init'], cwd=ROOT, env=env,
+                   capture_output=True, text=True, check=True)
+    run_child(env)  # calentar la caché de bytecode
+
+    samples = [run_child(env) for _ in range(args.runs)]
+    result = {
+        'runs': args.runs,
+        'import_ms': round(statistics.median(s['import_ms'] for s in samples), 2),
+        'create_app_ms': round(statistics.median(s['create_ms'] for s in samples), 2),
+        'total_ms': round(statistics.median(s['import_ms'] + s['create_ms'] for s in samples), 2),
+        'statements': max(s['statements'] for s in samples),
+        'heavy_modules': samples[-1]['heavy_modules']
+    }
+    print(f"  import {result['import_ms']:8.2f} ms  create_app {result['create_app_ms']:8.2f} ms  "
+          f"total {result['total_ms']:8.2f} ms  sentencias SQL {result['statements']}  "
+          f"módulos pesados cargados {result['heavy_modules'] or 'ninguno'}")
+
+    return {
+        'meta': {
+            'generated_at': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform()
+        },
+        'results': {'startup': result}
+    }
+
+
+def compare(current, baseline_path, max_regression):
+    """Comparar con un archivo anterior; retorna la lista de regresiones"""
+    with open(baseline_path) as f:
+        previous = json.load(f)['results']['startup']
+    result = current['results']['startup']
+
+    regressions = []
+    change = (result['total_ms'] - previous['total_ms']) / previous['total_ms'] * 100
+    print(f"  total {previous['total_ms']:8.2f} -> {result['total_ms']:8.2f} ms ({change:+.1f}%)  "
+          f"sentencias {previous['statements']} -> {result['statements']}")
+    if change > max_regression:
+        regressions.append('total_ms')
+    if result['statements'] > previous['statements']:
+        regressions.append('statements')
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark de arranque de la aplicación')
+    parser.add_argument('--runs', type=int, default=10, help='Procesos nuevos a medir')
+    parser.add_argument('--output', default='startup_output.json', help='Archivo JSON de resultados')
+    parser.add_argument('--compare', help='JSON de una ejecución anterior para detectar regresiones')
+    parser.add_argument('--max-regression', type=float, default=20.0, help='Porcentaje tolerado en el tiempo total')
+    args = parser.parse_args()
+
+    print(f"Midiendo el arranque en {args.runs} procesos nuevos...")
+    report = run(args)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Resultados guardados en {args.output}")
+
+    if args.compare:
+        print(f"Comparando con {args.compare}:")
+        regressions = compare(report, args.compare, args.max_regression)
+        if regressions:
+            print(f"✗ Regresiones en: {', '.join(regressions)}")
+            sys.exit(1)
+        print("✓ Sin regresiones")
@@ -14,6 +14,11 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Réplica de solo lectura para resultados y reportes (rutas @read_only)
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG') or 5)  # Segundos; por encima se lee de la principal
+    REPLICA_CHECK_INTERVAL = 1.0  # Segundos entre mediciones del retraso
+    
     # JWT
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'dev-secret-key-change-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
@@ -35,14 +40,97 @@ class Config:
     # Upload
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
     
+    # Fotos de candidatos (almacén por hash de contenido)
+    PHOTO_STORAGE_DIR = os.environ.get('PHOTO_STORAGE_DIR', 'instance/photos')
+    PHOTO_MAX_AGE = 31536000  # Un año: el nombre cambia si cambia la foto
+    # Envío sin copia por un proxy: prefijo de una location "internal" de nginx
+    # que apunte a PHOTO_STORAGE_DIR (X-Accel-Redirect); USE_X_SENDFILE para Apache/lighttpd
+    PHOTO_X_ACCEL_REDIRECT = os.environ.get('PHOTO_X_ACCEL_REDIRECT')
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', 'false').lower() == 'true'
+    
+    # Reporte PDF de resultados (generado en segundo plano, cacheado por versión de datos)
+    REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR', 'instance/reports')
+    REPORT_PDF_WAIT = 10  # Segundos que espera la petición antes de responder 202
+    REPORT_PDF_KEEP = 3  # Versiones que se conservan en disco
+    REPORT_PDF_BATCH_SIZE = 50  # Posiciones por consulta al generar
+    REPORT_XLSX_WINDOW = 5000  # Votos por consulta al exportar a Excel
+    
+    # Snapshots de resultados públicos publicados al cerrar una ronda
+    RESULTS_SNAPSHOT_DIR = os.environ.get('RESULTS_SNAPSHOT_DIR', 'instance/snapshots')
+    RESULTS_SNAPSHOT_HTML = True  # Generar también una página HTML estática
+    RESULTS_PUBLISH_ON_CLOSE = os.environ.get('RESULTS_PUBLISH_ON_CLOSE', 'false').lower() == 'true'
+    RESULTS_SNAPSHOT_MAX_AGE = 300  # /api/results/*: la URL no cambia entre rondas
+    RESULTS_SNAPSHOT_IMMUTABLE_MAX_AGE = 31536000  # /results/snapshots/<versión>/...
+    
+    # Esquema: crear/migrar automáticamente al arrancar (solo desarrollo y testing;
+    # en producción usar "python manage.py migrate")
+    AUTO_INIT_DB = False
+    
     # Logging
-    LOG_FILE = 'logs/app.log'
+    LOG_FILE = os.environ.get('LOG_FILE', 'logs/app.log')
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_MODULE_LEVELS = os.environ.get('LOG_MODULE_LEVELS', '')  # p. ej. 'voting_participant=DEBUG'
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')  # 'json' o 'text'
+    LOG_REQUESTS = os.environ.get('LOG_REQUESTS', 'true').lower() == 'true'  # Una línea por petición
+    LOG_QUEUE_SIZE = 10000  # Registros en espera; si se llena se descartan
+    
+    # Métricas (/metrics en formato Prometheus)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_DIR = os.environ.get('METRICS_DIR')  # Directorio compartido entre workers
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # Bearer token opcional para /metrics
+    
+    # Conteo de consultas SQL por petición
+    QUERY_DEBUG_HEADERS = False  # Cabeceras X-Query-Count / Server-Timing
+    QUERY_REPEAT_THRESHOLD = int(os.environ.get('QUERY_REPEAT_THRESHOLD', 10))  # Aviso de N+1
+    
+    # Registro de consultas lentas (con EXPLAIN del plan)
+    SLOW_QUERY_LOG_ENABLED = os.environ.get('SLOW_QUERY_LOG_ENABLED', 'true').lower() == 'true'
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+    SLOW_QUERY_EXPLAIN = True
+    SLOW_QUERY_LOG_FILE = os.environ.get('SLOW_QUERY_LOG_FILE', 'logs/slow_queries.log')
+    SLOW_QUERY_LOG_MAX_BYTES = 10240000
+    SLOW_QUERY_LOG_BACKUPS = 5
+    
+    # Rondas de votación: votos movidos al archivo por lote al cerrar una ronda
+    ROUND_ARCHIVE_CHUNK_SIZE = int(os.environ.get('ROUND_ARCHIVE_CHUNK_SIZE', 5000))
+    
+    # Assets estáticos con huella y variantes .gz ("python manage.py assets")
+    ASSETS_FINGERPRINT = os.environ.get('ASSETS_FINGERPRINT', 'true').lower() == 'true'
+    ASSETS_AUTO_BUILD = True  # Reconstruir al arrancar si cambió algún fuente
+    ASSETS_DIR = os.environ.get('ASSETS_DIR')  # Por defecto app/static/dist
+    ASSETS_EXTENSIONS = ('.js', '.css')
+    ASSETS_MAX_AGE = 31536000  # Un año (URLs immutable)
+    
+    # Compresión de respuestas según Accept-Encoding
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))  # Bytes
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 5))  # 1 (rápido) a 9 (máximo)
+    COMPRESS_ALGORITHMS = ('gzip', 'deflate')  # En orden de preferencia
+    COMPRESS_STREAMS = True  # Comprimir por partes las respuestas en streaming
+    COMPRESS_MIMETYPES = (
+        'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+        'application/javascript', 'application/json', 'application/xml', 'image/svg+xml'
+    )
+    
+    # Páginas HTML públicas renderizadas una vez por proceso (ETag / 304)
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'true').lower() == 'true'
+    
+    # Índice en memoria de votantes (bitmap por id de participante)
+    VOTER_INDEX_PRELOAD = os.environ.get('VOTER_INDEX_PRELOAD', 'true').lower() == 'true'
+    VOTER_INDEX_SYNC_INTERVAL = 1.0  # Segundos entre sincronizaciones con otros workers
 
 
 class DevelopmentConfig(Config):
     """Configuración para desarrollo"""
     DEBUG = True
     SESSION_COOKIE_SECURE = False
+    QUERY_DEBUG_HEADERS = True
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG')
+    AUTO_INIT_DB = True
+    # Sin huella: los cambios en JS/CSS se ven sin reiniciar
+    ASSETS_FINGERPRINT = os.environ.get('ASSETS_FINGERPRINT', 'false').lower() == 'true'
+    PAGE_CACHE_ENABLED = False  # Ver los cambios de plantillas sin reiniciar
 
 
 class ProductionConfig(Config):
@@ -55,6 +143,10 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     JWT_SECRET_KEY = 'test-secret-key'
+    QUERY_DEBUG_HEADERS = True
+    SLOW_QUERY_LOG_FILE = None
+    AUTO_INIT_DB = True
+    ASSETS_FINGERPRINT = False
 
 
 # Seleccionar configuración
@@ -7,6 +7,7 @@ Uso: python init_db.py
 
 from app import create_app, db
 from app.models import Position, Candidate, Participant, AdminUser
+from app.migrations import init_database as migrate_database
 from datetime import datetime
 
 def init_database():
@@ -15,21 +16,9 @@ def init_database():
     app = create_app('development')
     
     with app.app_context():
-        # Crear tablas
-        db.create_all()
-        print("✓ Tablas de base de datos creadas")
-        
-        # Crear admin por defecto
-        if AdminUser.query.count() == 0:
-            admin = AdminUser(
-                email='admin@encuestas.com',
-                full_name='Administrador',
-                is_active=True
-            )
-            admin.set_password('admin123')
-            db.session.add(admin)
-            db.session.commit()
-            print("✓ Admin creado: admin@encuestas.com / admin123")
+        # Crear tablas (migraciones) y admin por defecto
+        migrate_database(output=lambda message: print(f"✓ {message}"))
+        print("✓ Esquema de base de datos al día")
         
         # Crear posiciones de ejemplo
         if Position.query.count() == 0:
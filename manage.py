@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+"""
+Comandos de administración de la base de datos
+
+    python manage.py init                  # base nueva: esquema + admin por defecto
+    python manage.py migrate               # aplicar migraciones pendientes
+    python manage.py migrate --keep-columns --batch-size 10000 --vacuum
+    python manage.py version               # versión del esquema y migraciones pendientes
+    python manage.py assets [--clean]      # assets estáticos con huella y .gz
+    python manage.py counters [--fix]      # verificar (y corregir) los contadores de participación
+    python manage.py replicate [--once] [--interval 1] [--delay 0]
+                                           # copiar la base SQLite a la réplica (solo pruebas)
+
+El arranque de la aplicación no crea tablas ni migra (en producción); este
+comando se ejecuta una vez por despliegue, no en cada worker.
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from sqlalchemy import text
+from app import create_app, db
+from app import migrations
+from app.assets import build_assets
+from app.services.counter_service import CounterService
+from config import config
+
+
+def vacuum():
+    """Compactar la base SQLite (p. ej. tras eliminar columnas de votes)"""
+    if db.engine.dialect.name != 'sqlite':
+        print("VACUUM solo aplica a SQLite")
+        return
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        conn.execute(text("VACUUM"))
+    print("✓ VACUUM completado")
+
+
+def assets(clean=False):
+    """Generar los assets con huella (no necesita base de datos)"""
+    settings = config[os.environ.get('FLASK_ENV', 'development')]
+    static_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'static')
+    manifest = build_assets(static_folder, settings.ASSETS_DIR, tuple(settings.ASSETS_EXTENSIONS), clean=clean)
+    for name, entry in sorted(manifest['files'].items()):
+        print(f"  {name} -> {entry['path']}{' (+ .gz)' if entry['gzip'] else ''}")
+    print(f"✓ Assets generados (versión {manifest['version']})")
+
+
+def counters(fix=False):
+    """Comparar los contadores con las tablas; con fix, recalcularlos. Retorna el código de salida"""
+    drift = CounterService.verify()
+    for name, (stored, actual) in sorted(drift.items()):
+        print(f"  {name}: guardado {stored}, real {actual}")
+
+    if not drift:
+        print("✓ Contadores correctos")
+        return 0
+    if fix:
+        CounterService.reconcile()
+        print(f"✓ {len(drift)} contadores corregidos")
+        return 0
+    print(f"✗ {len(drift)} contadores con diferencias (usar --fix para corregirlos)")
+    return 1
+
+
+def replicate(interval=1.0, delay=0.0, once=False):
+    """
+    Sustituto de replicación para pruebas con SQLite: copia la base principal
+    al archivo de REPLICA_DATABASE_URL con la API de backup de sqlite3 (copia
+    consistente, los lectores de la réplica no ven estados intermedios).
+
+    delay simula retraso: la copia se toma y se aplica delay segundos después.
+    """
+    if db.engine.dialect.name != 'sqlite' or 'replica' not in db.engines:
+        print("✗ Requiere SQLite y REPLICA_DATABASE_URL configurada")
+        return 1
+
+    source = db.engine.url.database
+    target = db.engines['replica'].url.database
+    print(f"Replicando {source} -> {target} cada {interval} s (retraso {delay} s)")
+
+    while True:
+        snapshot = sqlite3.connect(':memory:')
+        src = sqlite3.connect(source)
+        try:
+            src.backup(snapshot)
+        finally:
+            src.close()
+
+        if delay:
+            time.sleep(delay)
+
+        dst = sqlite3.connect(target)
+        try:
+            snapshot.backup(dst)
+        finally:
+            dst.close()
+            snapshot.close()
+
+        if once:
+            print("✓ Réplica actualizada")
+            return 0
+        time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Administración de la base de datos')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('init', help='Crear el esquema y el admin por defecto')
+
+    migrate_parser = subparsers.add_parser('migrate', help='Aplicar migraciones pendientes')
+    migrate_parser.add_argument('--batch-size', type=int, default=5000, help='Votos por lote (client_fingerprints)')
+    migrate_parser.add_argument('--keep-columns', action='store_true', help='No eliminar columnas antiguas de votes')
+    migrate_parser.add_argument('--vacuum', action='store_true', help='Compactar la base SQLite al terminar')
+
+    subparsers.add_parser('version', help='Mostrar la versión del esquema')
+
+    assets_parser = subparsers.add_parser('assets', help='Generar assets estáticos con huella y .gz')
+    assets_parser.add_argument('--clean', action='store_true', help='Eliminar archivos de builds anteriores')
+
+    counters_parser = subparsers.add_parser('counters', help='Verificar los contadores de participación')
+    counters_parser.add_argument('--fix', action='store_true', help='Recalcular los contadores con diferencias')
+
+    replicate_parser = subparsers.add_parser('replicate', help='Copiar la base SQLite a la réplica (pruebas)')
+    replicate_parser.add_argument('--interval', type=float, default=1.0, help='Segundos entre copias')
+    replicate_parser.add_argument('--delay', type=float, default=0.0, help='Retraso simulado en segundos')
+    replicate_parser.add_argument('--once', action='store_true', help='Una sola copia')
+    args = parser.parse_args()
+
+    if args.command == 'assets':
+        assets(args.clean)
+        return
+
+    app = create_app(os.environ.get('FLASK_ENV', 'development'))
+
+    with app.app_context():
+        if args.command == 'counters':
+            raise SystemExit(counters(args.fix))
+
+        if args.command == 'replicate':
+            try:
+                raise SystemExit(replicate(args.interval, args.delay, args.once))
+            except KeyboardInterrupt:
+                return
+
+        if args.command == 'version':
+            version = migrations.current_version()
+            print(f"Versión del esquema: {version if version is not None else 'sin versionar'} "
+                  f"(última: {migrations.SCHEMA_VERSION})")
+            for number, name in migrations.pending_migrations():
+                print(f"  pendiente {number}: {name}")
+            return
+
+        if args.command == 'init':
+            applied = migrations.init_database(output=print)
+        else:
+            applied = migrations.migrate(
+                batch_size=args.batch_size,
+                keep_columns=args.keep_columns,
+                output=print
+            )
+            if args.vacuum:
+                vacuum()
+
+        if applied:
+            print(f"✓ Migraciones aplicadas: {', '.join(applied)}")
+        else:
+            print(f"✓ El esquema ya está en la versión {migrations.SCHEMA_VERSION}")
+
+
+if __name__ == '__main__':
+    main()
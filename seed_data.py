@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Generar un conjunto de datos sintético de gran volumen
+
+Crea participantes, cuentas, posiciones, candidatos, votos, huellas de cliente
+y registros de auditoría con inserciones masivas por lotes. Con la misma
+semilla se obtienen los mismos datos, para que los benchmarks sean comparables.
+
+Uso:
+    python seed_data.py --participants 1000000 --votes 5000000 --positions 8 --candidates 5
+    python seed_data.py --participants 50000 --seed 7 --no-audit
+"""
+
+import argparse
+import os
+import time
+from app import create_app
+from app.services.seed_service import SeedService
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generar datos sintéticos de votación')
+    parser.add_argument('--participants', type=int, default=100000)
+    parser.add_argument('--positions', type=int, default=8)
+    parser.add_argument('--candidates', type=int, default=4, help='Candidatos por posición')
+    parser.add_argument('--votes', type=int, help='Votos totales (por defecto 70%% de participación)')
+    parser.add_argument('--users-ratio', type=float, default=1.0, help='Fracción de participantes con cuenta')
+    parser.add_argument('--clients', type=int, help='Huellas IP + navegador distintas (por defecto participantes / 5)')
+    parser.add_argument('--skew', type=float, default=1.1, help='Sesgo de popularidad de candidatos (0 = uniforme)')
+    parser.add_argument('--hours', type=float, default=12, help='Duración de la jornada de votación')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Filas por lote de inserción')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla para datos reproducibles')
+    parser.add_argument('--no-audit', action='store_true', help='No generar registros de auditoría')
+    args = parser.parse_args()
+
+    app = create_app(os.environ.get('FLASK_ENV', 'development'))
+    started = time.perf_counter()
+    last_report = [started]
+
+    def progress(table, inserted):
+        if time.perf_counter() - last_report[0] >= 2:
+            last_report[0] = time.perf_counter()
+            print(f"  {table}: {inserted:,} filas ({last_report[0] - started:.0f} s)")
+
+    with app.app_context():
+        report = SeedService.seed(
+            participants=args.participants,
+            positions=args.positions,
+            candidates=args.candidates,
+            votes=args.votes,
+            users_ratio=args.users_ratio,
+            clients=args.clients,
+            audit=not args.no_audit,
+            skew=args.skew,
+            hours=args.hours,
+            chunk_size=args.chunk_size,
+            seed_value=args.seed,
+            progress=progress
+        )
+
+    report.pop('pending_user_ids')
+    print(f"✓ Datos generados en {time.perf_counter() - started:.1f} s")
+    for table, count in report.items():
+        print(f"  {table}: {count:,}")
+
+
+if __name__ == '__main__':
+    main()
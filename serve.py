@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Servidor de producción multiproceso (pre-fork, solo stdlib + werkzeug)
+
+    python serve.py --workers 4 --port 5000
+    python serve.py --workers 8 --max-requests 5000 --max-requests-jitter 500
+    python serve.py --workers 4 --threads 32 --keepalive 5
+
+Señales (al proceso maestro):
+    kill -HUP  <pid>   reinicio gradual sin cortar conexiones (recarga el código)
+    kill -TERM <pid>   detener drenando las peticiones en curso
+    kill -QUIT <pid>   detener de inmediato
+
+Cada worker crea la app con create_app(); la base debe estar migrada antes
+(python manage.py init / migrate). run.py sigue siendo el servidor de desarrollo.
+"""
+
+import argparse
+import os
+import sys
+from server import Master, reuse_port_available
+
+
+def create_worker_app():
+    # Importar la app en el worker (tras el fork): el maestro no la carga (ver server.py),
+    # así que los workers de un SIGHUP ejecutan el código nuevo
+    from app import create_app
+    return create_app(os.environ.get('FLASK_ENV', 'production'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor de producción multiproceso')
+    parser.add_argument('--host', default=os.environ.get('HOST', '0.0.0.0'), help='Dirección de escucha')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT') or 5000), help='Puerto')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WORKERS') or os.cpu_count() or 1),
+                        help='Procesos worker (por defecto, uno por CPU)')
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('THREADS') or 16),
+                        help='Hilos por worker (conexiones atendidas a la vez)')
+    parser.add_argument('--keepalive', type=float, default=float(os.environ.get('KEEPALIVE') or 5),
+                        help='Segundos que una conexión inactiva retiene su hilo (0 = sin límite)')
+    parser.add_argument('--max-requests', type=int, default=int(os.environ.get('MAX_REQUESTS') or 0),
+                        help='Reciclar cada worker tras N peticiones (0 = nunca)')
+    parser.add_argument('--max-requests-jitter', type=int, default=int(os.environ.get('MAX_REQUESTS_JITTER') or 0),
+                        help='Variación aleatoria de --max-requests para no reciclar todos a la vez')
+    parser.add_argument('--graceful-timeout', type=float, default=float(os.environ.get('GRACEFUL_TIMEOUT') or 30),
+                        help='Segundos para terminar las peticiones en curso al detener o reciclar')
+    parser.add_argument('--backlog', type=int, default=2048, help='Cola de conexiones pendientes por socket')
+    parser.add_argument('--no-reuse-port', action='store_true',
+                        help='Compartir un único socket heredado en lugar de SO_REUSEPORT')
+    parser.add_argument('--access-log', action='store_true', help='Access log de werkzeug en stderr')
+    parser.add_argument('--pid-file', help='Archivo con el pid del maestro')
+    args = parser.parse_args()
+
+    # Métricas agregadas entre workers (/metrics); los contadores empiezan de cero en cada arranque
+    metrics_dir = os.environ.setdefault('METRICS_DIR', os.path.join('instance', 'metrics'))
+    os.makedirs(metrics_dir, exist_ok=True)
+    for name in os.listdir(metrics_dir):
+        if name.startswith('metrics_'):
+            os.remove(os.path.join(metrics_dir, name))
+
+    master = Master(
+        create_worker_app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        graceful_timeout=args.graceful_timeout,
+        reuse_port=False if args.no_reuse_port else reuse_port_available(),
+        access_log=args.access_log,
+        backlog=args.backlog,
+        pid_file=args.pid_file,
+        threads=args.threads,
+        keepalive=args.keepalive
+    )
+    sys.exit(master.run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,574 @@
+"""
+Servidor de producción multiproceso (pre-fork) sobre werkzeug.
+
+Un proceso maestro crea N workers con fork; cada worker construye su propia
+app con create_app() y atiende peticiones con el servidor de werkzeug sobre un
+pool fijo de hilos (no un hilo por conexión): los hilos, y el estado por hilo
+de la app (shards de métricas, sesiones), no crecen con las conexiones
+atendidas. Las conexiones que llegan con el pool ocupado esperan en la cola;
+una conexión keep-alive inactiva libera su hilo tras keepalive segundos.
+Con SO_REUSEPORT (Linux) cada worker abre su propio socket en el
+mismo puerto y el kernel reparte las conexiones; sin él, los workers heredan
+el socket que abre el maestro.
+
+Señales del maestro:
+    SIGTERM / SIGINT  parar drenando (los workers terminan las peticiones en curso)
+    SIGQUIT           parar de inmediato
+    SIGHUP            reinicio gradual: workers nuevos primero, los viejos se
+                      retiran a medida que los nuevos están listos
+
+Cada worker avisa al maestro por un pipe cuando está listo (app creada y
+socket escuchando). Un worker que alcanza max_requests pide su reemplazo y
+sigue atendiendo hasta que el nuevo está listo; recién entonces el maestro
+le ordena drenar, así nunca quedan menos de N workers escuchando.
+GET /healthz responde 200 en un worker listo y 503 mientras drena.
+
+Este módulo está fuera del paquete app y no importa nada de él: el maestro
+nunca carga la aplicación, así que los workers de un reinicio (SIGHUP)
+importan el código que haya en disco en ese momento.
+"""
+
+import errno
+import json
+import os
+import random
+import select
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import ThreadedWSGIServer, WSGIRequestHandler
+
+HEALTH_PATH = '/healthz'
+
+# Mensajes del worker al maestro (un byte por evento)
+READY = b'R'
+RECYCLE = b'M'
+DRAINING = b'D'
+
+# Workers que fallan al arrancar seguidos antes de detener el maestro
+MAX_BOOT_FAILURES = 5
+
+
+def reuse_port_available():
+    return hasattr(socket, 'SO_REUSEPORT')
+
+
+def create_listener(host, port, backlog=2048, reuse_port=False, listen=True):
+    """Socket TCP en host:port (con SO_REUSEPORT si se pide)"""
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    if listen:
+        sock.listen(backlog)
+    return sock
+
+
+def _log(message):
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] [{os.getpid()}] {message}", file=sys.stderr, flush=True)
+
+
+class _RequestHandler(WSGIRequestHandler):
+    """
+    Handler de werkzeug que cuenta peticiones en curso y cierra keep-alive al drenar.
+
+    Una conexión aceptada cuenta como en curso hasta su primera petición (el
+    worker no sale dejándola sin respuesta); una conexión keep-alive inactiva
+    entre peticiones no cuenta.
+    """
+
+    def setup(self):
+        # Sin timeout una conexión inactiva retendría un hilo del pool indefinidamente
+        self.timeout = self.server.worker.keepalive or None
+        super().setup()
+        self.holding = True  # _WorkerServer.process_request ya la contó
+
+    def run_wsgi(self):
+        worker = self.server.worker
+        # Los chequeos de salud no cuentan para el reciclado
+        worker.request_started(count=self.path.split('?', 1)[0] != HEALTH_PATH, hold=not self.holding)
+        self.holding = True
+        try:
+            super().run_wsgi()
+        finally:
+            if worker.draining:
+                self.close_connection = True
+            self.holding = False
+            worker.request_finished()
+
+    def finish(self):
+        super().finish()
+        if self.holding:
+            self.holding = False
+            self.server.worker.request_finished()
+
+    def log_request(self, code='-', size='-'):
+        # El access log lo escribe la app (LOG_REQUESTS); aquí solo con --access-log
+        if self.server.worker.access_log:
+            super().log_request(code, size)
+
+
+class _WorkerServer(ThreadedWSGIServer):
+    """
+    Servidor de un worker: atiende cada conexión en un pool fijo de hilos y al
+    parar acepta lo que quede en la cola de su socket.
+    """
+
+    def __init__(self, worker, *args, **kwargs):
+        self.worker = worker
+        self.pool = None
+        super().__init__(*args, **kwargs)
+        # Después de super(): con fd, werkzeug llama a server_close() al construirse
+        self.pool = ThreadPoolExecutor(max_workers=worker.threads, thread_name_prefix='worker')
+
+    def process_request(self, request, client_address):
+        self.worker.connection_accepted()
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        if self.pool is not None:
+            # Worker.run espera las peticiones en curso (hasta graceful_timeout)
+            self.pool.shutdown(wait=False)
+
+    def serve_forever(self, poll_interval=0.5):
+        try:
+            socketserver.BaseServer.serve_forever(self, poll_interval)
+        finally:
+            if self.worker.own_socket:
+                # Con SO_REUSEPORT las conexiones en la cola de este socket se
+                # perderían al cerrarlo: atenderlas antes de cerrar
+                while select.select([self.socket], [], [], 0)[0]:
+                    self._handle_request_noblock()
+            self.server_close()
+
+
+class Worker:
+    """Proceso worker: una app y un servidor de werkzeug con un pool de hilos"""
+
+    def __init__(self, app_factory, host, port, listener_fd=None, notify_fd=None,
+                 max_requests=0, max_requests_jitter=0, graceful_timeout=30,
+                 access_log=False, backlog=2048, threads=16, keepalive=5):
+        self.app_factory = app_factory
+        self.host = host
+        self.port = port
+        self.listener_fd = listener_fd
+        self.own_socket = listener_fd is None
+        self.notify_fd = notify_fd
+        self.max_requests = max_requests + random.randint(0, max_requests_jitter) if max_requests else 0
+        self.graceful_timeout = graceful_timeout
+        self.access_log = access_log
+        self.backlog = backlog
+        self.threads = max(1, threads)
+        self.keepalive = keepalive
+
+        self.app = None
+        self.server = None
+        self.ready = False
+        self.draining = False
+        self.recycling = False
+        self.handled = 0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    def connection_accepted(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def request_started(self, count=True, hold=True):
+        with self._lock:
+            self.in_flight += hold
+            self.handled += count
+            recycle = self.max_requests and self.handled >= self.max_requests and not self.recycling
+            if recycle:
+                self.recycling = True
+        if recycle:
+            if self.notify_fd is None:
+                self.drain(f'{self.handled} peticiones atendidas')
+            else:
+                # Seguir atendiendo hasta que el maestro tenga el reemplazo listo
+                _log(f"Worker pide reemplazo ({self.handled} peticiones atendidas)")
+                self._notify(RECYCLE)
+
+    def request_finished(self):
+        with self._lock:
+            self.in_flight -= 1
+            if self.in_flight == 0:
+                self._idle.notify_all()
+
+    def _notify(self, message):
+        if self.notify_fd is None:
+            return
+        try:
+            os.write(self.notify_fd, message)
+        except OSError:
+            pass
+
+    def drain(self, reason):
+        """Dejar de aceptar conexiones; las peticiones en curso terminan"""
+        with self._lock:
+            if self.draining:
+                return
+            self.draining = True
+        _log(f"Worker drenando ({reason})")
+        self._notify(DRAINING)
+        if self.server is not None:
+            # shutdown() espera a que serve_forever salga: no puede llamarse desde su hilo
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+    def _handle_signal(self, signum, frame):
+        if signum == signal.SIGQUIT:
+            os._exit(0)
+        self.drain(signal.Signals(signum).name)
+
+    def _watch_master(self):
+        master = os.getppid()
+        while not self.draining:
+            time.sleep(1)
+            if os.getppid() != master:
+                self.drain('el maestro terminó')
+                return
+
+    def wsgi_app(self, environ, start_response):
+        if environ.get('PATH_INFO') == HEALTH_PATH:
+            status = '503 Service Unavailable' if self.draining else '200 OK'
+            body = json.dumps({
+                'status': 'draining' if self.draining else 'ready',
+                'pid': os.getpid(),
+                'requests': self.handled,
+                'in_flight': self.in_flight
+            }).encode()
+            start_response(status, [('Content-Type', 'application/json'), ('Content-Length', str(len(body)))])
+            return [body]
+        return self.app(environ, start_response)
+
+    def run(self):
+        """Crear la app, escuchar y atender hasta drenar. Retorna el código de salida."""
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGQUIT):
+            signal.signal(signum, self._handle_signal)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+        self.app = self.app_factory()
+
+        if self.own_socket:
+            listener = create_listener(self.host, self.port, self.backlog, reuse_port=True)
+        else:
+            listener = socket.socket(fileno=os.dup(self.listener_fd))
+        try:
+            self.server = _WorkerServer(self, self.host, self.port, self.wsgi_app,
+                                        handler=_RequestHandler, fd=listener.fileno())
+        finally:
+            listener.close()  # el servidor usa su propia copia del descriptor
+
+        threading.Thread(target=self._watch_master, daemon=True).start()
+        self.ready = True
+        self._notify(READY)
+
+        if not self.draining:
+            self.server.serve_forever()
+        else:
+            self.server.server_close()
+
+        # Esperar las peticiones en curso (hasta graceful_timeout)
+        deadline = time.monotonic() + self.graceful_timeout
+        with self._lock:
+            while self.in_flight and time.monotonic() < deadline:
+                self._idle.wait(deadline - time.monotonic())
+            pending = self.in_flight
+        if pending:
+            _log(f"Worker sale con {pending} peticiones sin terminar")
+
+        _log(f"Worker terminado ({self.handled} peticiones)")
+        return 0
+
+    def shutdown(self):
+        """Volcar métricas y logs pendientes antes de salir del proceso"""
+        if self.app is None:
+            return
+        try:
+            from app.metrics import flush
+            from app.extensions import _stop_log_listener
+            if self.app.config.get('METRICS_DIR'):
+                flush(self.app)
+            _stop_log_listener()
+        except Exception:
+            pass
+
+
+class _WorkerInfo:
+    def __init__(self, pid, generation, notify_fd):
+        self.pid = pid
+        self.generation = generation
+        self.notify_fd = notify_fd
+        self.started = time.monotonic()
+        self.ready = False
+        self.retiring = False    # ya no cuenta como activo: necesita reemplazo
+        self.terminated = False  # se le envió SIGTERM (o está drenando por su cuenta)
+
+
+class Master:
+    """
+    Proceso maestro: crea, vigila y reemplaza workers.
+
+    Mantiene siempre `workers` procesos de la generación actual que no estén
+    drenando; un worker que se recicla o muere se reemplaza, y en un reinicio
+    (SIGHUP) cada worker viejo se retira cuando hay uno nuevo listo.
+    """
+
+    def __init__(self, app_factory, host='0.0.0.0', port=5000, workers=2, max_requests=0,
+                 max_requests_jitter=0, graceful_timeout=30, reuse_port=None,
+                 access_log=False, backlog=2048, pid_file=None, threads=16, keepalive=5):
+        self.app_factory = app_factory
+        self.host = host
+        self.port = port
+        self.num_workers = max(1, workers)
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.reuse_port = reuse_port_available() if reuse_port is None else reuse_port
+        self.access_log = access_log
+        self.backlog = backlog
+        self.pid_file = pid_file
+        self.threads = threads
+        self.keepalive = keepalive
+
+        self.workers = {}
+        self.generation = 0
+        self.stopping = False
+        self.stop_deadline = None
+        self.boot_failures = 0
+        self.exit_code = 0
+        self._signals = []
+        self._wakeup = None
+        self.socket = None
+
+    def _on_signal(self, signum, frame):
+        self._signals.append(signum)
+
+    def _bind(self):
+        if self.reuse_port:
+            # Reservar el puerto sin escuchar: el kernel solo reparte entre los
+            # sockets de los workers, y el puerto queda fijo entre generaciones
+            self.socket = create_listener(self.host, self.port, reuse_port=True, listen=False)
+        else:
+            self.socket = create_listener(self.host, self.port, self.backlog)
+            self.socket.set_inheritable(True)
+        self.port = self.socket.getsockname()[1]
+
+    def spawn(self):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid:
+            os.close(write_fd)
+            os.set_blocking(read_fd, False)
+            self.workers[pid] = _WorkerInfo(pid, self.generation, read_fd)
+            return pid
+
+        # Proceso hijo
+        os.close(read_fd)
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        for info in self.workers.values():
+            os.close(info.notify_fd)
+        for fd in self._wakeup:
+            os.close(fd)
+        if self.reuse_port:
+            self.socket.close()
+
+        worker = Worker(
+            self.app_factory, self.host, self.port,
+            listener_fd=None if self.reuse_port else self.socket.fileno(),
+            notify_fd=write_fd,
+            max_requests=self.max_requests,
+            max_requests_jitter=self.max_requests_jitter,
+            graceful_timeout=self.graceful_timeout,
+            access_log=self.access_log,
+            backlog=self.backlog,
+            threads=self.threads,
+            keepalive=self.keepalive
+        )
+        code = 1
+        try:
+            code = worker.run()
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 1
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+        finally:
+            worker.shutdown()
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    def _kill(self, pid, signum):
+        try:
+            os.kill(pid, signum)
+        except OSError as e:
+            if e.errno != errno.ESRCH:
+                raise
+
+    def _read_notifications(self, fds):
+        by_fd = {info.notify_fd: info for info in self.workers.values()}
+        for fd in fds:
+            info = by_fd.get(fd)
+            if info is None:
+                continue
+            try:
+                data = os.read(fd, 64)
+            except BlockingIOError:
+                continue
+            if READY in data and not info.ready:
+                info.ready = True
+                self.boot_failures = 0
+                _log(f"Worker {info.pid} listo en {time.monotonic() - info.started:.2f} s "
+                     f"({self._ready_count()}/{self.num_workers})")
+            if RECYCLE in data:
+                info.retiring = True
+            if DRAINING in data:
+                info.retiring = info.terminated = True
+        if not self.stopping:
+            self._retire_replaced()
+
+    def _active(self):
+        """Workers de la generación actual que no esperan reemplazo"""
+        return [w for w in self.workers.values() if w.generation == self.generation and not w.retiring]
+
+    def _ready_count(self):
+        return sum(1 for w in self._active() if w.ready)
+
+    def _retire_replaced(self):
+        """
+        Ordenar drenar a los workers reemplazados (reciclados o de una generación
+        anterior), uno por cada worker nuevo listo que sobre de los N activos.
+        """
+        replaced = sorted(
+            (w for w in self.workers.values()
+             if not w.terminated and (w.retiring or w.generation < self.generation)),
+            key=lambda w: (not w.retiring, w.started)
+        )
+        excess = len(replaced) + self._ready_count() - self.num_workers
+        for info in replaced[:max(excess, 0)]:
+            info.retiring = info.terminated = True
+            self._kill(info.pid, signal.SIGTERM)
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            info = self.workers.pop(pid, None)
+            if info is None:
+                continue
+            os.close(info.notify_fd)
+            code = os.waitstatus_to_exitcode(status)
+            if not info.ready and not self.stopping:
+                self.boot_failures += 1
+                _log(f"Worker {pid} falló al arrancar (código {code})")
+            elif code != 0 and not self.stopping:
+                _log(f"Worker {pid} terminó con código {code}")
+
+    def _maintain(self):
+        active = self._active()
+        if self.boot_failures >= MAX_BOOT_FAILURES:
+            _log(f"{self.boot_failures} workers fallaron al arrancar seguidos: deteniendo")
+            self.exit_code = 1
+            self.stop(graceful=True)
+            return
+        booting = [w for w in active if not w.ready]
+        if self.boot_failures and booting:
+            return  # tras un fallo, arrancar de a uno
+        for _ in range(self.num_workers - len(active)):
+            if self.boot_failures:
+                time.sleep(min(self.boot_failures, 5))
+            self.spawn()
+            if self.boot_failures:
+                break
+
+    def reload(self):
+        self.generation += 1
+        _log(f"Reinicio gradual: generación {self.generation}")
+
+    def stop(self, graceful=True):
+        if self.stopping and graceful:
+            return
+        self.stopping = True
+        self.stop_deadline = time.monotonic() + (self.graceful_timeout + 1 if graceful else 0)
+        signum = signal.SIGTERM if graceful else signal.SIGQUIT
+        _log(f"Deteniendo {len(self.workers)} workers ({'drenando' if graceful else 'inmediato'})")
+        for pid in list(self.workers):
+            self._kill(pid, signum)
+
+    def _handle_signals(self):
+        while self._signals:
+            signum = self._signals.pop(0)
+            if signum in (signal.SIGTERM, signal.SIGINT):
+                self.stop(graceful=True)
+            elif signum == signal.SIGQUIT:
+                self.stop(graceful=False)
+            elif signum == signal.SIGHUP and not self.stopping:
+                self.reload()
+
+    def run(self):
+        """Bucle del maestro. Retorna el código de salida del proceso."""
+        self._bind()
+        self._wakeup = os.pipe()
+        for fd in self._wakeup:
+            os.set_blocking(fd, False)
+        signal.set_wakeup_fd(self._wakeup[1])
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGQUIT, signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(signum, self._on_signal)
+
+        if self.pid_file:
+            with open(self.pid_file, 'w') as f:
+                f.write(str(os.getpid()))
+
+        mode = 'SO_REUSEPORT' if self.reuse_port else 'socket compartido'
+        _log(f"Escuchando en http://{self.host}:{self.port} con {self.num_workers} workers "
+             f"de {self.threads} hilos ({mode})")
+
+        try:
+            while True:
+                self._handle_signals()
+                self._reap()
+
+                if self.stopping:
+                    if not self.workers:
+                        break
+                    if time.monotonic() >= self.stop_deadline:
+                        for pid in list(self.workers):
+                            self._kill(pid, signal.SIGKILL)
+                else:
+                    self._maintain()
+
+                fds = [self._wakeup[0]] + [w.notify_fd for w in self.workers.values()]
+                try:
+                    readable = select.select(fds, [], [], 1.0)[0]
+                except InterruptedError:
+                    continue
+                if self._wakeup[0] in readable:
+                    try:
+                        while os.read(self._wakeup[0], 512):
+                            pass
+                    except BlockingIOError:
+                        pass
+                self._read_notifications(readable)
+        finally:
+            for pid in list(self.workers):
+                self._kill(pid, signal.SIGKILL)
+            self.socket.close()
+            if self.pid_file and os.path.exists(self.pid_file):
+                os.remove(self.pid_file)
+
+        _log("Maestro detenido")
+        return self.exit_code
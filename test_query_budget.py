@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test de presupuesto de consultas SQL por endpoint (detecta regresiones N+1).
+No necesita el servidor (base SQLite en memoria).
+Ejecutar con: python test_query_budget.py
+"""
+
+import sys
+from app import create_app, db
+from app.models import Participant, ParticipantUser, Position, Candidate, Vote
+from app.query_tracker import assert_query_budget
+from flask_jwt_extended import create_access_token
+
+# Máximo de sentencias por petición: no depende del número de posiciones,
+# candidatos ni votos
+BUDGETS = {
+    'summary': 5,
+    'position': 5,
+    'my_votes': 5,
+}
+
+POSITIONS = 6
+CANDIDATES = 4
+
+app = create_app('testing')
+failures = 0
+
+
+def check(name, call):
+    global failures
+    try:
+        response = call()
+        ok = response.status_code == 200
+        print(f"{'✓' if ok else '✗'} {name}")
+        if not ok:
+            print(f"  └─ status {response.status_code}")
+            failures += 1
+    except AssertionError as e:
+        print(f"✗ {name}")
+        print(f"  └─ {e}")
+        failures += 1
+
+
+with app.app_context():
+    participant = Participant(email='votante@test.com', first_name='Vo', last_name='Tante', has_voted=True)
+    db.session.add(participant)
+    db.session.flush()
+    user = ParticipantUser(email=participant.email, first_name='Vo', last_name='Tante',
+                           is_active=True, participant_id=participant.id)
+    user.set_password('secreto123')
+    db.session.add(user)
+
+    positions = []
+    for i in range(POSITIONS):
+        position = Position(name=f'Posición {i}', order=i)
+        db.session.add(position)
+        db.session.flush()
+        candidates = [Candidate(position_id=position.id, name=f'Candidato {i}-{j}', order=j)
+                      for j in range(CANDIDATES)]
+        db.session.add_all(candidates)
+        db.session.flush()
+        db.session.add(Vote(participant_id=participant.id, position_id=position.id,
+                            candidate_id=candidates[0].id, vote_type='candidate'))
+        positions.append(position)
+    db.session.commit()
+
+    token = create_access_token(identity=str(user.id))
+    position_id = positions[0].id
+
+client = app.test_client()
+
+print(f"[1] Presupuesto de consultas ({POSITIONS} posiciones x {CANDIDATES} candidatos)")
+check("GET /api/results/summary",
+      lambda: assert_query_budget(client, '/api/results/summary', BUDGETS['summary']))
+check("GET /api/results/position/<id>",
+      lambda: assert_query_budget(client, f'/api/results/position/{position_id}', BUDGETS['position']))
+check("GET /api/voting/my-votes",
+      lambda: assert_query_budget(client, '/api/voting/my-votes', BUDGETS['my_votes'],
+                                  headers={'Authorization': f'Bearer {token}'}))
+
+print()
+if failures:
+    print(f"✗ {failures} comprobaciones fallidas")
+    sys.exit(1)
+print("✓ Todas las comprobaciones pasaron")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test de rondas de votación: cierre y archivo de votos en rondas sucesivas.
+No necesita el servidor (base SQLite en memoria).
+Ejecutar con: python test_rounds.py
+"""
+
+import sys
+from app import create_app, db
+from app.models import Participant, Position, Candidate, Vote, ArchivedVote, ElectionRound
+from app.services.round_service import RoundService
+
+app = create_app('testing')
+failures = 0
+
+
+def check(name, condition, details=""):
+    global failures
+    print(f"{'✓' if condition else '✗'} {name}")
+    if details and not condition:
+        print(f"  └─ {details}")
+    if not condition:
+        failures += 1
+
+
+def vote(participant, position, candidate, round_id):
+    db.session.add(Vote(participant_id=participant.id, position_id=position.id,
+                        candidate_id=candidate.id, vote_type='candidate', round_id=round_id))
+    participant.has_voted = True
+    db.session.commit()
+
+
+with app.app_context():
+    position = Position(name='Presidencia', order=1)
+    db.session.add(position)
+    db.session.flush()
+    candidate = Candidate(position_id=position.id, name='Ana')
+    participants = [Participant(email=f'p{i}@test.com', first_name='P', last_name=str(i)) for i in range(3)]
+    db.session.add_all([candidate] + participants)
+    db.session.commit()
+
+    print("[1] Votos anteriores a la primera ronda")
+    vote(participants[1], position, candidate, None)
+    election_round, error = RoundService.open_round('Ronda 1')
+    check("Ronda 1 abierta", error is None, error)
+    check("Voto previo asignado a la ronda", Vote.query.filter_by(round_id=None).count() == 0)
+
+    response = app.test_client().post('/api/voting/public/submit', json={
+        'email': participants[1].email,
+        'votes': {str(position.id): {'type': 'candidate', 'candidate_id': candidate.id}}
+    })
+    check("Voto repetido rechazado con 409", response.status_code == 409, response.status_code)
+
+    print("\n[2] Dos rondas seguidas")
+    for number in (1, 2):
+        if number > 1:
+            election_round, error = RoundService.open_round(f'Ronda {number}')
+            check(f"Ronda {number} abierta", error is None, error)
+
+        # Tras vaciar votes, SQLite vuelve a asignar los mismos ids
+        vote(participants[0], position, candidate, election_round.id)
+        closed, error = RoundService.close_round(election_round.id)
+        check(f"Ronda {number} cerrada", error is None and closed.status == 'closed',
+              error or closed.status)
+
+    archived = ArchivedVote.query.order_by(ArchivedVote.id).all()
+    check("Votos archivados de ambas rondas", [a.round_id for a in archived] == [1, 1, 2],
+          [(a.id, a.vote_id, a.round_id) for a in archived])
+    check("votes vacía", Vote.query.count() == 0)
+    check("Sin rondas en cierre", ElectionRound.query.filter_by(status='closing').count() == 0)
+
+    print("\n[3] Reintento de un cierre interrumpido")
+    election_round, error = RoundService.open_round('Ronda 3')
+    check("Se puede abrir otra ronda", error is None, error)
+    for participant in participants:
+        vote(participant, position, candidate, election_round.id)
+
+    # Falla después de archivar los votos: la ronda queda en 'closing'
+    reset_has_voted = RoundService._reset_has_voted
+    RoundService._reset_has_voted = staticmethod(lambda chunk_size: 1 / 0)
+    try:
+        RoundService.close_round(election_round.id)
+    except ZeroDivisionError:
+        db.session.rollback()
+    finally:
+        RoundService._reset_has_voted = reset_has_voted
+
+    check("Ronda en cierre tras el fallo", db.session.get(ElectionRound, election_round.id).status == 'closing')
+    closed, error = RoundService.close_round(election_round.id)
+    check("Cierre retomado", error is None and closed.status == 'closed', error)
+    summary = closed.results_snapshot['summary']
+    check("Resultados congelados conservados", summary['total_votes'] == 3, summary)
+    check("Votos archivados contados", closed.archived_votes == 3, closed.archived_votes)
+
+print()
+if failures:
+    print(f"✗ {failures} comprobaciones fallidas")
+    sys.exit(1)
+print("✓ Todas las comprobaciones pasaron")
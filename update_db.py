@@ -2,13 +2,14 @@
 """Script para actualizar la base de datos con nuevas tablas"""
 from app import create_app, db
 from app.models import ParticipantUser
+from app.migrations import migrate
 from sqlalchemy import inspect
 
 app = create_app()
 
 with app.app_context():
     print("Creating database tables...")
-    db.create_all()
+    migrate(output=print)
     print("✓ Database tables created successfully")
     
     # Verificar que la tabla existe